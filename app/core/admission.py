@@ -0,0 +1,227 @@
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+from urllib.parse import parse_qs
+
+from app.core.config import AdmissionGroupLimits, settings
+
+# (method or None for any, path prefix, group); first match wins
+ROUTE_GROUPS: list[tuple[Optional[str], str, str]] = [
+    ("GET", "/order/stream", "stream"),
+    ("POST", "/order/purchase", "purchase"),
+    ("POST", "/order/custom", "purchase"),
+    ("POST", "/payments", "purchase"),
+    (None, "/order/purchases", "admin"),
+    (None, "/order/sales", "admin"),
+    (None, "/order/custom/", "admin"),
+    (None, "/order/archive", "admin"),
+    (None, "/order/status", "admin"),
+    (None, "/order/by-", "admin"),
+    (None, "/admin", "admin"),
+    ("GET", "/products", "catalog"),
+    ("POST", "/products/batch", "catalog"),
+    ("GET", "/suppliers", "catalog"),
+]
+
+# Token buckets kept for the most recently seen clients only
+_MAX_TRACKED_CLIENTS = 100_000
+
+
+def classify(method: str, path: str) -> str:
+    for rule_method, prefix, group in ROUTE_GROUPS:
+        if (rule_method is None or rule_method == method) and path.startswith(prefix):
+            return group
+    return "default"
+
+def client_address(scope) -> Optional[str]:
+    """Address of the client per ADMISSION_CLIENT_ADDRESS, None when it cannot be trusted.
+
+    Behind a proxy the peer is the proxy, so the address comes from X-Forwarded-For: the
+    rightmost entry not added by one of ADMISSION_TRUSTED_PROXIES.
+    """
+    mode = settings.ADMISSION_CLIENT_ADDRESS
+    peer = scope["client"][0] if scope.get("client") else None
+    if mode == "peer" or (mode == "forwarded" and peer not in settings.ADMISSION_TRUSTED_PROXIES):
+        return peer
+    if mode != "forwarded":
+        return None
+    forwarded = [
+        value.decode("latin-1") for name, value in scope.get("headers", []) if name == b"x-forwarded-for"
+    ]
+    hops = [hop.strip() for hop in ",".join(forwarded).split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if hop not in settings.ADMISSION_TRUSTED_PROXIES:
+            return hop
+    return None
+
+def client_key(scope) -> Optional[str]:
+    """Token bucket of a request: its address, with the `id_user` query parameter when given.
+
+    `id_user` is not authenticated, so it only splits an address's bucket and never lets
+    a client drain another one's. None (no per-client limit) without a trusted address.
+    """
+    address = client_address(scope)
+    if address is None:
+        return None
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    if query.get("id_user"):
+        return f"user:{query['id_user'][0]}@{address}"
+    return f"ip:{address}"
+
+class _GroupLimiter:
+    """Concurrency limit with a bounded FIFO queue (one per route group and worker)."""
+
+    def __init__(self, name: str, limits: AdmissionGroupLimits):
+        self.name = name
+        self.limits = limits
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_wait_budget = 0
+        self.rate_limited = 0
+        self._waits_ms: deque[float] = deque(maxlen=1000)
+
+    def take_token(self, client: str) -> float:
+        """Token bucket per client; returns 0 when allowed, else seconds until the next token."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(client, (float(self.limits.client_burst), now))
+        tokens = min(self.limits.client_burst, tokens + (now - updated) * self.limits.client_rate)
+        if tokens >= 1:
+            self._buckets[client] = (tokens - 1, now)
+            retry_after = 0.0
+        else:
+            self._buckets[client] = (tokens, now)
+            retry_after = (1 - tokens) / self.limits.client_rate
+        while len(self._buckets) > _MAX_TRACKED_CLIENTS:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    async def acquire(self) -> bool:
+        if self.active < self.limits.concurrency and not self._waiters:
+            self.active += 1
+            self._waits_ms.append(0.0)
+            return True
+        if len(self._waiters) >= self.limits.queue:
+            self.rejected_queue_full += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.limits.max_wait_ms / 1000)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted right at the deadline; the slot is ours
+                self._waits_ms.append((time.monotonic() - started) * 1000)
+                return True
+            waiter.cancel()
+            self._remove(waiter)
+            self.rejected_wait_budget += 1
+            return False
+        except BaseException:
+            # Client went away while queued
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                waiter.cancel()
+                self._remove(waiter)
+            raise
+        self._waits_ms.append((time.monotonic() - started) * 1000)
+        return True
+
+    def _remove(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self) -> None:
+        # Hand the slot straight to the next waiter, active stays the same
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict[str, float | int | None]:
+        waits = sorted(self._waits_ms)
+        return {
+            "concurrency": self.limits.concurrency,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_wait_budget": self.rejected_wait_budget,
+            "rate_limited": self.rate_limited,
+            "wait_ms_p50": round(waits[len(waits) // 2], 3) if waits else None,
+            "wait_ms_p99": round(waits[min(len(waits) - 1, int(len(waits) * 0.99))], 3) if waits else None,
+        }
+
+
+_limiters: dict[str, _GroupLimiter] = {}
+
+def _limiter(group: str) -> _GroupLimiter:
+    limiter = _limiters.get(group)
+    if limiter is None:
+        limits = settings.ADMISSION_GROUPS.get(group) or settings.ADMISSION_GROUPS["default"]
+        limiter = _limiters[group] = _GroupLimiter(group, limits)
+    return limiter
+
+def admission_stats() -> dict[str, dict[str, float | int | None]]:
+    return {group: limiter.stats() for group, limiter in _limiters.items()}
+
+
+async def _reject(send, status_code: int, detail: str, retry_after: float) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionControlMiddleware:
+    """Caps concurrent requests per route group so purchases keep DB connections under load.
+
+    Each group has its own concurrency limit and bounded queue; a request that cannot get
+    a slot within the group's wait budget is rejected with 503, and a client over its
+    token bucket with 429 (when its address is known, see `client_address`), both before
+    any DB session is opened.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limiter = _limiter(classify(scope["method"], scope["path"]))
+        client = client_key(scope)
+        retry_after = limiter.take_token(client) if client is not None else 0.0
+        if retry_after:
+            limiter.rate_limited += 1
+            await _reject(send, 429, "Too many requests", retry_after)
+            return
+        if not await limiter.acquire():
+            await _reject(send, 503, "Server busy, try again later", limiter.limits.max_wait_ms / 1000)
+            return
+
+        limiter.admitted += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
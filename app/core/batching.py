@@ -0,0 +1,110 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+from fastapi import HTTPException, status
+
+T = TypeVar("T")
+
+# handler(items) -> one result per item, an Exception for the items that failed
+BatchHandler = Callable[[list[T]], list[Any]]
+
+
+class BatchWriter(Generic[T]):
+    """Background writer that hands queued items to `handler` in batches.
+
+    A batch closes at `max_batch` items or `max_wait_ms` after its first item, whichever
+    comes first, so the handler can write it in one transaction. Every submitted item
+    gets a Future with its own result or exception.
+    """
+
+    def __init__(self, name: str, handler: BatchHandler, max_batch: int, max_wait_ms: int, queue_size: int):
+        self.name = name
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self._queue: queue.Queue[tuple[T, Future]] = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.batches = 0
+        self.items = 0
+        self.failed_items = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"batch-{self.name}", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Stop after writing whatever is queued."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, item: T) -> Future:
+        """Queue an item (starting the writer if needed); 503 when the queue is full."""
+        self.start()
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((item, future))
+        except queue.Full:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f"{self.name} queue is full")
+        return future
+
+    async def submit_and_wait(self, item: T) -> Any:
+        """Queue an item and wait for its batch; raises the item's exception."""
+        return await asyncio.wrap_future(self.submit(item))
+
+    def _next_batch(self) -> list[tuple[T, Future]]:
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._stop.is_set() or not self._queue.empty():
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: list[tuple[T, Future]]) -> None:
+        items = [item for item, _ in batch]
+        try:
+            results = self.handler(items)
+        except Exception as error:
+            print(f"{self.name}: batch of {len(batch)} failed: {error}")
+            results = [HTTPException(status_code=500, detail="Internal server error") for _ in batch]
+
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, BaseException):
+                self.failed_items += 1
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+        self.batches += 1
+        self.items += len(batch)
+
+    def stats(self) -> dict[str, float | int]:
+        return {
+            "queued": self._queue.qsize(),
+            "batches": self.batches,
+            "items": self.items,
+            "failed_items": self.failed_items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0,
+        }
@@ -0,0 +1,50 @@
+import hashlib
+import math
+import threading
+
+
+class BloomFilter:
+    """Set membership with no false negatives and a tunable false-positive rate.
+
+    Sized for `capacity` items at `error_rate`; k bit positions per item come from one
+    blake2b digest (double hashing). Thread-safe.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.items = 0
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _positions(self, value: str) -> list[int]:
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, value: str) -> None:
+        positions = self._positions(value)
+        with self._lock:
+            for position in positions:
+                self._bits[position >> 3] |= 1 << (position & 7)
+            self.items += 1
+
+    def __contains__(self, value: str) -> bool:
+        """False means definitely absent; True means probably present."""
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    def expected_error_rate(self) -> float:
+        """False-positive rate expected at the current fill."""
+        return (1 - math.exp(-self.hashes * self.items / self.size)) ** self.hashes
+
+    def stats(self) -> dict[str, float | int]:
+        return {
+            "capacity": self.capacity,
+            "items": self.items,
+            "bits": self.size,
+            "hashes": self.hashes,
+            "memory_kb": round(len(self._bits) / 1024, 2),
+            "expected_error_rate": round(self.expected_error_rate(), 6),
+        }
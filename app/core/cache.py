@@ -0,0 +1,76 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from app.core.config import settings
+
+MISSING = object()
+
+
+class LocalCache:
+    """Thread-safe in-process LRU cache with a per-entry TTL.
+
+    Values are shared between requests, so callers must treat them as read-only.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: float | None = None) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (self.ttl_seconds if ttl_seconds is None else ttl_seconds), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def live_entries(self) -> list[tuple[Hashable, float, Any]]:
+        """(key, seconds left, value) of the unexpired entries, least recently used first."""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, expires - now, value) for key, (expires, value) in self._entries.items() if expires > now]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_caches: dict[str, LocalCache] = {}
+_caches_lock = threading.Lock()
+
+def get_cache(name: str) -> LocalCache:
+    """Get (or create) the named process-wide cache."""
+    with _caches_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            cache = LocalCache(name, settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS)
+            _caches[name] = cache
+        return cache
+
+def all_caches() -> dict[str, LocalCache]:
+    return dict(_caches)
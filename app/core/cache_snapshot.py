@@ -0,0 +1,291 @@
+import importlib
+import json
+import mmap
+import os
+import threading
+import time
+import uuid
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+from app.core.cache import get_cache
+from app.core.config import settings
+
+_FORMAT = 2
+# How often buffered invalidations are appended to the journal
+_JOURNAL_FLUSH_SECONDS = 0.05
+
+# Last load and save of this worker, for GET /admin/cache-snapshot
+snapshot_stats: dict[str, Optional[dict[str, Any]]] = {"last_load": None, "last_save": None}
+
+
+# --- Invalidation journal ---
+class InvalidationJournal:
+    """Keys of the snapshotted caches invalidated on this host, appended to a JSON lines
+    file next to the snapshot. A snapshot records the journal's length when it was taken;
+    loading it skips just the keys invalidated since.
+
+    Keys are buffered and appended by the snapshot writer thread every
+    _JOURNAL_FLUSH_SECONDS, never on the invalidating thread. The first line identifies
+    the journal; once it outgrows CACHE_SNAPSHOT_JOURNAL_MAX_BYTES the next save starts
+    a new one (and snapshots of the old one no longer load).
+    """
+
+    def __init__(self):
+        self._pending: list[str] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def path() -> str:
+        return f"{settings.CACHE_SNAPSHOT_PATH}.invalidated"
+
+    def record(self, cache_name: str, key: Any) -> None:
+        with self._lock:
+            self._pending.append(_key_id(cache_name, key))
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        if self.position() is None:
+            self.rotate()
+        # One O_APPEND write per flush keeps the workers' lines from interleaving
+        descriptor = os.open(self.path(), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(descriptor, "".join(line + "\n" for line in pending).encode())
+        finally:
+            os.close(descriptor)
+
+    def rotate(self) -> None:
+        """Start a new, empty journal."""
+        path = self.path()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        with open(temporary, "w") as journal:
+            journal.write(json.dumps({"journal": uuid.uuid4().hex}) + "\n")
+        os.replace(temporary, path)
+
+    def position(self) -> Optional[tuple[str, int]]:
+        """(journal id, length in bytes), None when there is no journal yet."""
+        try:
+            with open(self.path(), "rb") as journal:
+                header = journal.readline()
+                journal.seek(0, os.SEEK_END)
+                return json.loads(header)["journal"], journal.tell()
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def read_since(self, journal_id: str, offset: int) -> Optional[tuple[set[str], int]]:
+        """Keys appended after `offset` and the new length, None if the journal was rotated."""
+        try:
+            with open(self.path(), "rb") as journal:
+                try:
+                    if json.loads(journal.readline())["journal"] != journal_id:
+                        return None
+                except (ValueError, KeyError):
+                    return None
+                journal.seek(offset)
+                appended = journal.read()
+        except FileNotFoundError:
+            return None
+        # A line still being written (no newline yet) is read on the next call
+        complete = appended[:appended.rfind(b"\n") + 1]
+        return {line for line in complete.decode().splitlines() if line}, offset + len(complete)
+
+
+def _key_id(cache_name: str, key: Any) -> str:
+    # JSON turns tuple keys into lists: the same id for a key read back from a snapshot
+    return json.dumps([cache_name, key])
+
+def is_snapshotted(cache_name: str) -> bool:
+    return settings.CACHE_SNAPSHOT_ENABLED and cache_name in settings.CACHE_SNAPSHOT_CACHES
+
+invalidation_journal = InvalidationJournal()
+
+
+# --- Values ---
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        model = type(value)
+        return {"m": f"{model.__module__}:{model.__qualname__}", "d": value.model_dump(mode="json")}
+    if isinstance(value, tuple):
+        return {"t": [_encode_value(item) for item in value]}
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise TypeError(f"Cannot snapshot {type(value).__name__} values")
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "m" in value:
+        module_name, _, class_name = value["m"].partition(":")
+        if not module_name.startswith("app."):
+            raise ValueError(f"Unexpected model in snapshot: {value['m']}")
+        return getattr(importlib.import_module(module_name), class_name).model_validate(value["d"])
+    if isinstance(value, dict) and "t" in value:
+        return tuple(_decode_value(item) for item in value["t"])
+    return value
+
+
+# --- Snapshots ---
+def save_cache_snapshot() -> dict[str, Any]:
+    """Write the live entries of the snapshotted caches (with their expiry) atomically.
+
+    The journal position is read before the entries: a key invalidated while they are
+    collected is journaled after it, and skipped on load.
+    """
+    started = time.perf_counter()
+    invalidation_journal.flush()
+    position = invalidation_journal.position()
+    if position is None or position[1] > settings.CACHE_SNAPSHOT_JOURNAL_MAX_BYTES:
+        invalidation_journal.rotate()
+        position = invalidation_journal.position()
+    journal_id, journal_offset = position
+    now_wall = time.time()
+    counts: dict[str, int] = {}
+    lines = []
+    for cache_name in settings.CACHE_SNAPSHOT_CACHES:
+        for key, seconds_left, value in get_cache(cache_name).live_entries():
+            try:
+                lines.append(json.dumps([cache_name, key, round(now_wall + seconds_left, 3), _encode_value(value)]))
+            except TypeError:
+                continue
+            counts[cache_name] = counts.get(cache_name, 0) + 1
+    header = {
+        "format": _FORMAT, "journal": journal_id, "journal_offset": journal_offset,
+        "created_at": now_wall, "pid": os.getpid(), "counts": counts,
+    }
+
+    path = settings.CACHE_SNAPSHOT_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as snapshot:
+        snapshot.write(json.dumps(header) + "\n")
+        snapshot.writelines(line + "\n" for line in lines)
+    os.replace(temporary, path)
+    result = {
+        "entries": counts, "bytes": os.path.getsize(path), "journal": journal_id, "journal_offset": journal_offset,
+        "save_ms": round((time.perf_counter() - started) * 1000, 3), "saved_at": now_wall,
+    }
+    snapshot_stats["last_save"] = result
+    return result
+
+def load_cache_snapshot() -> dict[str, Any]:
+    """Fill the snapshotted caches from the snapshot file (memory-mapped), unless it is
+    missing, of another format or its journal was rotated.
+
+    Entries keep the expiry they had; keys invalidated since the snapshot was taken are
+    skipped. Run it after the invalidation bus has started: keys journaled while loading
+    are evicted again.
+    """
+    started = time.perf_counter()
+    result: dict[str, Any] = {"status": "loaded", "entries": {}, "expired": 0, "invalidated": 0, "age_s": None}
+    path = settings.CACHE_SNAPSHOT_PATH
+    try:
+        if os.path.getsize(path) == 0:
+            result["status"] = "empty"
+            return _finish_load(result, started)
+        snapshot = open(path, "rb")
+    except FileNotFoundError:
+        result["status"] = "missing"
+        return _finish_load(result, started)
+
+    loaded = []
+    with snapshot, mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        try:
+            header = json.loads(mapped.readline())
+        except ValueError:
+            header = {}
+        if header.get("format") != _FORMAT:
+            result["status"] = "incompatible"
+            return _finish_load(result, started)
+        result["age_s"] = round(time.time() - header["created_at"], 3)
+        since = invalidation_journal.read_since(header["journal"], header["journal_offset"])
+        if since is None:
+            result["status"] = "stale"
+            return _finish_load(result, started)
+        invalidated, journal_offset = since
+
+        now_wall = time.time()
+        try:
+            for line in iter(mapped.readline, b""):
+                cache_name, key, expires_at, value = json.loads(line)
+                if cache_name not in settings.CACHE_SNAPSHOT_CACHES:
+                    continue
+                if expires_at <= now_wall:
+                    result["expired"] += 1
+                    continue
+                if _key_id(cache_name, key) in invalidated:
+                    result["invalidated"] += 1
+                    continue
+                key = tuple(key) if isinstance(key, list) else key
+                get_cache(cache_name).set(key, _decode_value(value), expires_at - now_wall)
+                loaded.append((cache_name, key))
+                result["entries"][cache_name] = result["entries"].get(cache_name, 0) + 1
+        except Exception as error:
+            print(f"Cache snapshot unreadable: {error}")
+            result["status"] = "invalid"
+
+    if result["status"] != "loaded":
+        for cache_name, key in loaded:
+            get_cache(cache_name).delete(key)
+        result["entries"] = {}
+        return _finish_load(result, started)
+    # Invalidated while loading
+    since = invalidation_journal.read_since(header["journal"], journal_offset)
+    for cache_name, key in loaded:
+        if since is None or _key_id(cache_name, key) in since[0]:
+            get_cache(cache_name).delete(key)
+            result["entries"][cache_name] -= 1
+            result["invalidated"] += 1
+    return _finish_load(result, started)
+
+def _finish_load(result: dict[str, Any], started: float) -> dict[str, Any]:
+    result["load_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    snapshot_stats["last_load"] = result
+    print(f"Cache snapshot {result['status']}: {result['entries']} ({result['load_ms']} ms)")
+    return result
+
+
+class CacheSnapshotWriter:
+    """Saves a snapshot every CACHE_SNAPSHOT_INTERVAL_SECONDS, and a last one at shutdown
+    (what the next workers of a deploy load). Appends the invalidation journal in between."""
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(5.0)
+        self._thread = None
+        self._save()
+
+    def _run(self) -> None:
+        next_save = time.monotonic() + settings.CACHE_SNAPSHOT_INTERVAL_SECONDS
+        while not self._stop.wait(_JOURNAL_FLUSH_SECONDS):
+            try:
+                invalidation_journal.flush()
+            except OSError as error:
+                print(f"Invalidation journal append failed: {error}")
+            if time.monotonic() >= next_save:
+                self._save()
+                next_save = time.monotonic() + settings.CACHE_SNAPSHOT_INTERVAL_SECONDS
+
+    def _save(self) -> None:
+        try:
+            save_cache_snapshot()
+        except Exception as error:
+            print(f"Cache snapshot failed: {error}")
+
+
+cache_snapshot_writer = CacheSnapshotWriter()
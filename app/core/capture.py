@@ -0,0 +1,166 @@
+import base64
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import time
+from typing import Any, Optional
+
+from app.core.config import settings
+
+# Request headers worth replaying (content negotiation and intake mode); never credentials
+_CAPTURED_HEADERS = {b"content-type", b"accept", b"accept-encoding", b"prefer", b"last-event-id"}
+_REDACTED = "********"
+
+
+def _redact(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {
+            key: _REDACTED if key in settings.CAPTURE_REDACT_FIELDS else _redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_redact(item) for item in value]
+    return value
+
+def _encode_body(body: bytes) -> tuple[Optional[str], Optional[str]]:
+    """(body, encoding): JSON bodies are redacted, other text kept, binary base64."""
+    if not body:
+        return None, None
+    try:
+        return json.dumps(_redact(json.loads(body))), "json"
+    except ValueError:
+        pass
+    try:
+        return body.decode("utf-8"), "text"
+    except UnicodeDecodeError:
+        return base64.b64encode(body).decode(), "base64"
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Drops records while the writer is behind: capture is best effort and must never
+    slow requests down (QueueHandler would report every full queue as a logging error)."""
+
+    def __init__(self, records: queue.Queue):
+        super().__init__(records)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _CaptureListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Waits for room: the writer thread is still draining a full queue at shutdown
+        self.queue.put(self._sentinel)
+
+
+class _CaptureLog:
+    """JSON lines in a size-rotated file, written by a background thread so the event
+    loop only enqueues."""
+
+    def __init__(self):
+        self._listener: Optional[_CaptureListener] = None
+        self._handler: Optional[_DroppingQueueHandler] = None
+        self._logger = logging.getLogger("app.traffic_capture")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+
+    def start(self) -> None:
+        if self._listener is not None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(settings.CAPTURE_PATH)), exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            settings.CAPTURE_PATH, maxBytes=settings.CAPTURE_MAX_BYTES, backupCount=settings.CAPTURE_BACKUPS
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        records: queue.Queue = queue.Queue(maxsize=settings.CAPTURE_QUEUE_SIZE)
+        self._handler = _DroppingQueueHandler(records)
+        self._logger.addHandler(self._handler)
+        self._listener = _CaptureListener(records, handler)
+        self._listener.start()
+
+    def write(self, record: dict[str, Any]) -> None:
+        self.start()
+        self._logger.info(json.dumps(record))
+
+    @property
+    def dropped(self) -> int:
+        """Records dropped because the writer thread was behind (since start)."""
+        return self._handler.dropped if self._handler is not None else 0
+
+    def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+            self._handler = None
+            self._logger.handlers.clear()
+
+
+capture_log = _CaptureLog()
+
+def stop_capture() -> None:
+    capture_log.stop()
+
+
+class TrafficCaptureMiddleware:
+    """Records a CAPTURE_SAMPLE_RATE share of requests (method, path, query, replayable
+    headers, body with CAPTURE_REDACT_FIELDS masked, status, route and duration) for
+    `python -m benchmarks.replay`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or random.random() >= settings.CAPTURE_SAMPLE_RATE:
+            await self.app(scope, receive, send)
+            return
+
+        body = bytearray()
+        truncated = False
+        response_status = {"code": None}
+
+        async def receive_wrapper():
+            nonlocal truncated
+            message = await receive()
+            if message["type"] == "http.request" and not truncated:
+                body.extend(message.get("body", b""))
+                if len(body) > settings.CAPTURE_MAX_BODY_BYTES:
+                    truncated = True
+            return message
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response_status["code"] = message["status"]
+            await send(message)
+
+        started_at = time.time()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            encoded_body, body_encoding = (None, None) if truncated else _encode_body(bytes(body))
+            route = scope.get("route")
+            capture_log.write({
+                "t": round(started_at, 6),
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "headers": {
+                    name.decode("latin-1"): value.decode("latin-1")
+                    for name, value in scope["headers"] if name in _CAPTURED_HEADERS
+                },
+                "body": encoded_body,
+                "body_encoding": body_encoding,
+                "body_truncated": truncated,
+                "route": getattr(route, "path", None),
+                "status": response_status["code"],
+                "duration_ms": round(duration_ms, 3),
+            })
@@ -1,10 +1,163 @@
+from typing import Literal
+
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+class AdmissionGroupLimits (BaseModel):
+    concurrency: int
+    queue: int
+    max_wait_ms: int
+    client_rate: float  # requests per second per client
+    client_burst: int
+
 class Settings (BaseSettings):
     APP_NAME: str = "no-name"
     DATABASE_URL: str = "no-database-url"
     SECRET_KEY: str = "no-secret-key"
 
+    # SQLite deployments with concurrent writers: WAL, busy timeout, cache/mmap pragmas and a
+    # single writer connection per worker next to a pool of readers
+    SQLITE_CONCURRENCY_PROFILE: bool = False
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_SYNCHRONOUS: Literal["OFF", "NORMAL", "FULL"] = "NORMAL"
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_READ_POOL_SIZE: int = 8
+    SQLITE_WRITER_TIMEOUT_SECONDS: float = 30.0
+
+    # Fast cold start: skip create_all when the schema fingerprint matches, load routers on first use
+    FAST_START: bool = False
+
+    # Orders archival
+    ARCHIVE_AFTER_DAYS: int = 365
+    ARCHIVE_BATCH_SIZE: int = 500
+
+    # Server-sent order status streams (other workers' changes arrive over the invalidation bus)
+    ORDER_STREAM_BUFFER: int = 10000
+    ORDER_STREAM_CLIENT_QUEUE: int = 1000
+    ORDER_STREAM_KEEPALIVE_SECONDS: float = 15.0
+    ORDER_STREAM_RETRY_MS: int = 3000
+    ORDER_STREAM_MAX_DELAY_MS: int = 20
+
+    # Bulk order status transitions: IDs per UPDATE ... WHERE id IN (...) and transaction
+    ORDER_BULK_CHUNK_SIZE: int = 500
+
+    # Post-commit event bus
+    EVENT_QUEUE_MAX_SIZE: int = 10000
+    EVENT_BATCH_SIZE: int = 100
+    EVENT_BATCH_MAX_WAIT_MS: int = 500
+
+    # Purchase intake: "sync" commits each order in its request, "group" commits many per transaction
+    ORDER_INTAKE_MODE: str = "sync"
+    ORDER_INTAKE_MAX_BATCH: int = 50
+    ORDER_INTAKE_MAX_WAIT_MS: int = 10
+    ORDER_INTAKE_QUEUE_SIZE: int = 10000
+
+    # Payment ledger: captures and refunds are written in batches
+    PAYMENT_LEDGER_MAX_BATCH: int = 100
+    PAYMENT_LEDGER_MAX_WAIT_MS: int = 5
+    PAYMENT_LEDGER_QUEUE_SIZE: int = 10000
+
+    # Automatic supplier replenishment
+    LOW_STOCK_THRESHOLD: int = 5
+    REPLENISH_TARGET_STOCK: int = 50
+
+    # In-process caches and cross-worker invalidation
+    CACHE_TTL_SECONDS: float = 60.0
+    CACHE_MAX_ENTRIES: int = 10000
+    INVALIDATION_BACKEND: str = "auto"  # auto | unix | file | redis | none
+    INVALIDATION_PATH: str = ""  # socket directory (unix) or log file (file); defaults to the temp dir
+    INVALIDATION_FILE_MAX_BYTES: int = 10 * 1024 * 1024
+    INVALIDATION_REDIS_URL: str = "redis://localhost:6379/0"
+    INVALIDATION_COALESCE_MS: int = 20
+
+    # Warm restarts: catalog caches are snapshotted to disk and loaded by new workers, minus
+    # the keys invalidated since (journaled next to the snapshot)
+    CACHE_SNAPSHOT_ENABLED: bool = False
+    CACHE_SNAPSHOT_PATH: str = "snapshots/catalog-caches.jsonl"
+    CACHE_SNAPSHOT_INTERVAL_SECONDS: float = 30.0
+    CACHE_SNAPSHOT_JOURNAL_MAX_BYTES: int = 10 * 1024 * 1024
+    CACHE_SNAPSHOT_CACHES: list[str] = ["products", "suppliers", "roles"]
+
+    # Products listing
+    CATALOG_DEFAULT_PAGE_SIZE: int = 10
+    CATALOG_MAX_PAGE_SIZE: int = 100
+    # Batch lookups: IDs per request, and per IN (...) query (below SQLite's bind parameter limit)
+    PRODUCT_BATCH_MAX_IDS: int = 500
+    PRODUCT_BATCH_CHUNK_SIZE: int = 500
+
+    # List response encodings
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+
+    # Password hashing: scrypt (N = 2**PASSWORD_SCRYPT_LOG_N) in a process pool; rows hashed
+    # with other parameters (or stored in plaintext) are rehashed on the next login
+    PASSWORD_SCRYPT_LOG_N: int = 14
+    PASSWORD_SCRYPT_R: int = 8
+    PASSWORD_SCRYPT_P: int = 1
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    # Bloom filter of registered emails in front of the signup lookup
+    EMAIL_FILTER_ENABLED: bool = True
+    EMAIL_FILTER_CAPACITY: int = 1_000_000
+    EMAIL_FILTER_ERROR_RATE: float = 0.01
+    EMAIL_FILTER_REBUILD_CHUNK: int = 10000
+
+    # Prebuilt statements: listing shapes (filters x fields x sort) kept per worker
+    STATEMENT_CACHE_MAX_SHAPES: int = 512
+
+    # Slow-query log: statements above the threshold, aggregated by fingerprint with their plan
+    SLOW_QUERY_LOG_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 100.0
+    SLOW_QUERY_EXPLAIN: bool = True
+    SLOW_QUERY_MAX_FINGERPRINTS: int = 500
+
+    # On-demand request profiling: requests with PROFILING_HEADER, plus a random sample
+    PROFILING_ENABLED: bool = False
+    PROFILING_HEADER: str = "X-Profile"
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL_MS: float = 5.0
+    PROFILING_TRACEMALLOC: bool = True
+    PROFILING_DIR: str = "profiles"
+    PROFILING_MAX_PROFILES: int = 50
+
+    # Traffic capture for `benchmarks.replay`: a sample of requests to a rotating JSON lines file
+    CAPTURE_ENABLED: bool = False
+    CAPTURE_SAMPLE_RATE: float = 1.0
+    CAPTURE_PATH: str = "captures/traffic.jsonl"
+    CAPTURE_MAX_BYTES: int = 50 * 1024 * 1024
+    CAPTURE_BACKUPS: int = 5
+    CAPTURE_MAX_BODY_BYTES: int = 64 * 1024
+    CAPTURE_QUEUE_SIZE: int = 10000
+    CAPTURE_REDACT_FIELDS: set[str] = {"password"}
+
+    # Admission control per route group (JSON in the environment)
+    ADMISSION_CONTROL_ENABLED: bool = False
+    # Client address for the token buckets: "none" (only the concurrency limits apply), "peer"
+    # (the app is exposed directly) or "forwarded" (X-Forwarded-For of ADMISSION_TRUSTED_PROXIES)
+    ADMISSION_CLIENT_ADDRESS: Literal["none", "peer", "forwarded"] = "none"
+    ADMISSION_TRUSTED_PROXIES: set[str] = set()
+    ADMISSION_GROUPS: dict[str, AdmissionGroupLimits] = {
+        "purchase": AdmissionGroupLimits(concurrency=8, queue=200, max_wait_ms=2000, client_rate=5, client_burst=10),
+        "catalog": AdmissionGroupLimits(concurrency=4, queue=100, max_wait_ms=250, client_rate=50, client_burst=100),
+        "admin": AdmissionGroupLimits(concurrency=2, queue=10, max_wait_ms=1000, client_rate=2, client_burst=5),
+        # Long-lived SSE connections: the cap is on open streams, reconnects are rate limited
+        "stream": AdmissionGroupLimits(concurrency=1000, queue=0, max_wait_ms=0, client_rate=1, client_burst=5),
+        "default": AdmissionGroupLimits(concurrency=4, queue=100, max_wait_ms=500, client_rate=20, client_burst=40),
+    }
+
+    # Request deadlines in ms (0: none) per admission route group, or per path prefix (longest
+    # wins); clients may send their own in DEADLINE_HEADER, up to REQUEST_DEADLINE_MAX_MS
+    REQUEST_DEADLINES_ENABLED: bool = True
+    REQUEST_DEADLINES_MS: dict[str, float] = {
+        "purchase": 10000, "catalog": 5000, "admin": 30000, "stream": 0, "default": 10000,
+    }
+    REQUEST_DEADLINE_ROUTES_MS: dict[str, float] = {"/order/archive": 300000}
+    REQUEST_DEADLINE_MAX_MS: float = 60000
+    DEADLINE_HEADER: str = "X-Request-Deadline-Ms"
+
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
@@ -1,33 +1,345 @@
 from fastapi import Depends
+from sqlalchemy import Column, DateTime, MetaData, String, Table, event, insert, select, delete
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import SQLModel, Session, create_engine
-from typing import Annotated
-from contextvars import ContextVar
+from starlette.concurrency import run_in_threadpool
+from typing import Annotated, Callable, Iterable, Iterator, Optional, TypeVar
+from contextvars import ContextVar, Token
+from contextlib import contextmanager
+from datetime import datetime
+import hashlib
+import importlib
+import importlib.util
+import threading
+import time
 
 from app.core.config import settings
+from app.core.deadlines import install_statement_deadlines
+from app.core.slow_queries import install_slow_query_log
+from app.core.sqlite import WriterRoutingSession, apply_sqlite_pragmas, is_file_database
+
+T = TypeVar("T")
 
 connect_args = {}
 
 if settings.DATABASE_URL.startswith("sqlite"):
     connect_args["check_same_thread"] = False
 
-engine = create_engine(settings.DATABASE_URL)
+# WAL and friends, plus a single writer connection per worker (see app/core/sqlite.py)
+sqlite_profile = settings.SQLITE_CONCURRENCY_PROFILE and is_file_database(settings.DATABASE_URL)
+
+if sqlite_profile:
+    connect_args["timeout"] = settings.SQLITE_BUSY_TIMEOUT_MS / 1000
+    engine = create_engine(
+        settings.DATABASE_URL, connect_args=connect_args,
+        pool_size=settings.SQLITE_READ_POOL_SIZE, max_overflow=0
+    )
+    write_engine = create_engine(
+        settings.DATABASE_URL, connect_args=connect_args,
+        pool_size=1, max_overflow=0, pool_timeout=settings.SQLITE_WRITER_TIMEOUT_SECONDS
+    )
+    for profiled_engine in (engine, write_engine):
+        event.listen(profiled_engine, "connect", apply_sqlite_pragmas)
+else:
+    engine = create_engine(settings.DATABASE_URL, connect_args=connect_args)
+    write_engine = engine
+
+if settings.SLOW_QUERY_LOG_ENABLED:
+    install_slow_query_log(engine)
+    if write_engine is not engine:
+        install_slow_query_log(write_engine)
+
+if settings.REQUEST_DEADLINES_ENABLED:
+    install_statement_deadlines(engine)
+    if write_engine is not engine:
+        install_statement_deadlines(write_engine)
+
+def new_session() -> Session:
+  """A session on the configured engine(s)."""
+  if sqlite_profile:
+    return WriterRoutingSession(engine, write_engine)
+  return Session(engine)
+
+# Kept out of SQLModel.metadata so it can be read without importing any model
+_schema_metadata = MetaData()
+schema_fingerprint_table = Table(
+    "schema_fingerprint",
+    _schema_metadata,
+    Column("fingerprint", String(64), primary_key=True),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+def schema_fingerprint(model_modules: Iterable[str]) -> str:
+    """Hash of the model sources; any change to them forces a `create_all`."""
+    digest = hashlib.sha256()
+    for module in sorted(model_modules):
+        spec = importlib.util.find_spec(module)
+        if spec is None or spec.origin is None:
+            raise RuntimeError(f"Model module not found: {module}")
+        digest.update(module.encode())
+        with open(spec.origin, "rb") as source:
+            digest.update(source.read())
+    return digest.hexdigest()
 
-def init_db():
+def _stored_schema_fingerprint() -> Optional[str]:
+    with engine.connect() as connection:
+        _schema_metadata.create_all(connection)
+        connection.commit()
+        return connection.execute(select(schema_fingerprint_table.c.fingerprint)).scalar()
+
+def _store_schema_fingerprint(fingerprint: str) -> None:
+    with engine.begin() as connection:
+        _schema_metadata.create_all(connection)
+        connection.execute(delete(schema_fingerprint_table))
+        connection.execute(insert(schema_fingerprint_table).values(
+            fingerprint=fingerprint, applied_at=datetime.utcnow()
+        ))
+
+def init_db(model_modules: Iterable[str] = ()):
+    """Create the tables.
+
+    In FAST_START mode only the stored schema fingerprint is checked; the models are
+    imported and `create_all` runs only when it does not match.
+    """
+    model_modules = list(model_modules)
+    started = time.perf_counter()
+    fingerprint = schema_fingerprint(model_modules) if model_modules else None
+    if settings.FAST_START and fingerprint and _stored_schema_fingerprint() == fingerprint:
+        print(f"Schema fingerprint matches, skipped create_all ({time.perf_counter() - started:.3f}s)")
+        return
+    for module in model_modules:
+        importlib.import_module(module)
     SQLModel.metadata.create_all(engine)
+    # create_all skips existing tables, so indexes added to them later are created here
+    indexes_created = True
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(engine, checkfirst=True)
+            except IntegrityError as error:
+                # A unique index over rows that already break it: serve anyway, retry next start
+                indexes_created = False
+                print(f"Could not create index {index.name} on {table.name}, existing rows conflict: {error.orig}")
+    if fingerprint and indexes_created:
+        _store_schema_fingerprint(fingerprint)
+    print(f"Schema created/verified with create_all ({time.perf_counter() - started:.3f}s)")
+
+class _RequestSession:
+  """The session of one request, opened by its first `db_session.get()`.
+
+  Shared by reference, so a session opened in a threadpool call (which runs in a copy of
+  the request context) is still the one the request closes. Threadpool work started with
+  `run_in_threadpool_with_session` keeps it open past the end of a cancelled request:
+  it is closed once the last such call returns, and never opened again after that.
+  """
+  __slots__ = ("session", "opened_at", "held_seconds", "users", "finished", "_lock")
+
+  def __init__(self):
+    self.session: Optional[Session] = None
+    self.opened_at = 0.0
+    # None until the request first uses the DB
+    self.held_seconds: Optional[float] = None
+    # Threadpool calls using the session, and whether get_session has exited
+    self.users = 0
+    self.finished = False
+    self._lock = threading.Lock()
+
+  def open(self) -> Session:
+    with self._lock:
+      if self.finished and self.users == 0:
+        raise RuntimeError("The request has finished, its DB session is closed")
+      if self.session is None:
+        self.session = new_session()
+        self.opened_at = time.perf_counter()
+      return self.session
+
+  def close(self) -> None:
+    if self.session is None:
+      return
+    self.session.close()
+    self.session = None
+    self.held_seconds = (self.held_seconds or 0.0) + time.perf_counter() - self.opened_at
+
+  def enter(self) -> bool:
+    """Register a threadpool call using the session; False once the request has finished."""
+    with self._lock:
+      if self.finished:
+        return False
+      self.users += 1
+      return True
+
+  def leave(self) -> None:
+    with self._lock:
+      self.users -= 1
+      if not self.finished or self.users:
+        return
+    self._finish()
+
+  def finish(self) -> None:
+    """The request is done: close the session now, or when its last threadpool call returns."""
+    with self._lock:
+      self.finished = True
+      if self.users:
+        return
+    self._finish()
+
+  def _finish(self) -> None:
+    self.close()
+    request_session_stats.record(self.held_seconds)
+
+
+class RequestSessionStats:
+  """How many requests opened a session, and for how long (per worker)."""
+
+  def __init__(self):
+    self.requests = 0
+    self.requests_with_db = 0
+    self.held_seconds = 0.0
+    self.max_held_seconds = 0.0
+
+  def record(self, held_seconds: Optional[float]) -> None:
+    self.requests += 1
+    if held_seconds is not None:
+      self.requests_with_db += 1
+      self.held_seconds += held_seconds
+      self.max_held_seconds = max(self.max_held_seconds, held_seconds)
+
+  def stats(self) -> dict[str, float | int | None]:
+    without_db = self.requests - self.requests_with_db
+    return {
+      "requests": self.requests,
+      "requests_with_db": self.requests_with_db,
+      "requests_without_db": without_db,
+      "share_without_db": round(without_db / self.requests, 4) if self.requests else None,
+      "avg_held_ms": round(self.held_seconds / self.requests_with_db * 1000, 3) if self.requests_with_db else None,
+      "max_held_ms": round(self.max_held_seconds * 1000, 3),
+    }
+
+
+request_session_stats = RequestSessionStats()
+
+
+class LazySessionVar:
+  """A `ContextVar[Session]` whose per-request value is only opened on first `get()`.
+
+  Requests answered without SQL (validation errors, cache hits) never create a session
+  or check out a connection. `session_scope()` binds a real session as before.
+  """
+
+  def __init__(self, name: str):
+    self._var: ContextVar[Session | _RequestSession] = ContextVar(name)
+
+  def get(self, *default):
+    value = self._var.get(*default)
+    if isinstance(value, _RequestSession):
+      return value.open()
+    return value
+
+  def current(self) -> Optional[Session]:
+    """The bound session if one is open, without opening the request's."""
+    value = self._var.get(None)
+    if isinstance(value, _RequestSession):
+      return value.session
+    return value
+
+  def release(self) -> None:
+    """Close the request's session if it is open (a later `get()` opens a new one)."""
+    value = self._var.get(None)
+    if isinstance(value, _RequestSession):
+      value.close()
+
+  def request(self) -> "Optional[_RequestSession]":
+    """The lazily opened session of the current request, if this is one."""
+    value = self._var.get(None)
+    return value if isinstance(value, _RequestSession) else None
+
+  def set(self, value: "Session | _RequestSession") -> Token:
+    return self._var.set(value)
+
+  def reset(self, token: Token) -> None:
+    self._var.reset(token)
+
+
+db_session = LazySessionVar("db_session")
 
 async def get_session():
-  """Get the database session.
+  """Bind the request's database session to `db_session`.
 
-  Returns:
-    session: The database session.
+  The session is created by the first repository that uses it and closed when the
+  endpoint returns (routers declare this dependency with scope="function", so the
+  connection is back in the pool before the response is sent).
   """
-  with Session(engine) as session:
-    token = db_session.set(session)
-    yield session
+  request_session = _RequestSession()
+  token = db_session.set(request_session)
+  try:
+    yield
+  finally:
+    request_session.finish()
     db_session.reset(token)
 
+async def run_in_threadpool_with_session(fn: Callable[..., T], *args) -> T:
+  """`run_in_threadpool` for work that uses the request's session.
+
+  A request cancelled meanwhile (past its deadline, client gone) stops waiting right
+  away, but the thread runs on: the session is only closed once it returns, and the call
+  is skipped if the request finished before the thread started.
+  """
+  request_session = db_session.request()
+  if request_session is None:
+    return await run_in_threadpool(fn, *args)
+
+  def call():
+    if not request_session.enter():
+      raise RuntimeError("The request has finished, its DB session is closed")
+    try:
+      return fn(*args)
+    finally:
+      request_session.leave()
+
+  return await run_in_threadpool(call)
+
+def release_session() -> None:
+  """Close the request's session early, once a handler is done with the DB (e.g.
+  before a long streaming response). A later `db_session.get()` opens a new one."""
+  db_session.release()
 
 SessionDep = Annotated[Session, Depends(get_session)]
 
-db_session: ContextVar[Session] = ContextVar("db_session")
+@contextmanager
+def session_scope() -> Iterator[Session]:
+  """Open a session outside of a request (jobs, background workers).
+
+  Returns:
+    session: The database session, also bound to `db_session`.
+  """
+  with new_session() as session:
+    token = db_session.set(session)
+    try:
+      yield session
+    finally:
+      db_session.reset(token)
+
+_AFTER_COMMIT_KEY = "after_commit_callbacks"
+
+def on_commit(callback: Callable[[], None]) -> None:
+  """Run `callback` once the current session commits.
+
+  Callbacks are dropped on rollback; without a bound session it runs right away.
+  """
+  session = db_session.current()
+  if session is None:
+    callback()
+    return
+  session.info.setdefault(_AFTER_COMMIT_KEY, []).append(callback)
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit_callbacks(session: Session) -> None:
+  for callback in session.info.pop(_AFTER_COMMIT_KEY, []):
+    try:
+      callback()
+    except Exception as error:
+      print(f"After-commit callback failed: {error}")
 
+@event.listens_for(Session, "after_rollback")
+def _discard_after_commit_callbacks(session: Session) -> None:
+  session.info.pop(_AFTER_COMMIT_KEY, None)
@@ -0,0 +1,193 @@
+import asyncio
+import json
+import math
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.admission import classify
+from app.core.config import settings
+
+# SQLite VM instructions between two deadline checks of a running statement
+_SQLITE_PROGRESS_STEPS = 1000
+# Set on a pooled SQLite connection while it carries a progress handler
+_PROGRESS_HANDLER_KEY = "deadline_progress_handler"
+
+
+class DeadlineExceeded(Exception):
+    """A statement was refused because the request deadline had already passed."""
+
+
+class Deadline:
+    """Point in time (monotonic) by which the current request must be answered."""
+    __slots__ = ("expires_at", "exceeded")
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+        self.exceeded = False
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    def extend_to(self, other: "Optional[Deadline]") -> None:
+        """Push this deadline back to `other` if that is later (no deadline: never)."""
+        self.expires_at = math.inf if other is None else max(self.expires_at, other.expires_at)
+        self.exceeded = False
+
+    def passed(self) -> bool:
+        """Whether the deadline has passed (also the SQLite progress handler: a true
+        return value interrupts the running statement)."""
+        if not self.exceeded and time.monotonic() >= self.expires_at:
+            self.exceeded = True
+        return self.exceeded
+
+
+# Bound by DeadlineMiddleware next to `db_session`, for the statements of the request
+request_deadline: ContextVar[Optional[Deadline]] = ContextVar("request_deadline", default=None)
+
+
+# --- Statements ---
+def _before_cursor_execute(connection, cursor, statement, parameters, context, executemany) -> None:
+    deadline = request_deadline.get()
+    sqlite = connection.dialect.name == "sqlite"
+    if deadline is None:
+        if sqlite and connection.info.pop(_PROGRESS_HANDLER_KEY, False):
+            connection.connection.dbapi_connection.set_progress_handler(None, 0)
+        return
+    if deadline.passed():
+        raise DeadlineExceeded("Request deadline exceeded before the statement ran")
+    if sqlite:
+        # Also covers the rows fetched after execute(); cleared at checkin
+        connection.connection.dbapi_connection.set_progress_handler(deadline.passed, _SQLITE_PROGRESS_STEPS)
+        connection.info[_PROGRESS_HANDLER_KEY] = True
+    elif connection.dialect.name == "postgresql" and math.isfinite(deadline.expires_at):
+        # Until the end of the transaction; the server cancels the statement past it
+        cursor.execute(f"SET LOCAL statement_timeout = {max(1, int(deadline.remaining() * 1000))}")
+
+def _clear_progress_handler(dbapi_connection, connection_record) -> None:
+    if connection_record.info.pop(_PROGRESS_HANDLER_KEY, False):
+        dbapi_connection.set_progress_handler(None, 0)
+
+def install_statement_deadlines(engine: Engine) -> None:
+    """Bound the statements of requests by their deadline: a SQLite progress handler
+    interrupts them, PostgreSQL gets a statement_timeout of the time left. On other
+    databases a statement is only refused once the deadline has passed."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "checkin", _clear_progress_handler)
+
+
+# --- Requests ---
+class DeadlineStats:
+    """Requests that overran their deadline, by route (per worker)."""
+
+    def __init__(self):
+        self._exceeded: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, route: str) -> None:
+        with self._lock:
+            self._exceeded[route] += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {"exceeded": sum(self._exceeded.values()), "by_route": dict(self._exceeded.most_common())}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._exceeded.clear()
+
+
+deadline_stats = DeadlineStats()
+
+
+def route_deadline_seconds(method: str, path: str) -> Optional[float]:
+    """Configured deadline of a route: the longest REQUEST_DEADLINE_ROUTES_MS prefix, else
+    its admission group's REQUEST_DEADLINES_MS. None when it has none (0)."""
+    prefixes = [prefix for prefix in settings.REQUEST_DEADLINE_ROUTES_MS if path.startswith(prefix)]
+    if prefixes:
+        milliseconds = settings.REQUEST_DEADLINE_ROUTES_MS[max(prefixes, key=len)]
+    else:
+        group = classify(method, path)
+        milliseconds = settings.REQUEST_DEADLINES_MS.get(group, settings.REQUEST_DEADLINES_MS.get("default", 0))
+    return milliseconds / 1000 if milliseconds > 0 else None
+
+def _requested_seconds(scope) -> Optional[float]:
+    header = settings.DEADLINE_HEADER.lower().encode()
+    for name, value in scope.get("headers", []):
+        if name == header:
+            try:
+                milliseconds = float(value)
+            except ValueError:
+                return None
+            if milliseconds <= 0:
+                return None
+            return min(milliseconds, settings.REQUEST_DEADLINE_MAX_MS) / 1000
+    return None
+
+async def _send_deadline_exceeded(send) -> None:
+    body = json.dumps({"detail": "Request deadline exceeded"}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 504,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class DeadlineMiddleware:
+    """Gives each request a deadline (its route's, or DEADLINE_HEADER in ms, capped at
+    REQUEST_DEADLINE_MAX_MS) bound to `request_deadline` for its DB statements.
+
+    Past the deadline the request is cancelled (its dependencies exit, so the session is
+    closed and the connection back in the pool, once threadpool work still using it has
+    returned) and answered with 504, as is a 5xx raised by a statement the deadline
+    interrupted. Coalesced reads shared with other requests are not bound by it alone
+    (see SingleFlight).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        seconds = _requested_seconds(scope) or route_deadline_seconds(scope["method"], scope["path"])
+        if seconds is None:
+            await self.app(scope, receive, send)
+            return
+
+        deadline = Deadline(seconds)
+        response_started = False
+        replaced = False
+
+        async def send_within_deadline(message):
+            nonlocal response_started, replaced
+            if replaced:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+                if message["status"] >= 500 and deadline.passed():
+                    replaced = True
+                    await _send_deadline_exceeded(send)
+                    return
+            await send(message)
+
+        token = request_deadline.set(deadline)
+        try:
+            await asyncio.wait_for(self.app(scope, receive, send_within_deadline), timeout=seconds)
+        except asyncio.TimeoutError:
+            deadline.exceeded = True
+            if not response_started:
+                await _send_deadline_exceeded(send)
+        finally:
+            request_deadline.reset(token)
+            if deadline.exceeded:
+                route = scope.get("route")
+                deadline_stats.record(f"{scope['method']} {getattr(route, 'path', scope['path'])}")
@@ -0,0 +1,122 @@
+import gzip
+import json
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+
+try:
+    import msgpack
+except ImportError:  # optional: MessagePack is only offered when installed
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # optional: br is only offered when installed
+    brotli = None
+
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.columnar+json"
+MSGPACK = "application/msgpack"
+COLUMNAR_MSGPACK = "application/vnd.columnar+msgpack"
+
+
+def supported_media_types() -> list[str]:
+    media_types = [JSON, COLUMNAR_JSON]
+    if msgpack is not None:
+        media_types += [MSGPACK, COLUMNAR_MSGPACK]
+    return media_types
+
+def supported_encodings() -> list[str]:
+    return (["br"] if brotli is not None else []) + ["gzip"]
+
+
+def _parse_header(header: Optional[str]) -> list[tuple[str, float]]:
+    """Parse an Accept / Accept-Encoding header into (value, q), best first."""
+    values = []
+    for position, part in enumerate((header or "").split(",")):
+        value, *params = [piece.strip() for piece in part.split(";")]
+        if not value:
+            continue
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        values.append((value.lower(), quality, position))
+    values.sort(key=lambda item: (-item[1], item[2]))
+    return [(value, quality) for value, quality, _ in values]
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """Pick the list encoding from the Accept header; JSON unless something else is asked for."""
+    supported = supported_media_types()
+    for value, quality in _parse_header(accept):
+        if quality <= 0:
+            continue
+        if value in supported:
+            return value
+        if value in ("*/*", "application/*"):
+            return JSON
+    return JSON
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the content coding from Accept-Encoding, or None for identity."""
+    supported = supported_encodings()
+    accepted = {value: quality for value, quality in _parse_header(accept_encoding)}
+    candidates = [
+        encoding for encoding in supported
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda encoding: accepted.get(encoding, accepted.get("*", 0.0)))
+
+
+def to_columnar(data: Any) -> Any:
+    """Rows (list of dicts) become {"count": n, "columns": {field: [values]}}; a paginated
+    payload keeps its metadata and gets columnar `items`."""
+    if isinstance(data, dict) and isinstance(data.get("items"), list):
+        return {**data, "items": to_columnar(data["items"])}
+    if isinstance(data, list) and all(isinstance(row, dict) for row in data):
+        fields: list[str] = []
+        for row in data:
+            for field in row:
+                if field not in fields:
+                    fields.append(field)
+        return {
+            "count": len(data),
+            "columns": {field: [row.get(field) for row in data] for field in fields},
+        }
+    return data
+
+def encode_body(data: Any, media_type: str) -> bytes:
+    """Serialize already JSON-compatible data."""
+    if media_type in (COLUMNAR_JSON, COLUMNAR_MSGPACK):
+        data = to_columnar(data)
+    if media_type in (MSGPACK, COLUMNAR_MSGPACK):
+        return msgpack.packb(data, use_bin_type=True)
+    # Same settings as FastAPI's JSONResponse
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def compress_body(body: bytes, encoding: Optional[str]) -> tuple[bytes, Optional[str]]:
+    """Compress when a coding was negotiated and the body is worth it."""
+    if encoding is None or len(body) < settings.COMPRESSION_MIN_SIZE:
+        return body, None
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY), "br"
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0), "gzip"
+
+
+def negotiated_response(request: Request, content: Any, status_code: int = 200) -> Response:
+    """Encode a list payload in the format and coding the client asked for."""
+    media_type = negotiate_media_type(request.headers.get("accept"))
+    body = encode_body(jsonable_encoder(content), media_type)
+    body, content_encoding = compress_body(body, negotiate_encoding(request.headers.get("accept-encoding")))
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if content_encoding:
+        headers["Content-Encoding"] = content_encoding
+    return Response(content=body, status_code=status_code, media_type=media_type, headers=headers)
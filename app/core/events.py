@@ -0,0 +1,156 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Optional
+
+from app.core.config import settings
+from app.core.database import on_commit
+
+
+# --- Events ---
+@dataclass(frozen=True)
+class Event:
+    occurred_at: datetime = field(default_factory=datetime.utcnow, kw_only=True)
+
+@dataclass(frozen=True)
+class ProductStockChanged(Event):
+    product_id: int
+    stock: int
+    delta: int
+
+@dataclass(frozen=True)
+class OrderCreated(Event):
+    order_id: int
+    kind: str  # "client" | "supplier"
+
+@dataclass(frozen=True)
+class OrderStatusChanged(Event):
+    order_id: int
+    kind: str  # "client" | "supplier"
+    old_status: Optional[str]
+    new_status: str
+    client_id: Optional[int] = None  # owner of a client order
+
+
+EventHandler = Callable[[list[Event]], None]
+
+
+class _Consumer:
+    """A subscriber with its own queue and worker thread that handles events in batches."""
+
+    def __init__(self, name: str, event_types: tuple[type[Event], ...], handler: EventHandler,
+                 batch_size: int, max_wait: float):
+        self.name = name
+        self.event_types = event_types
+        self.handler = handler
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.queue: queue.Queue[Event] = queue.Queue(maxsize=settings.EVENT_QUEUE_MAX_SIZE)
+        self.dropped = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"events-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def offer(self, event: Event) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+            print(f"Event consumer {self.name} queue full, dropped {type(event).__name__}")
+
+    def _next_batch(self) -> list[Event]:
+        try:
+            batch = [self.queue.get(timeout=self.max_wait)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._stop.is_set() or not self.queue.empty():
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                self.handler(batch)
+            except Exception as error:
+                print(f"Event consumer {self.name} failed on a batch of {len(batch)}: {error}")
+
+
+class EventBus:
+    """In-process bus; consumers run on background threads, off the request path."""
+
+    def __init__(self):
+        self._consumers: dict[str, _Consumer] = {}
+        self._started = False
+
+    def subscribe(
+        self,
+        name: str,
+        event_types: tuple[type[Event], ...],
+        handler: EventHandler,
+        batch_size: Optional[int] = None,
+        max_wait: Optional[float] = None,
+    ) -> None:
+        """Register a batch handler for the given event types (idempotent per name)."""
+        if name in self._consumers:
+            return
+        consumer = _Consumer(
+            name, event_types, handler,
+            batch_size or settings.EVENT_BATCH_SIZE,
+            max_wait if max_wait is not None else settings.EVENT_BATCH_MAX_WAIT_MS / 1000,
+        )
+        self._consumers[name] = consumer
+        if self._started:
+            consumer.start()
+
+    def publish(self, event: Event) -> None:
+        for consumer in self._consumers.values():
+            if isinstance(event, consumer.event_types):
+                consumer.offer(event)
+
+    def start(self) -> None:
+        self._started = True
+        for consumer in self._consumers.values():
+            consumer.start()
+
+    def stop(self) -> None:
+        self._started = False
+        for consumer in self._consumers.values():
+            consumer.stop()
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            name: {"queued": consumer.queue.qsize(), "dropped": consumer.dropped}
+            for name, consumer in self._consumers.items()
+        }
+
+
+event_bus = EventBus()
+
+
+def publish_after_commit(event: Event) -> None:
+    """Publish an event once the current session commits; it is dropped on rollback."""
+    on_commit(lambda: event_bus.publish(event))
@@ -0,0 +1,401 @@
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Hashable, Optional
+
+from app.core.cache import get_cache
+from app.core.cache_snapshot import invalidation_journal, is_snapshotted
+from app.core.config import settings
+from app.core.database import on_commit
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Keys (or broadcast items) per message, keeps datagrams well under the Unix socket limit
+_MAX_KEYS_PER_MESSAGE = 500
+_MAX_ITEMS_PER_MESSAGE = 100
+
+
+# --- Transports ---
+class InvalidationTransport:
+    """Delivers opaque payloads from one worker to every other worker."""
+    # Messages this worker could not deliver to a peer
+    dropped = 0
+
+    def send(self, payload: bytes) -> None:
+        raise NotImplementedError
+
+    def receive(self, timeout: float) -> list[bytes]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class UnixSocketTransport(InvalidationTransport):
+    """Each worker binds a datagram socket in a shared directory; senders fan out to all of them."""
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.path = os.path.join(directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock")
+        self._inbox = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._inbox.bind(self.path)
+        self._outbox = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._outbox.setblocking(False)
+
+    def send(self, payload: bytes) -> None:
+        for name in os.listdir(self.directory):
+            peer = os.path.join(self.directory, name)
+            if not name.endswith(".sock") or peer == self.path:
+                continue
+            try:
+                self._outbox.sendto(payload, peer)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Worker is gone, clean up its socket file
+                try:
+                    os.unlink(peer)
+                except OSError:
+                    pass
+            except BlockingIOError:
+                self.dropped += 1
+                print(f"Invalidation peer {name} is not draining, message dropped")
+
+    def receive(self, timeout: float) -> list[bytes]:
+        self._inbox.settimeout(timeout)
+        try:
+            return [self._inbox.recv(1 << 20)]
+        except socket.timeout:
+            return []
+
+    def close(self) -> None:
+        self._inbox.close()
+        self._outbox.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+class FileTransport(InvalidationTransport):
+    """Workers append JSON lines to a shared file and tail it (portable fallback).
+
+    Past max_bytes the file is rotated: renamed to `{path}.1` and created anew. Lines are
+    appended under a shared lock on `{path}.lock` that the rotation takes exclusively, so
+    nothing lands in a rotated file, and readers drain the file they have open before
+    following the new one (a reader that falls a whole file behind still misses lines).
+    Without fcntl (Windows) the file is not rotated.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock_fd = os.open(f"{path}.lock", os.O_RDWR | os.O_CREAT, 0o644) if fcntl else None
+        with self._locked(shared=True):
+            self._fd = self._open_writer()
+            self._reader = open(path, "rb")
+        self._reader.seek(0, os.SEEK_END)
+        self._buffer = b""
+
+    @contextmanager
+    def _file_lock(self, shared: bool):
+        fcntl.flock(self._lock_fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _locked(self, shared: bool):
+        return self._file_lock(shared) if self._lock_fd is not None else nullcontext()
+
+    def _open_writer(self) -> int:
+        return os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _is_current(self, fd: int) -> bool:
+        try:
+            return os.fstat(fd).st_ino == os.stat(self.path).st_ino
+        except FileNotFoundError:
+            # Between the rename and the new file of a rotation
+            return False
+
+    def send(self, payload: bytes) -> None:
+        with self._locked(shared=True):
+            if not self._is_current(self._fd):
+                os.close(self._fd)
+                self._fd = self._open_writer()
+            # A single O_APPEND write per line keeps concurrent writers from interleaving
+            os.write(self._fd, payload + b"\n")
+            size = os.fstat(self._fd).st_size
+        if size > self.max_bytes and self._lock_fd is not None:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        with self._locked(shared=False):
+            # Another worker may have rotated it meanwhile
+            if not self._is_current(self._fd) or os.fstat(self._fd).st_size <= self.max_bytes:
+                return
+            os.replace(self.path, f"{self.path}.1")
+            os.close(self._fd)
+            self._fd = self._open_writer()
+
+    def _follow_rotation(self) -> bytes:
+        """Once the file being read was rotated, switch to the new one and return the
+        lines appended to the old one since the last read (no more can follow)."""
+        if self._is_current(self._reader.fileno()):
+            return b""
+        try:
+            reader = open(self.path, "rb")
+        except FileNotFoundError:
+            return b""
+        rest = self._reader.read()
+        self._reader.close()
+        self._reader = reader
+        return rest
+
+    def receive(self, timeout: float) -> list[bytes]:
+        deadline = time.monotonic() + timeout
+        while True:
+            chunk = self._reader.read() or self._follow_rotation()
+            if chunk:
+                lines = (self._buffer + chunk).split(b"\n")
+                self._buffer = lines.pop()
+                lines = [line for line in lines if line]
+                if lines:
+                    return lines
+            if time.monotonic() >= deadline:
+                return []
+            time.sleep(min(0.01, timeout))
+
+    def close(self) -> None:
+        os.close(self._fd)
+        self._reader.close()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+
+
+class RedisTransport(InvalidationTransport):
+    """Redis pub/sub adapter, for workers spread over several hosts."""
+
+    def __init__(self, url: str, channel: str):
+        try:
+            import redis
+        except ImportError as error:
+            raise RuntimeError("INVALIDATION_BACKEND=redis requires the 'redis' package") from error
+        self.channel = channel
+        self._client = redis.Redis.from_url(url)
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(channel)
+
+    def send(self, payload: bytes) -> None:
+        self._client.publish(self.channel, payload)
+
+    def receive(self, timeout: float) -> list[bytes]:
+        message = self._pubsub.get_message(timeout=timeout)
+        return [message["data"]] if message else []
+
+    def close(self) -> None:
+        self._pubsub.close()
+        self._client.close()
+
+
+def _make_transport(backend: str) -> Optional[InvalidationTransport]:
+    if backend == "auto":
+        backend = "unix" if hasattr(socket, "AF_UNIX") and sys.platform != "win32" else "file"
+    if backend == "none":
+        return None
+    if backend == "unix":
+        directory = settings.INVALIDATION_PATH or os.path.join(tempfile.gettempdir(), f"{settings.APP_NAME}-invalidation")
+        return UnixSocketTransport(directory)
+    if backend == "file":
+        path = settings.INVALIDATION_PATH or os.path.join(tempfile.gettempdir(), f"{settings.APP_NAME}-invalidation.log")
+        return FileTransport(path, settings.INVALIDATION_FILE_MAX_BYTES)
+    if backend == "redis":
+        return RedisTransport(settings.INVALIDATION_REDIS_URL, f"{settings.APP_NAME}:invalidation")
+    raise ValueError(f"Unknown INVALIDATION_BACKEND: {backend}")
+
+
+# --- Bus ---
+class InvalidationBus:
+    """Evicts cache keys locally and propagates the eviction to the other workers.
+
+    Invalidations are coalesced for INVALIDATION_COALESCE_MS, so a burst of writes to
+    the same key turns into one message. Features can also `broadcast` small JSON items
+    on a named channel over the same transport, to the handlers the other workers
+    `subscribe`d for it (the order status streams do).
+    """
+
+    def __init__(self):
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._transport: Optional[InvalidationTransport] = None
+        self._pending: set[tuple[str, Hashable]] = set()
+        self._broadcasts: list[tuple[str, list[Any]]] = []
+        self._handlers: dict[str, Callable[[list[Any]], None]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._delays_ms: deque[float] = deque(maxlen=1000)
+        self.published_keys = 0
+        self.published_messages = 0
+        self.coalesced_keys = 0
+        self.received_messages = 0
+        self.applied_keys = 0
+        self.broadcast_items = 0
+        self.received_items = 0
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._transport = _make_transport(settings.INVALIDATION_BACKEND)
+        if self._transport is None:
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._flush_loop, name="invalidation-flush", daemon=True),
+            threading.Thread(target=self._receive_loop, name="invalidation-receive", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(5.0)
+        self._threads = []
+        self._flush()
+        if self._transport:
+            self._transport.close()
+            self._transport = None
+
+    def invalidate(self, cache_name: str, key: Hashable) -> None:
+        """Evict a key here right away and queue it for the other workers."""
+        get_cache(cache_name).delete(key)
+        if is_snapshotted(cache_name):
+            invalidation_journal.record(cache_name, key)
+        if self._transport is None:
+            return
+        with self._lock:
+            if (cache_name, key) in self._pending:
+                self.coalesced_keys += 1
+            else:
+                self._pending.add((cache_name, key))
+
+    def subscribe(self, channel: str, handler: Callable[[list[Any]], None]) -> None:
+        """Call `handler` (on the receive thread) with the items other workers broadcast on `channel`."""
+        self._handlers[channel] = handler
+
+    def broadcast(self, channel: str, items: list[Any]) -> None:
+        """Send JSON-serializable items to the other workers with the next flush. Does
+        nothing without a transport (INVALIDATION_BACKEND=none: a single worker)."""
+        if self._transport is None or not items:
+            return
+        with self._lock:
+            self._broadcasts.append((channel, items))
+
+    def _send(self, message: dict[str, Any]) -> bool:
+        payload = json.dumps({"o": self.origin, "t": time.time(), **message}).encode()
+        try:
+            self._transport.send(payload)
+        except Exception as error:
+            print(f"Invalidation publish failed: {error}")
+            return False
+        self.published_messages += 1
+        return True
+
+    def _flush(self) -> None:
+        with self._lock:
+            pending, self._pending = list(self._pending), set()
+            broadcasts, self._broadcasts = self._broadcasts, []
+        if self._transport is None:
+            return
+        for start in range(0, len(pending), _MAX_KEYS_PER_MESSAGE):
+            keys = pending[start:start + _MAX_KEYS_PER_MESSAGE]
+            if self._send({"k": keys}):
+                self.published_keys += len(keys)
+        for channel, items in broadcasts:
+            for start in range(0, len(items), _MAX_ITEMS_PER_MESSAGE):
+                chunk = items[start:start + _MAX_ITEMS_PER_MESSAGE]
+                if self._send({"c": channel, "d": chunk}):
+                    self.broadcast_items += len(chunk)
+
+    def _flush_loop(self) -> None:
+        interval = settings.INVALIDATION_COALESCE_MS / 1000
+        while not self._stop.wait(interval):
+            self._flush()
+
+    def _receive_loop(self) -> None:
+        while not self._stop.is_set():
+            transport = self._transport
+            if transport is None:
+                return
+            try:
+                payloads = transport.receive(0.5)
+            except Exception as error:
+                if self._stop.is_set():
+                    return
+                print(f"Invalidation receive failed: {error}")
+                time.sleep(0.5)
+                continue
+            for payload in payloads:
+                self._apply(payload)
+
+    def _apply(self, payload: bytes) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.get("o") == self.origin:
+            return
+        self.received_messages += 1
+        self._delays_ms.append(max(time.time() - message["t"], 0.0) * 1000)
+        if "c" in message:
+            handler = self._handlers.get(message["c"])
+            if handler is None:
+                return
+            self.received_items += len(message["d"])
+            try:
+                handler(message["d"])
+            except Exception as error:
+                print(f"Broadcast handler for {message['c']} failed: {error}")
+            return
+        # Workers of this host journal their own invalidations; other hosts' come over Redis
+        remote_host = isinstance(self._transport, RedisTransport)
+        for cache_name, key in message["k"]:
+            # JSON turns tuple keys into lists
+            get_cache(cache_name).delete(tuple(key) if isinstance(key, list) else key)
+            self.applied_keys += 1
+            if remote_host and is_snapshotted(cache_name):
+                invalidation_journal.record(cache_name, key)
+
+    def stats(self) -> dict[str, float | int | str | None]:
+        delays = sorted(self._delays_ms)
+        return {
+            "backend": type(self._transport).__name__ if self._transport else None,
+            "published_keys": self.published_keys,
+            "published_messages": self.published_messages,
+            "coalesced_keys": self.coalesced_keys,
+            "received_messages": self.received_messages,
+            "applied_keys": self.applied_keys,
+            "dropped_messages": self._transport.dropped if self._transport else 0,
+            "broadcast_items": self.broadcast_items,
+            "received_items": self.received_items,
+            "delay_ms_avg": round(sum(delays) / len(delays), 3) if delays else None,
+            "delay_ms_p95": round(delays[min(len(delays) - 1, int(len(delays) * 0.95))], 3) if delays else None,
+            "delay_ms_max": round(delays[-1], 3) if delays else None,
+        }
+
+
+invalidation_bus = InvalidationBus()
+
+
+def invalidate_after_commit(cache_name: str, key: Hashable) -> None:
+    """Invalidate a cache key on every worker once the current session commits."""
+    on_commit(lambda: invalidation_bus.invalidate(cache_name, key))
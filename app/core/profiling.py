@@ -0,0 +1,225 @@
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+# Frames at the top of an idle thread's stack (waiting for work), not worth a sample
+_IDLE_FUNCTIONS = {"wait", "select", "poll"}
+# Sync endpoints and dependencies run in these (the threadpool Starlette uses)
+_WORKER_THREAD_PREFIX = "AnyIO worker thread"
+
+
+def profiles_dir() -> Path:
+    return Path(settings.PROFILING_DIR)
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class SamplingProfiler:
+    """Samples the stacks of the event loop thread and the threadpool (where sync endpoints
+    run) every `interval` seconds from a background thread; the event bus, invalidation
+    and batch writer threads are left out.
+
+    Stacks are kept in collapsed form ("outer;...;inner" -> samples), which flame graph
+    tools read directly. Other requests running at the same time show up too.
+    """
+
+    def __init__(self, interval: float, loop_thread_id: int):
+        self.interval = interval
+        self.loop_thread_id = loop_thread_id
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _sampled_threads(self) -> set[int]:
+        workers = {
+            thread.ident for thread in threading.enumerate()
+            if thread.name.startswith(_WORKER_THREAD_PREFIX)
+        }
+        return workers | {self.loop_thread_id}
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            sampled = self._sampled_threads()
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id not in sampled or frame.f_code.co_name in _IDLE_FUNCTIONS:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def top_functions(self, limit: int = 30) -> list[dict[str, Any]]:
+        """Functions by samples seen anywhere in the stack (total) and at its top (self)."""
+        total: Counter[str] = Counter()
+        own: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for label in set(frames):
+                total[label] += count
+        return [
+            {"function": label, "total_samples": count, "self_samples": own[label]}
+            for label, count in total.most_common(limit)
+        ]
+
+
+def _allocation_diff(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, limit: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "location": str(stat.traceback),
+            "size_diff_kb": round(stat.size_diff / 1024, 2),
+            "count_diff": stat.count_diff,
+        }
+        for stat in after.compare_to(before, "lineno")[:limit]
+    ]
+
+
+def save_profile(profile: dict[str, Any]) -> None:
+    """Write a profile and keep only the newest PROFILING_MAX_PROFILES files."""
+    directory = profiles_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / f"{profile['id']}.json", "w") as file:
+        json.dump(profile, file)
+    stored = sorted(directory.glob("*.json"), key=lambda path: path.stat().st_mtime, reverse=True)
+    for path in stored[settings.PROFILING_MAX_PROFILES:]:
+        path.unlink(missing_ok=True)
+
+def list_profiles() -> list[dict[str, Any]]:
+    """Metadata of the stored profiles, newest first (from every worker sharing the directory)."""
+    directory = profiles_dir()
+    if not directory.is_dir():
+        return []
+    profiles = []
+    for path in sorted(directory.glob("*.json"), key=lambda path: path.stat().st_mtime, reverse=True):
+        try:
+            with open(path) as file:
+                profile = json.load(file)
+        except (OSError, ValueError):
+            continue  # rotated away or still being written
+        profiles.append({key: value for key, value in profile.items() if key not in ("stacks", "top_functions", "allocations")})
+    return profiles
+
+def load_profile(profile_id: str) -> Optional[dict[str, Any]]:
+    try:
+        uuid.UUID(hex=profile_id)
+    except ValueError:
+        return None  # never let the id pick another path
+    path = profiles_dir() / f"{profile_id}.json"
+    if not path.is_file():
+        return None
+    with open(path) as file:
+        return json.load(file)
+
+def collapsed_stacks(profile: dict[str, Any]) -> str:
+    """The profile's stacks in collapsed format (flamegraph.pl, speedscope)."""
+    return "".join(f"{stack} {count}\n" for stack, count in profile["stacks"].items())
+
+
+class ProfilingMiddleware:
+    """Profiles the requests that ask for it (PROFILING_HEADER) or get sampled
+    (PROFILING_SAMPLE_RATE): a stack-sampling profile plus a tracemalloc diff, stored with
+    the route and timing in PROFILING_DIR and listed by the admin endpoints.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.header = settings.PROFILING_HEADER.lower().encode("latin-1")
+        self._active = False
+
+    def _wanted(self, scope) -> bool:
+        requested = any(name == self.header and value not in (b"", b"0") for name, value in scope["headers"])
+        return requested or random.random() < settings.PROFILING_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+        if self._active:
+            # One profile at a time per worker; tracemalloc and the sampler are process wide
+            await self.app(scope, receive, send)
+            return
+        self._active = True
+        try:
+            await self._profile(scope, receive, send)
+        finally:
+            self._active = False
+
+    async def _profile(self, scope, receive, send):
+        response_status = {"code": None}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response_status["code"] = message["status"]
+            await send(message)
+
+        memory_before = None
+        if settings.PROFILING_TRACEMALLOC and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            memory_before = tracemalloc.take_snapshot()
+        profiler = SamplingProfiler(settings.PROFILING_INTERVAL_MS / 1000, threading.get_ident())
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            # Snapshot comparison and file writes take a while; keep them off the event loop
+            await run_in_threadpool(
+                _finish_profile, scope, profiler, memory_before, response_status["code"], started_at, duration_ms
+            )
+
+
+def _finish_profile(
+    scope, profiler: SamplingProfiler, memory_before: Optional[tracemalloc.Snapshot],
+    status_code: Optional[int], started_at: datetime, duration_ms: float
+) -> None:
+    profiler.stop()
+    allocations, peak_kb = [], None
+    if memory_before is not None:
+        allocations = _allocation_diff(memory_before, tracemalloc.take_snapshot(), 25)
+        peak_kb = round(tracemalloc.get_traced_memory()[1] / 1024, 2)
+        tracemalloc.stop()
+    route = scope.get("route")
+    save_profile({
+        "id": uuid.uuid4().hex,
+        "method": scope["method"],
+        "path": scope["path"],
+        "route": getattr(route, "path", scope["path"]),
+        "query": scope.get("query_string", b"").decode("latin-1"),
+        "status": status_code,
+        "started_at": started_at.isoformat(),
+        "duration_ms": round(duration_ms, 3),
+        "samples": profiler.samples,
+        "interval_ms": settings.PROFILING_INTERVAL_MS,
+        "pid": os.getpid(),
+        "peak_traced_kb": peak_kb,
+        "top_functions": profiler.top_functions(),
+        "allocations": allocations,
+        "stacks": dict(profiler.stacks.most_common()),
+    })
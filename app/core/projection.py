@@ -0,0 +1,30 @@
+from typing import Any, Iterable, Optional, Sequence
+
+from fastapi import HTTPException, status
+
+
+def parse_fields(fields: Optional[str], available: Sequence[str]) -> Optional[tuple[str, ...]]:
+    """Parse a `fields=a,b` sparse fieldset into the requested fields in `available` order,
+    or None (every field) when it is not given. Unknown fields are a 400."""
+    if fields is None:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = sorted(requested - set(available))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(available)}",
+        )
+    if not requested:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No fields requested")
+    return tuple(field for field in available if field in requested)
+
+def projected_columns(model: Any, fields: Iterable[str], required: Iterable[str] = ()) -> list[Any]:
+    """Columns of `model` to SELECT: the requested fields plus the ones the query itself
+    needs (ordering, cursors), without duplicates."""
+    names = list(dict.fromkeys([*fields, *required]))
+    return [getattr(model, name) for name in names]
+
+def rows_to_dicts(rows: Iterable[Any], fields: Sequence[str]) -> list[dict[str, Any]]:
+    """Plain dicts of the requested fields of column rows (what list responses encode)."""
+    return [{field: getattr(row, field) for field in fields} for row in rows]
@@ -0,0 +1,133 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+_SCHEME = "scrypt"
+_SALT_BYTES = 16
+_KEY_BYTES = 32
+
+
+# --- KDF (runs in the pool processes) ---
+def _b64encode(raw: bytes) -> str:
+    return base64.b64encode(raw).decode().rstrip("=")
+
+def _b64decode(text: str) -> bytes:
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+def _scrypt(password: str, salt: bytes, log_n: int, r: int, p: int) -> bytes:
+    n = 1 << log_n
+    # The default maxmem (32 MiB) is below what N >= 2**15 needs
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * r * n, dklen=_KEY_BYTES)
+
+def hash_password(password: str, log_n: int, r: int, p: int) -> str:
+    """`scrypt$log_n$r$p$salt$key`, with a random salt."""
+    salt = os.urandom(_SALT_BYTES)
+    key = _scrypt(password, salt, log_n, r, p)
+    return f"{_SCHEME}${log_n}${r}${p}${_b64encode(salt)}${_b64encode(key)}"
+
+def _parse_hash(stored: str) -> Optional[tuple[int, int, int, bytes, bytes]]:
+    parts = stored.split("$")
+    if len(parts) != 6 or parts[0] != _SCHEME:
+        return None
+    try:
+        return int(parts[1]), int(parts[2]), int(parts[3]), _b64decode(parts[4]), _b64decode(parts[5])
+    except ValueError:
+        return None
+
+def verify_password(password: str, stored: str) -> bool:
+    """Check a password against a stored hash, or against a legacy plaintext row."""
+    parsed = _parse_hash(stored)
+    if parsed is None:
+        return hmac.compare_digest(password.encode(), stored.encode())
+    log_n, r, p, salt, key = parsed
+    return hmac.compare_digest(_scrypt(password, salt, log_n, r, p), key)
+
+def is_password_hash(stored: str) -> bool:
+    return _parse_hash(stored) is not None
+
+def needs_rehash(stored: str) -> bool:
+    """Whether a stored password is plaintext or hashed with other cost parameters."""
+    parsed = _parse_hash(stored)
+    if parsed is None:
+        return True
+    return parsed[:3] != (settings.PASSWORD_SCRYPT_LOG_N, settings.PASSWORD_SCRYPT_R, settings.PASSWORD_SCRYPT_P)
+
+
+class PasswordHasher:
+    """Runs the KDF in a pool of PASSWORD_HASH_WORKERS processes that async routes await,
+    so a login never blocks the event loop (or the GIL) for the length of a hash.
+
+    At most PASSWORD_HASH_MAX_PENDING hashes are queued or running per worker; beyond
+    that, requests get a 503 rather than queueing behind seconds of KDF work.
+    """
+
+    def __init__(self):
+        self.pending = 0
+        self.rejected = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._dummy_hash: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: the workers do not inherit this process's threads and locks
+                self._pool = ProcessPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    async def _run(self, function, *args):
+        if self.pending >= settings.PASSWORD_HASH_MAX_PENDING:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many password checks in progress, try again later",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor(), function, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(
+            hash_password, password,
+            settings.PASSWORD_SCRYPT_LOG_N, settings.PASSWORD_SCRYPT_R, settings.PASSWORD_SCRYPT_P
+        )
+
+    async def verify(self, password: str, stored: str) -> bool:
+        if not is_password_hash(stored):
+            # Legacy plaintext row: nothing to derive
+            return verify_password(password, stored)
+        return await self._run(verify_password, password, stored)
+
+    async def verify_dummy(self, password: str) -> None:
+        """Run a verification for a login whose email is unknown, so its response takes as
+        long as a wrong password's and does not tell which emails are registered."""
+        if self._dummy_hash is None or needs_rehash(self._dummy_hash):
+            self._dummy_hash = await self.hash(os.urandom(_SALT_BYTES).hex())
+        await self.verify(password, self._dummy_hash)
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+
+password_hasher = PasswordHasher()
+
+def stop_password_hasher() -> None:
+    password_hasher.stop()
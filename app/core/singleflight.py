@@ -0,0 +1,91 @@
+import asyncio
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, TypeVar
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.database import session_scope
+from app.core.deadlines import Deadline, request_deadline
+
+T = TypeVar("T")
+
+# Per-key stats kept for the most recently used keys only
+_MAX_TRACKED_KEYS = 1000
+
+
+def _shared_call(deadline: Optional[Deadline], fn: Callable[..., T], *args) -> T:
+    # Runs in a copy of the leader's context: bind the shared deadline and a session of its own
+    request_deadline.set(deadline)
+    with session_scope():
+        return fn(*args)
+
+
+class SingleFlight:
+    """Coalesces identical concurrent calls: one runs (in the threadpool), the others await its result.
+
+    The call runs in a session of its own, not the leader's request session (the leader
+    may be cancelled while the others still wait), and its statements are bounded by the
+    latest deadline among the callers waiting for it. Errors, including HTTPException,
+    are shared with every waiting caller.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: dict[Hashable, tuple[asyncio.Task, Optional[Deadline]]] = {}
+        self._stats: OrderedDict[str, dict[str, int]] = OrderedDict()
+
+    async def run(self, fn: Callable[..., T], *args: Hashable) -> T:
+        key = (fn.__qualname__, args)
+        deadline = request_deadline.get()
+        inflight = self._inflight.get(key)
+        leader = inflight is None
+        if inflight is None:
+            shared = None if deadline is None else Deadline(deadline.remaining())
+            task = asyncio.ensure_future(run_in_threadpool(_shared_call, shared, fn, *args))
+            self._inflight[key] = (task, shared)
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            task, shared = inflight
+            if shared is not None:
+                shared.extend_to(deadline)
+        self._record(key, leader)
+        # shield: a cancelled caller must not cancel the query the others are waiting for
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        inflight = self._inflight.get(key)
+        if inflight is not None and inflight[0] is task:
+            del self._inflight[key]
+
+    def _record(self, key: tuple[str, tuple], leader: bool) -> None:
+        label = f"{key[0]}{key[1]!r}"
+        stats = self._stats.get(label)
+        if stats is None:
+            stats = {"calls": 0, "executions": 0, "coalesced": 0}
+            self._stats[label] = stats
+            while len(self._stats) > _MAX_TRACKED_KEYS:
+                self._stats.popitem(last=False)
+        self._stats.move_to_end(label)
+        stats["calls"] += 1
+        stats["executions" if leader else "coalesced"] += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "inflight": len(self._inflight),
+            "calls": sum(stats["calls"] for stats in self._stats.values()),
+            "coalesced": sum(stats["coalesced"] for stats in self._stats.values()),
+            "keys": {label: dict(stats) for label, stats in self._stats.items()},
+        }
+
+
+_groups: dict[str, SingleFlight] = {}
+
+def single_flight(name: str) -> SingleFlight:
+    """Get (or create) the named coalescing group."""
+    group = _groups.get(name)
+    if group is None:
+        group = _groups[name] = SingleFlight(name)
+    return group
+
+def single_flight_stats() -> dict[str, dict[str, Any]]:
+    return {name: group.stats() for name, group in _groups.items()}
@@ -0,0 +1,176 @@
+import hashlib
+import re
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+_EXPLAIN_PREFIX = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN ", "mysql": "EXPLAIN "}
+_START_TIMES_KEY = "slow_query_start_times"
+_EXPLAIN_SAVEPOINT = "slow_query_explain"
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint_statement(statement: str) -> str:
+    """Normalize a statement so the same query shape always aggregates together:
+    literals become ?, IN lists of any length become (...), whitespace is collapsed."""
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _PLACEHOLDER_LIST.sub("(...)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+def _parameters_shape(parameters: Any, executemany: bool) -> str:
+    """Types of the parameters, never their values."""
+    if executemany:
+        return f"executemany x{len(parameters)}"
+    if isinstance(parameters, dict):
+        values = parameters.values()
+    elif isinstance(parameters, (list, tuple)):
+        values = parameters
+    else:
+        return type(parameters).__name__
+    types = Counter(type(value).__name__ for value in values)
+    return ", ".join(f"{count} {name}" for name, count in sorted(types.items())) or "none"
+
+def _calling_function() -> str:
+    """The innermost app function (a repository, usually) that issued the statement."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("app.") and not module.startswith("app.core."):
+            return f"{module}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+class SlowQueryLog:
+    """Statements slower than SLOW_QUERY_THRESHOLD_MS, aggregated by fingerprint (per worker).
+
+    The first occurrence of a fingerprint, and any occurrence slower than all before it,
+    gets its plan captured with EXPLAIN (EXPLAIN QUERY PLAN on SQLite) on the same
+    connection and parameters, in a savepoint of its own.
+    """
+
+    def __init__(self, max_fingerprints: int):
+        self.max_fingerprints = max_fingerprints
+        self._entries: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, fingerprint: str, statement: str, duration_ms: float, caller: str, parameters: str) -> bool:
+        """Aggregate one slow execution; True when its plan should be (re)captured."""
+        key = hashlib.sha1(fingerprint.encode()).hexdigest()[:16]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {
+                    "id": key, "fingerprint": fingerprint, "example": statement,
+                    "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "callers": Counter(), "parameters": Counter(),
+                    "plan": None, "plan_ms": None, "first_seen": datetime.utcnow(),
+                }
+                while len(self._entries) > self.max_fingerprints:
+                    self._entries.popitem(last=False)
+            self._entries.move_to_end(key)
+            slowest = duration_ms > entry["max_ms"]
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["callers"][caller] += 1
+            entry["parameters"][parameters] += 1
+            entry["last_seen"] = datetime.utcnow()
+            return slowest
+
+    def set_plan(self, fingerprint: str, plan: list[str], duration_ms: float) -> None:
+        key = hashlib.sha1(fingerprint.encode()).hexdigest()[:16]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["plan"], entry["plan_ms"] = plan, round(duration_ms, 3)
+
+    def entries(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    **entry,
+                    "total_ms": round(entry["total_ms"], 3),
+                    "max_ms": round(entry["max_ms"], 3),
+                    "avg_ms": round(entry["total_ms"] / entry["count"], 3),
+                    "callers": dict(entry["callers"].most_common()),
+                    "parameters": dict(entry["parameters"].most_common()),
+                }
+                for entry in self._entries.values()
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+slow_query_log = SlowQueryLog(settings.SLOW_QUERY_MAX_FINGERPRINTS)
+
+
+def _explain(connection, statement: str, parameters: Any) -> Optional[list[str]]:
+    prefix = _EXPLAIN_PREFIX.get(connection.dialect.name)
+    if prefix is None or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    # Raw DBAPI cursor: no engine events (and so no recursion), same transaction. Inside a
+    # savepoint, so a failing EXPLAIN (which aborts the transaction on PostgreSQL) is rolled
+    # back on its own and never fails the request's own statements
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(f"SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            plan = [" | ".join(str(column) for column in row) for row in cursor.fetchall()]
+        except Exception:
+            cursor.execute(f"ROLLBACK TO SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+            raise
+        finally:
+            cursor.execute(f"RELEASE SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+        return plan
+    finally:
+        cursor.close()
+
+def _before_cursor_execute(connection, cursor, statement, parameters, context, executemany) -> None:
+    connection.info.setdefault(_START_TIMES_KEY, []).append(time.perf_counter())
+
+def _after_cursor_execute(connection, cursor, statement, parameters, context, executemany) -> None:
+    started = connection.info[_START_TIMES_KEY].pop()
+    duration_ms = (time.perf_counter() - started) * 1000
+    if duration_ms < settings.SLOW_QUERY_THRESHOLD_MS:
+        return
+    fingerprint = fingerprint_statement(statement)
+    caller = _calling_function()
+    print(f"Slow query ({duration_ms:.1f} ms) from {caller}: {fingerprint[:200]}")
+    recapture = slow_query_log.record(
+        fingerprint, statement, duration_ms, caller, _parameters_shape(parameters, executemany)
+    )
+    if recapture and settings.SLOW_QUERY_EXPLAIN and not executemany:
+        explain_started = time.perf_counter()
+        try:
+            plan = _explain(connection, statement, parameters)
+        except Exception as error:
+            plan = [f"EXPLAIN failed: {error}"]
+        if plan is not None:
+            slow_query_log.set_plan(fingerprint, plan, (time.perf_counter() - explain_started) * 1000)
+
+def _handle_error(context) -> None:
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    if context.connection is not None and context.connection.info.get(_START_TIMES_KEY):
+        context.connection.info[_START_TIMES_KEY].pop()
+
+def install_slow_query_log(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
@@ -0,0 +1,60 @@
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from app.core.config import settings
+
+# Set on a session once its current transaction has written
+_WRITING_KEY = "sqlite_writer"
+
+
+def is_file_database(url: str) -> bool:
+    return url.startswith("sqlite") and ":memory:" not in url and url.rstrip("/") not in ("sqlite:", "sqlite+pysqlite:")
+
+def apply_sqlite_pragmas(dbapi_connection: Any, _connection_record: Any) -> None:
+    """Pragmas of the SQLITE_CONCURRENCY_PROFILE, for every new connection.
+
+    WAL lets readers run while one writer commits; busy_timeout waits for the write lock
+    (other workers) instead of failing with "database is locked"; synchronous=NORMAL is
+    durable in WAL except for the last commits on power loss; cache_size and mmap_size
+    keep hot pages in memory.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        # Negative: KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    finally:
+        cursor.close()
+
+
+class WriterRoutingSession(Session):
+    """Session that reads through the pooled engine and writes through the writer engine
+    (one connection, so this worker's writers queue for it instead of racing for the
+    SQLite write lock).
+
+    Once a transaction has written, the rest of it stays on the writer connection so it
+    reads its own uncommitted changes.
+    """
+
+    def __init__(self, reader: Engine, writer: Engine, **kwargs: Any):
+        super().__init__(bind=reader, **kwargs)
+        self._reader = reader
+        self._writer = writer
+
+    def get_bind(self, mapper=None, clause=None, **kwargs: Any):
+        if self.info.get(_WRITING_KEY) or self._flushing or getattr(clause, "is_dml", False):
+            self.info[_WRITING_KEY] = True
+            return self._writer
+        return self._reader
+
+
+@event.listens_for(WriterRoutingSession, "after_transaction_end")
+def _back_to_reader(session: Session, transaction: Any) -> None:
+    if transaction.parent is None:
+        session.info.pop(_WRITING_KEY, None)
@@ -0,0 +1,75 @@
+import importlib
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from fastapi import FastAPI
+
+# Seconds spent per startup step ("init_db", "feature:/order", ...), for the startup benchmark
+startup_timings: dict[str, float] = {}
+
+
+@dataclass
+class Feature:
+    prefix: str
+    routes_module: str
+    # Modules that must be imported first (e.g. models referenced by string in relationships)
+    requires: tuple[str, ...] = ()
+    # "module:function" called once the feature is loaded
+    on_load: Optional[str] = None
+    # "module:function" called at shutdown if the feature was loaded
+    on_shutdown: Optional[str] = None
+    loaded: bool = field(default=False, compare=False)
+
+
+def load_feature(app: FastAPI, feature: Feature) -> None:
+    """Import a feature's routes and mount its router on the app (once)."""
+    if feature.loaded:
+        return
+    started = time.perf_counter()
+    for module in feature.requires:
+        importlib.import_module(module)
+    router = importlib.import_module(feature.routes_module).router
+    app.include_router(router)
+    if feature.on_load:
+        _call(feature.on_load)
+    # Routes changed, regenerate the OpenAPI schema on next request
+    app.openapi_schema = None
+    feature.loaded = True
+    startup_timings[f"feature:{feature.prefix}"] = time.perf_counter() - started
+
+
+def shutdown_features(features: list[Feature]) -> None:
+    """Run the shutdown hooks of the loaded features."""
+    for feature in features:
+        if feature.loaded and feature.on_shutdown:
+            _call(feature.on_shutdown)
+
+
+def _call(reference: str) -> None:
+    module_name, function_name = reference.split(":")
+    getattr(importlib.import_module(module_name), function_name)()
+
+
+class LazyFeatureMiddleware:
+    """Fast-start mode: loads a feature the first time a request hits its prefix.
+
+    Requests for the OpenAPI schema load every feature so the docs stay complete.
+    """
+
+    def __init__(self, app, target: FastAPI, features: list[Feature]):
+        self.app = app
+        self.target = target
+        self.features = features
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket") and not all(feature.loaded for feature in self.features):
+            path: str = scope["path"]
+            if path == self.target.openapi_url:
+                for feature in self.features:
+                    load_feature(self.target, feature)
+            else:
+                for feature in self.features:
+                    if path == feature.prefix or path.startswith(feature.prefix + "/"):
+                        load_feature(self.target, feature)
+        await self.app(scope, receive, send)
@@ -0,0 +1,53 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from app.core.config import settings
+
+
+class StatementCache:
+    """Statements built once per shape and then executed with bound parameters.
+
+    Building a select (columns, `.where`/`.options` chains) and computing its SQLAlchemy
+    cache key is pure Python work repeated on every call. A statement object memoizes its
+    cache key, so reusing one skips both; only the parameters change between calls.
+    The shape must capture everything that changes the SQL text (which filters are
+    present, selected fields, sort), never the filter values themselves.
+    """
+
+    def __init__(self, max_shapes: int):
+        self.max_shapes = max_shapes
+        self.hits = 0
+        self.misses = 0
+        self._statements: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, shape: Hashable, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            statement = self._statements.get(shape)
+            if statement is not None:
+                self._statements.move_to_end(shape)
+                self.hits += 1
+                return statement
+            self.misses += 1
+        # Built outside the lock; two threads building the same shape is harmless
+        statement = build()
+        with self._lock:
+            self._statements[shape] = statement
+            while len(self._statements) > self.max_shapes:
+                self._statements.popitem(last=False)
+        return statement
+
+    def clear(self) -> None:
+        with self._lock:
+            self._statements.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"shapes": len(self._statements), "hits": self.hits, "misses": self.misses}
+
+
+statement_cache = StatementCache(settings.STATEMENT_CACHE_MAX_SHAPES)
+
+def prebuilt(shape: Hashable, build: Callable[[], Any]) -> Any:
+    """The statement of `shape`, built by `build()` on first use."""
+    return statement_cache.get(shape, build)
@@ -0,0 +1,140 @@
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
+from typing import Any, List, Literal, Optional
+
+from app.core import profiling
+from app.core.database import get_session, run_in_threadpool_with_session
+from .schemas import ProfileSummary, SlowQuery
+from .services import (
+    list_profiles_service, get_profile_service, list_slow_queries_service, clear_slow_queries_service,
+    get_email_filter_stats_service, rebuild_email_filter_service, get_db_session_stats_service,
+    get_deadline_stats_service, get_event_bus_stats_service, get_cache_stats_service,
+    get_single_flight_stats_service, get_admission_stats_service,
+    get_cache_snapshot_stats_service, save_cache_snapshot_service
+)
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(get_session, scope="function")])
+
+# Request profiles
+@router.get("/profiles", response_model=List[ProfileSummary], summary="Admin: List Request Profiles")
+async def list_profiles(
+    id_user: int = Query(...),
+    route: Optional[str] = Query(None, description="Only profiles of this route template or path")
+):
+    try:
+        return await run_in_threadpool_with_session(list_profiles_service, id_user, route)
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
+
+@router.get("/profiles/{profile_id}", summary="Admin: Download a Request Profile")
+async def download_profile(
+    profile_id: str = Path(...), id_user: int = Query(...),
+    format: Literal["json", "collapsed"] = Query("json", description="collapsed: stacks for flame graph tools")
+):
+    try:
+        profile = await run_in_threadpool_with_session(get_profile_service, id_user, profile_id)
+        disposition = {"Content-Disposition": f'attachment; filename="profile-{profile_id}.{"txt" if format == "collapsed" else "json"}"'}
+        if format == "collapsed":
+            return PlainTextResponse(profiling.collapsed_stacks(profile), headers=disposition)
+        return JSONResponse(profile, headers=disposition)
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
+
+# Slow queries
+@router.get("/slow-queries", response_model=List[SlowQuery], summary="Admin: List Slow Queries")
+async def list_slow_queries(
+    id_user: int = Query(...),
+    sort: Literal["total_ms", "max_ms", "avg_ms", "count"] = Query("total_ms"),
+    limit: int = Query(50, ge=1, le=500)
+):
+    try:
+        return list_slow_queries_service(user_id=id_user, sort=sort, limit=limit)
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
+
+@router.delete("/slow-queries", status_code=204, summary="Admin: Reset the Slow-Query Log")
+async def clear_slow_queries(id_user: int = Query(...)):
+    try:
+        clear_slow_queries_service(user_id=id_user)
+        return Response(status_code=204)
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
+
+# Signup email filter
+@router.get("/email-filter", response_model=dict[str, Any], summary="Admin: Signup Email Filter Stats")
+async def get_email_filter_stats(id_user: int = Query(...)):
+    try:
+        return get_email_filter_stats_service(user_id=id_user)
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
+
+@router.post("/email-filter/rebuild", response_model=dict[str, Any], summary="Admin: Rebuild the Signup Email Filter")
+async def rebuild_email_filter(id_user: int = Query(...)):
+    try:
+        # Reads every email: keep it off the event loop
+        return await run_in_threadpool_with_session(rebuild_email_filter_service, id_user)
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
+
+# Request DB sessions
+@router.get("/db-sessions", response_model=dict[str, Any], summary="Admin: Requests With and Without DB Access")
+async def get_db_session_stats(id_user: int = Query(...)):
+    try:
+        return get_db_session_stats_service(user_id=id_user)
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
+
+# In-process caches and their invalidation
+@router.get("/caches", response_model=dict[str, Any], summary="Admin: Cache Hit Rates and Invalidation Delays")
+async def get_cache_stats(id_user: int = Query(...)):
+    try:
+        return get_cache_stats_service(user_id=id_user)
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
+
+# Coalesced reads
+@router.get("/single-flight", response_model=dict[str, Any], summary="Admin: Coalesced Concurrent Reads by Key")
+async def get_single_flight_stats(id_user: int = Query(...)):
+    try:
+        return get_single_flight_stats_service(user_id=id_user)
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
+
+# Post-commit event bus
+@router.get("/event-bus", response_model=dict[str, Any], summary="Admin: Event Bus Consumer Queues")
+async def get_event_bus_stats(id_user: int = Query(...)):
+    try:
+        return get_event_bus_stats_service(user_id=id_user)
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
+
+# Admission control
+@router.get("/admission", response_model=dict[str, Any], summary="Admin: Admission Control per Route Group")
+async def get_admission_stats(id_user: int = Query(...)):
+    try:
+        return get_admission_stats_service(user_id=id_user)
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
+
+# Request deadlines
+@router.get("/deadlines", response_model=dict[str, Any], summary="Admin: Requests Past Their Deadline by Route")
+async def get_deadline_stats(id_user: int = Query(...)):
+    try:
+        return get_deadline_stats_service(user_id=id_user)
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
+
+# Catalog cache snapshots
+@router.get("/cache-snapshot", response_model=dict[str, Any], summary="Admin: Catalog Cache Snapshot Load and Save")
+async def get_cache_snapshot_stats(id_user: int = Query(...)):
+    try:
+        return get_cache_snapshot_stats_service(user_id=id_user)
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
+
+@router.post("/cache-snapshot", response_model=dict[str, Any], summary="Admin: Snapshot the Catalog Caches Now")
+async def save_cache_snapshot(id_user: int = Query(...)):
+    try:
+        return await run_in_threadpool_with_session(save_cache_snapshot_service, id_user)
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
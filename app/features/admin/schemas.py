@@ -0,0 +1,33 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+class ProfileSummary(BaseModel):
+    id: str
+    method: str
+    path: str
+    route: str
+    query: str
+    status: Optional[int]
+    started_at: datetime
+    duration_ms: float
+    samples: int
+    interval_ms: float
+    pid: int
+    peak_traced_kb: Optional[float]
+
+class SlowQuery(BaseModel):
+    id: str
+    fingerprint: str
+    example: str
+    count: int
+    total_ms: float
+    avg_ms: float
+    max_ms: float
+    callers: dict[str, int]
+    parameters: dict[str, int]
+    plan: Optional[list[str]]
+    plan_ms: Optional[float]
+    first_seen: datetime
+    last_seen: datetime
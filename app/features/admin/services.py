@@ -0,0 +1,102 @@
+from typing import Any
+
+from fastapi import HTTPException, status
+from app.core import profiling
+from app.core.admission import admission_stats
+from app.core.cache import all_caches
+from app.core.cache_snapshot import save_cache_snapshot, snapshot_stats
+from app.core.config import settings
+from app.core.database import request_session_stats
+from app.core.deadlines import deadline_stats
+from app.core.events import event_bus
+from app.core.invalidation import invalidation_bus
+from app.core.singleflight import single_flight_stats
+from app.core.slow_queries import slow_query_log
+from app.features.auth.email_filter import email_filter
+from app.features.auth.services import check_is_admin
+from app.features.admin.schemas import ProfileSummary, SlowQuery
+
+def list_profiles_service(user_id: int, route: str | None = None) -> list[ProfileSummary]:
+    """List the stored request profiles, newest first."""
+    check_is_admin(user_id)
+    profiles = [ProfileSummary(**profile) for profile in profiling.list_profiles()]
+    if route:
+        profiles = [profile for profile in profiles if profile.route == route or profile.path == route]
+    return profiles
+
+def get_profile_service(user_id: int, profile_id: str) -> dict[str, Any]:
+    """Get a stored request profile."""
+    check_is_admin(user_id)
+    profile = profiling.load_profile(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found",
+        )
+    return profile
+
+def list_slow_queries_service(user_id: int, sort: str = "total_ms", limit: int = 50) -> list[SlowQuery]:
+    """List the slow statements of this worker by fingerprint, worst first."""
+    check_is_admin(user_id)
+    entries = sorted(slow_query_log.entries(), key=lambda entry: entry[sort], reverse=True)
+    return [SlowQuery(**entry) for entry in entries[:limit]]
+
+def clear_slow_queries_service(user_id: int) -> None:
+    """Forget the slow statements recorded so far (e.g. after adding an index)."""
+    check_is_admin(user_id)
+    slow_query_log.clear()
+
+def get_email_filter_stats_service(user_id: int) -> dict[str, Any]:
+    """Signup email filter size, fill and false-positive counters (this worker)."""
+    check_is_admin(user_id)
+    return email_filter.stats()
+
+def rebuild_email_filter_service(user_id: int) -> dict[str, Any]:
+    """Rebuild the signup email filter from `users` (e.g. once it is saturated)."""
+    check_is_admin(user_id)
+    email_filter.rebuild()
+    return email_filter.stats()
+
+def get_db_session_stats_service(user_id: int) -> dict[str, Any]:
+    """How many requests (this worker) opened a DB session, and how long they held it."""
+    check_is_admin(user_id)
+    return request_session_stats.stats()
+
+def get_cache_stats_service(user_id: int) -> dict[str, Any]:
+    """Hit/miss counters per in-process cache, and the cross-worker invalidation bus
+    (messages, propagation delay) of this worker."""
+    check_is_admin(user_id)
+    return {
+        "caches": {name: cache.stats() for name, cache in all_caches().items()},
+        "invalidation": invalidation_bus.stats(),
+    }
+
+def get_single_flight_stats_service(user_id: int) -> dict[str, Any]:
+    """Calls, executions and coalesced callers per single-flight group and key (this worker)."""
+    check_is_admin(user_id)
+    return single_flight_stats()
+
+def get_event_bus_stats_service(user_id: int) -> dict[str, Any]:
+    """Queued and dropped events per event bus consumer (this worker)."""
+    check_is_admin(user_id)
+    return event_bus.stats()
+
+def get_admission_stats_service(user_id: int) -> dict[str, Any]:
+    """Admitted, queued and rejected requests per admission route group (this worker)."""
+    check_is_admin(user_id)
+    return {"enabled": settings.ADMISSION_CONTROL_ENABLED, "groups": admission_stats()}
+
+def get_deadline_stats_service(user_id: int) -> dict[str, Any]:
+    """Requests (this worker) that overran their deadline, by route."""
+    check_is_admin(user_id)
+    return deadline_stats.stats()
+
+def get_cache_snapshot_stats_service(user_id: int) -> dict[str, Any]:
+    """Last catalog cache snapshot loaded at startup and last one saved (this worker)."""
+    check_is_admin(user_id)
+    return dict(snapshot_stats)
+
+def save_cache_snapshot_service(user_id: int) -> dict[str, Any]:
+    """Snapshot the catalog caches now (e.g. right before a deploy)."""
+    check_is_admin(user_id)
+    return save_cache_snapshot()
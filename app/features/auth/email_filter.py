@@ -0,0 +1,128 @@
+import threading
+import time
+from typing import Optional
+
+from app.core.bloom import BloomFilter
+from app.core.config import settings
+from app.core.database import session_scope
+
+from .repositories import get_user_emails
+
+
+class EmailFilter:
+    """Bloom filter of registered emails (per worker) in front of the signup lookup.
+
+    "Definitely new" skips the `users.email` lookup; "maybe registered" still does it, and
+    a maybe that the lookup does not find is counted as a false positive. Emails registered
+    by other workers are not in this filter: their duplicate signups are caught by the
+    unique constraint instead. The first signup starts the initial build in the
+    background (so startup does not pay for it); until it is ready every signup does the lookup.
+    """
+
+    def __init__(self):
+        self._filter: Optional[BloomFilter] = None
+        self._pending: Optional[list[str]] = None
+        self._lock = threading.Lock()
+        self._building = False
+        self.skipped_lookups = 0
+        self.lookups = 0
+        self.false_positives = 0
+        self.constraint_conflicts = 0
+        self.rebuilds = 0
+        self.last_rebuild_ms: Optional[float] = None
+
+    def might_exist(self, email: str) -> Optional[bool]:
+        """False: definitely new. True: the filter says maybe. None: no filter yet, so
+        nothing is known (both True and None need the lookup)."""
+        current = self._filter
+        if current is None:
+            self._start_initial_build()
+            self.lookups += 1
+            return None
+        if email in current:
+            self.lookups += 1
+            return True
+        self.skipped_lookups += 1
+        return False
+
+    def record_lookup(self, might_exist: Optional[bool], found: bool) -> None:
+        """Result of a lookup the filter could not skip; only a maybe of the filter itself
+        (`might_exist` True) that is not found counts as a false positive."""
+        if might_exist is True and not found:
+            self.false_positives += 1
+
+    def add(self, email: str) -> None:
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(email)
+            if self._pending is not None:
+                self._pending.append(email)
+
+    def _start_initial_build(self) -> None:
+        if not settings.EMAIL_FILTER_ENABLED:
+            return
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        threading.Thread(target=self._initial_build, name="email-filter-build", daemon=True).start()
+
+    def _initial_build(self) -> None:
+        try:
+            self.rebuild()
+        except Exception as error:
+            print(f"Email filter build failed: {error}")
+
+    def rebuild(self) -> None:
+        """Build a new filter from `users` and swap it in; signups keep working meanwhile."""
+        started = time.perf_counter()
+        with self._lock:
+            self._building = True
+            self._pending = []
+        try:
+            with session_scope():
+                emails: list[str] = []
+                after_id = 0
+                while True:
+                    chunk = get_user_emails(after_id, settings.EMAIL_FILTER_REBUILD_CHUNK)
+                    if not chunk:
+                        break
+                    emails.extend(email for _, email in chunk)
+                    after_id = chunk[-1][0]
+            # Room to grow before the error rate degrades
+            rebuilt = BloomFilter(max(settings.EMAIL_FILTER_CAPACITY, 2 * len(emails)), settings.EMAIL_FILTER_ERROR_RATE)
+            for email in emails:
+                rebuilt.add(email)
+            with self._lock:
+                # Signups committed while reading `users`
+                for email in self._pending:
+                    rebuilt.add(email)
+                self._filter = rebuilt
+        finally:
+            with self._lock:
+                self._pending = None
+                # Without a filter the next signup tries the initial build again
+                self._building = self._filter is not None
+        self.rebuilds += 1
+        self.last_rebuild_ms = round((time.perf_counter() - started) * 1000, 3)
+        print(f"Email filter rebuilt with {rebuilt.items} emails ({self.last_rebuild_ms} ms)")
+
+    def stats(self) -> dict[str, float | int | bool | None]:
+        current = self._filter
+        new_emails = self.false_positives + self.skipped_lookups
+        return {
+            "ready": current is not None,
+            "skipped_lookups": self.skipped_lookups,
+            "lookups": self.lookups,
+            "false_positives": self.false_positives,
+            # Share of new emails the filter could not rule out
+            "observed_false_positive_rate": round(self.false_positives / new_emails, 6) if new_emails else None,
+            "constraint_conflicts": self.constraint_conflicts,
+            "rebuilds": self.rebuilds,
+            "last_rebuild_ms": self.last_rebuild_ms,
+            "saturated": current is not None and current.items > current.capacity,
+            **(current.stats() if current is not None else {}),
+        }
+
+
+email_filter = EmailFilter()
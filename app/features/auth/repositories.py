@@ -1,17 +1,57 @@
 from pydantic import EmailStr
+from sqlalchemy import bindparam, update
 from sqlmodel import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from app.core.cache import get_cache
 from app.core.database import SessionDep, db_session
+from app.core.invalidation import invalidate_after_commit
 from app.features.auth.models import *
 
+role_cache = get_cache("roles")
+
+_USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+
 def create_user(user: User) -> None:
-    """Create a user."""
+    """Create a user. Raises IntegrityError (rolled back) if the email is taken."""
     session: SessionDep = db_session.get()
-    session.add(user)
+    try:
+        session.add(user)
+        session.flush()
+    except IntegrityError:
+        session.rollback()
+        raise
+    invalidate_after_commit("roles", user.id)
     session.commit()
 
 def get_user(email: EmailStr) -> User | None:
     """Get a user by email."""
     session: SessionDep = db_session.get()
-    statement = select(User).where(User.email == email)
-    result = session.exec(statement).first()
-    return result
\ No newline at end of file
+    result = session.exec(_USER_BY_EMAIL, params={"email": email}).first()
+    return result
+
+def update_user_password(user_id: int, password: str) -> None:
+    """Replace the stored password (hash) of a user."""
+    session: SessionDep = db_session.get()
+    session.execute(update(User).where(User.id == user_id).values(password=password)) # type: ignore
+    session.commit()
+
+def get_user_emails(after_id: int, limit: int) -> list[tuple[int, str]]:
+    """Get (id, email) of the users after `after_id`, by id."""
+    session: SessionDep = db_session.get()
+    statement = select(User.id, User.email).where(User.id > after_id).order_by(User.id).limit(limit) # type: ignore
+    return list(session.exec(statement).all())
+
+def get_user_role_titles(user_id: int) -> tuple[str, ...] | None:
+    """Get the role titles of a user (cached), or None if the user does not exist."""
+    cached = role_cache.get(user_id, None)
+    if cached is not None:
+        return cached
+    session: SessionDep = db_session.get()
+    statement = select(User).where(User.id == user_id).options(selectinload(User.roles))
+    user = session.exec(statement).first()
+    if user is None:
+        return None
+    titles = tuple(role.title for role in user.roles)
+    role_cache.set(user_id, titles)
+    return titles
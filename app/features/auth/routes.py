@@ -5,14 +5,14 @@ from app.features.auth.models import *
 from app.features.auth.schemas import *
 from app.features.auth.services import *
 
-router = APIRouter(prefix="/auth", tags=["auth"], dependencies=[Depends(get_session)])
+router = APIRouter(prefix="/auth", tags=["auth"], dependencies=[Depends(get_session, scope="function")])
 
 @router.post("/signup")
 async def create_user(user: SignupRequest) -> SignupResponse:
     """Register a new user."""
 
     try:
-        response: SignupResponse = signup_service(user)
+        response: SignupResponse = await signup_service(user)
         return response
     except HTTPException as error:
         raise HTTPException(
@@ -31,7 +31,7 @@ async def create_user(user: SignupRequest) -> SignupResponse:
 async def login(user: LoginRequest) -> LoginResponse:
     """Login a user."""
     try:
-        response: LoginResponse = login_service(user)
+        response: LoginResponse = await login_service(user)
         return response
     except HTTPException as error:
         raise error
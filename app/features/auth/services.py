@@ -1,19 +1,46 @@
 from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
 
+from app.core.database import release_session
+from app.core.security import needs_rehash, password_hasher
 from .models import *
 from .schemas import *
 from .repositories import (create_user as repository_create_user)
 from .repositories import (get_user as repository_get_user)
+from .repositories import (get_user_role_titles as repository_get_user_role_titles)
+from .repositories import (update_user_password as repository_update_user_password)
+from .email_filter import email_filter
 
-def signup_service(user_schema: SignupRequest) -> SignupResponse:
-    """Register a new user."""
+async def signup_service(user_schema: SignupRequest) -> SignupResponse:
+    """Register a new user (the password is stored hashed)."""
     user: User = User(**user_schema.model_dump())
-    if repository_get_user(user.email):
+    # Most signups are new emails: the filter rules them out without a lookup
+    might_exist = email_filter.might_exist(user.email)
+    if might_exist is not False:
+        existing = repository_get_user(user.email)
+        email_filter.record_lookup(might_exist, found=existing is not None)
+        if existing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered",
+            )
+    # No pooled connection is held while the KDF runs
+    release_session()
+    user.password = await password_hasher.hash(user_schema.password)
+    try:
+        repository_create_user(user)
+    except IntegrityError:
+        # Registered by another worker (or concurrently): the unique constraint decides.
+        # full_name is unique too, so check which one it was
+        if repository_get_user(user.email) is None:
+            raise
+        email_filter.constraint_conflicts += 1
+        email_filter.add(user.email)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
         )
-    repository_create_user(user)
+    email_filter.add(user.email)
     if not user.id:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -27,19 +54,45 @@ def signup_service(user_schema: SignupRequest) -> SignupResponse:
         roles=[role.title for role in user.roles],
     )
 
-def login_service(user_schema: LoginRequest) -> LoginResponse:
-    """Login a user."""
+async def login_service(user_schema: LoginRequest) -> LoginResponse:
+    """Login a user. Plaintext passwords (legacy rows) and hashes of an older cost are
+    rehashed with the current parameters once the password is verified."""
     user: User | None = repository_get_user(user_schema.email)
-    if not user or user.password != user_schema.password or user.id is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid credentials",
-        )
-    
-    return LoginResponse(
+    invalid_credentials = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid credentials",
+    )
+    if not user or user.id is None:
+        release_session()
+        await password_hasher.verify_dummy(user_schema.password)
+        raise invalid_credentials
+    stored_password = user.password
+    response = LoginResponse(
         id=user.id,
         email=user.email,
         full_name=user.full_name,
         is_active=user.is_active,
         roles=[role.title for role in user.roles],
-    )
\ No newline at end of file
+    )
+    # Everything is read: no pooled connection is held while the KDF runs
+    release_session()
+
+    if not await password_hasher.verify(user_schema.password, stored_password):
+        raise invalid_credentials
+    if needs_rehash(stored_password):
+        repository_update_user_password(user.id, await password_hasher.hash(user_schema.password))
+    return response
+
+def check_is_admin(user_id: int) -> None:
+    """Check (through the role cache) that the user has the 'admin' role."""
+    role_titles = repository_get_user_role_titles(user_id)
+    if role_titles is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+        )
+    if "admin" not in role_titles:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
+        )
@@ -0,0 +1,57 @@
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.database import session_scope
+from app.core.events import event_bus, Event, OrderStatusChanged, ProductStockChanged
+
+from . import repositories as repo
+from .models import SupplierOrder
+from .stream import order_status_stream
+
+
+def replenish_low_stock(events: list[Event]) -> None:
+    """Coalesces a batch of stock decrements into at most one open SupplierOrder per product."""
+    product_ids = {
+        event.product_id for event in events
+        if isinstance(event, ProductStockChanged)
+        and event.delta < 0
+        and event.stock <= settings.LOW_STOCK_THRESHOLD
+    }
+    if not product_ids:
+        return
+    try:
+        _replenish(product_ids)
+    except IntegrityError:
+        # Another worker placed an order for one of them meanwhile: the retry skips it
+        _replenish(product_ids)
+
+def _replenish(product_ids: set[int]) -> None:
+    with session_scope():
+        # Stock in the events may be stale by now; re-check against the DB
+        low_stock_products = repo.get_low_stock_products(list(product_ids), settings.LOW_STOCK_THRESHOLD)
+        already_ordered = repo.get_product_ids_with_open_supplier_orders(
+            [product.id for product in low_stock_products]
+        )
+        new_orders = []
+        for product in low_stock_products:
+            if product.id in already_ordered:
+                continue
+            amount = max(settings.REPLENISH_TARGET_STOCK - product.stock, 1)
+            new_orders.append(SupplierOrder(
+                supplier_id=product.supplier_id,
+                product_id=product.id,
+                amount=amount,
+                total_price=round(product.price * amount, 2),
+            ))
+        if new_orders:
+            repo.create_supplier_orders(new_orders)
+
+
+def register_order_consumers() -> None:
+    """Subscribes the orders feature consumers to the event bus."""
+    event_bus.subscribe("low-stock-replenishment", (ProductStockChanged,), replenish_low_stock)
+    # Pushed to the SSE streams as soon as possible, not batched for throughput
+    event_bus.subscribe(
+        "order-status-stream", (OrderStatusChanged,), order_status_stream.publish_batch,
+        max_wait=settings.ORDER_STREAM_MAX_DELAY_MS / 1000
+    )
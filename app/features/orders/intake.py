@@ -0,0 +1,101 @@
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from fastapi import HTTPException
+
+from app.core.batching import BatchWriter
+from app.core.config import settings
+from app.core.database import session_scope
+
+from .schemas import ClientOrderPurchaseRequest, IntakeTicketStatus, OrderCreateResponse
+from .services import create_purchase_orders_group_service
+
+# Finished tickets kept for the status URL (per worker)
+_MAX_TRACKED_TICKETS = 10000
+
+
+@dataclass
+class IntakeTicket:
+    user_id: int
+    order_data: ClientOrderPurchaseRequest
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "queued"
+    order_id: Optional[int] = None
+    detail: Optional[str] = None
+
+    def to_status(self) -> IntakeTicketStatus:
+        return IntakeTicketStatus(
+            ticket_id=self.id, status=self.status, status_url=f"/order/intake/{self.id}?id_user={self.user_id}",
+            order_id=self.order_id, detail=self.detail,
+        )
+
+
+def _commit_group(tickets: list[IntakeTicket]) -> list[OrderCreateResponse | HTTPException]:
+    """Write a group of purchases in one transaction and record each ticket's outcome."""
+    try:
+        with session_scope():
+            results = create_purchase_orders_group_service(
+                [(ticket.user_id, ticket.order_data) for ticket in tickets]
+            )
+    except Exception as error:
+        print(f"Order intake group of {len(tickets)} failed: {error}")
+        results = [HTTPException(status_code=500, detail="Error processing order") for _ in tickets]
+    for ticket, result in zip(tickets, results):
+        if isinstance(result, HTTPException):
+            ticket.status, ticket.detail = "failed", str(result.detail)
+        else:
+            ticket.status, ticket.order_id = "committed", result.order_id
+    return results
+
+
+class OrderIntake:
+    """Queues purchase requests; a background writer commits them in groups
+    (ORDER_INTAKE_MAX_BATCH orders or ORDER_INTAKE_MAX_WAIT_MS, whichever comes first)."""
+
+    def __init__(self):
+        self.writer: BatchWriter[IntakeTicket] = BatchWriter(
+            "Order intake", _commit_group,
+            settings.ORDER_INTAKE_MAX_BATCH, settings.ORDER_INTAKE_MAX_WAIT_MS, settings.ORDER_INTAKE_QUEUE_SIZE,
+        )
+        self._tickets: OrderedDict[str, IntakeTicket] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _track(self, ticket: IntakeTicket) -> None:
+        with self._lock:
+            self._tickets[ticket.id] = ticket
+            while len(self._tickets) > _MAX_TRACKED_TICKETS:
+                self._tickets.popitem(last=False)
+
+    def submit(self, user_id: int, order_data: ClientOrderPurchaseRequest) -> IntakeTicket:
+        """Enqueue without waiting (202 mode)."""
+        ticket = IntakeTicket(user_id=user_id, order_data=order_data)
+        self.writer.submit(ticket)
+        self._track(ticket)
+        return ticket
+
+    async def submit_and_wait(self, user_id: int, order_data: ClientOrderPurchaseRequest) -> OrderCreateResponse:
+        """Enqueue and wait for the group commit; raises the order's HTTPException on failure."""
+        ticket = IntakeTicket(user_id=user_id, order_data=order_data)
+        self._track(ticket)
+        return await self.writer.submit_and_wait(ticket)
+
+    def get_ticket(self, ticket_id: str, user_id: int) -> Optional[IntakeTicket]:
+        """The ticket, when it was submitted by `user_id`."""
+        with self._lock:
+            ticket = self._tickets.get(ticket_id)
+        return ticket if ticket is not None and ticket.user_id == user_id else None
+
+    def stop(self) -> None:
+        self.writer.stop()
+
+    def stats(self) -> dict[str, float | int]:
+        return self.writer.stats()
+
+
+order_intake = OrderIntake()
+
+def stop_order_intake() -> None:
+    order_intake.stop()
@@ -1,6 +1,6 @@
 from typing import Optional, List, TYPE_CHECKING
 from sqlmodel import Field, SQLModel, Relationship
-from sqlalchemy import Column, String
+from sqlalchemy import Column, Index, String, text
 from datetime import datetime
 import enum
 
@@ -20,6 +20,8 @@ class OrderStatus(str, enum.Enum):
 
 class ClientOrder(SQLModel, table=True):
     __tablename__ = "client_orders" 
+    # Archived ids must never be handed out again (SQLite reuses max(rowid) otherwise)
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id: Optional[int] = Field(default=None, primary_key=True)
     client_id: int = Field(foreign_key="users.id", index=True, nullable=False)
@@ -42,6 +44,11 @@ class ClientOrder(SQLModel, table=True):
 # Link Table: M2M between ClientOrder and Product
 class ClientOrderProduct(SQLModel, table=True):
     __tablename__ = "client_order_products" 
+    # The primary key leads with order_id; lookups by product (recalls, disputes) use this.
+    # amount and unit_price make it covering for units sold and revenue
+    __table_args__ = (
+        Index("ix_client_order_products_product_order", "product_id", "order_id", "amount", "unit_price"),
+    )
 
     order_id: Optional[int] = Field(default=None, foreign_key="client_orders.id", primary_key=True)
     product_id: Optional[int] = Field(default=None, foreign_key="products.id", primary_key=True)
@@ -55,6 +62,16 @@ class ClientOrderProduct(SQLModel, table=True):
 # --- Supplier Order Models ---
 class SupplierOrder(SQLModel, table=True):
     __tablename__ = "supplier_orders" # type: ignore
+    __table_args__ = (
+        # At most one open (not delivered or canceled) order per product, even when the
+        # replenishment consumers of several workers race
+        Index(
+            "uq_supplier_orders_open_product", "product_id", unique=True,
+            sqlite_where=text("status NOT IN ('delivered', 'canceled')"),
+            postgresql_where=text("status NOT IN ('delivered', 'canceled')"),
+        ),
+        {"sqlite_autoincrement": True},
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     supplier_id: int = Field(foreign_key="suppliers.id", index=True, nullable=False)
@@ -70,4 +87,67 @@ class SupplierOrder(SQLModel, table=True):
     )
 
     supplier: Supplier = Relationship()
-    product: Product = Relationship()
\ No newline at end of file
+    product: Product = Relationship()
+
+# --- Allowed status transitions (current status -> next statuses) ---
+CLIENT_ORDER_TRANSITIONS: dict[str, tuple[str, ...]] = {
+    OrderStatus.PENDING.value: (OrderStatus.CONFIRMED.value, OrderStatus.CANCELED.value),
+    OrderStatus.CUSTOM_PENDING.value: (OrderStatus.CONFIRMED.value, OrderStatus.CANCELED.value),
+    OrderStatus.CONFIRMED.value: (OrderStatus.PROCESSING.value, OrderStatus.CANCELED.value),
+    OrderStatus.PROCESSING.value: (OrderStatus.SHIPPED.value, OrderStatus.CANCELED.value),
+    OrderStatus.SHIPPED.value: (OrderStatus.DELIVERED.value,),
+}
+SUPPLIER_ORDER_TRANSITIONS: dict[str, tuple[str, ...]] = {
+    "placed": (OrderStatus.CONFIRMED.value, OrderStatus.CANCELED.value),
+    OrderStatus.CONFIRMED.value: (OrderStatus.SHIPPED.value, OrderStatus.CANCELED.value),
+    OrderStatus.SHIPPED.value: (OrderStatus.DELIVERED.value,),
+}
+
+# --- Archive Models (cold storage for completed orders) ---
+ARCHIVABLE_ORDER_STATUSES = (OrderStatus.DELIVERED.value, OrderStatus.CANCELED.value)
+
+class ArchivedClientOrder(SQLModel, table=True):
+    __tablename__ = "client_orders_archive" # type: ignore
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    client_id: int = Field(foreign_key="users.id", index=True, nullable=False)
+    total_price: float = Field(default=0.0, nullable=False)
+    status: OrderStatus = Field(
+        default=OrderStatus.DELIVERED,
+        sa_column=Column(String(50), nullable=False)
+    )
+    created_at: datetime = Field(nullable=False)
+    updated_at: datetime = Field(nullable=False)
+    archived_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+    product_links: List["ArchivedClientOrderProduct"] = Relationship(back_populates="order")
+
+class ArchivedClientOrderProduct(SQLModel, table=True):
+    __tablename__ = "client_order_products_archive" # type: ignore
+    __table_args__ = (
+        Index("ix_client_order_products_archive_product_order", "product_id", "order_id", "amount", "unit_price"),
+    )
+
+    order_id: Optional[int] = Field(default=None, foreign_key="client_orders_archive.id", primary_key=True)
+    product_id: Optional[int] = Field(default=None, foreign_key="products.id", primary_key=True)
+    amount: int = Field(default=1, nullable=False)
+    unit_price: float = Field(nullable=False)
+
+    order: ArchivedClientOrder = Relationship(back_populates="product_links")
+    product: Product = Relationship()
+
+class ArchivedSupplierOrder(SQLModel, table=True):
+    __tablename__ = "supplier_orders_archive" # type: ignore
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    supplier_id: int = Field(foreign_key="suppliers.id", index=True, nullable=False)
+    product_id: int = Field(foreign_key="products.id", index=True, nullable=False)
+    amount: int = Field(default=1, nullable=False)
+    total_price: float = Field(nullable=False)
+    status: str = Field(nullable=False)
+    created_at: datetime = Field(nullable=False)
+    updated_at: datetime = Field(nullable=False)
+    archived_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+    supplier: Supplier = Relationship()
+    product: Product = Relationship()
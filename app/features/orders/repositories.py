@@ -1,11 +1,23 @@
 from sqlmodel import select, func, Session
+from sqlalchemy import bindparam, delete, insert, literal, union_all, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload, joinedload
-from typing import List, Optional, Tuple
+from typing import Any, List, Optional, Sequence, Tuple
+from datetime import datetime
+from itertools import groupby
+import heapq
 import math
 
+from app.core.config import settings
 from app.core.database import db_session
+from app.core.invalidation import invalidate_after_commit
+from app.core.projection import projected_columns
+from app.core.statements import prebuilt
+from app.core.events import publish_after_commit, ProductStockChanged, OrderCreated, OrderStatusChanged
 from .models import (
-    ClientOrder, ClientOrderProduct, OrderStatus, SupplierOrder
+    ClientOrder, ClientOrderProduct, OrderStatus, SupplierOrder,
+    ArchivedClientOrder, ArchivedClientOrderProduct, ArchivedSupplierOrder,
+    ARCHIVABLE_ORDER_STATUSES
 )
 from app.features.auth.models import User, Role
 from app.features.products.models import Product
@@ -13,12 +25,13 @@ from app.features.suppliers.models import Supplier
 from app.features.products.repositories import create_product as create_product_repo_ext
 from app.features.products.repositories import get_product as get_product_repo_ext
 
+_USER_WITH_ROLES = select(User).where(User.id == bindparam("user_id")).options(selectinload(User.roles))
 
 def get_user_with_roles(user_id: int) -> Optional[User]:
     """Fetches a user and eagerly loads their roles."""
     session: Session = db_session.get() 
-    statement = select(User).where(User.id == user_id).options(selectinload(User.roles))
-    return session.exec(statement).first()
+    return session.exec(_USER_WITH_ROLES, params={"user_id": user_id}).first()
+
 
 def get_products_by_ids(product_ids: List[int]) -> List[Product]:
     """Gets multiple products by their IDs."""
@@ -32,6 +45,8 @@ def create_product(product: Product) -> None:
     """Creates a new product. Matches product repo style."""
     session: Session = db_session.get() 
     session.add(product)
+    session.flush()
+    invalidate_after_commit("products", product.id)
     session.commit()
 
 def get_product(product_id: int) -> Optional[Product]:
@@ -41,23 +56,74 @@ def get_product(product_id: int) -> Optional[Product]:
 
 def update_product_stock(product_id: int, amount_to_decrease: int) -> bool:
     """ Decreases stock. Commits immediately. Returns True on success. """
-    session: Session = db_session.get() 
-    product = session.get(Product, product_id)
-    if product and product.stock >= amount_to_decrease:
-        product.stock -= amount_to_decrease
-        session.add(product)
-        session.commit() 
-        return True
-    return False 
+    session: Session = db_session.get()
+    # Conditional UPDATE: concurrent purchases cannot both pass the stock check
+    result = session.execute(
+        update(Product)
+        .where(Product.id == product_id, Product.stock >= amount_to_decrease)
+        .values(stock=Product.stock - amount_to_decrease)
+    )
+    if result.rowcount != 1:
+        session.rollback()
+        return False
+    stock = session.exec(select(Product.stock).where(Product.id == product_id)).one()
+    publish_after_commit(ProductStockChanged(
+        product_id=product_id, stock=stock, delta=-amount_to_decrease
+    ))
+    invalidate_after_commit("products", product_id)
+    session.commit()
+    return True
 
 def create_client_order(order: ClientOrder) -> ClientOrder:
     """Creates a new client order. Commits immediately."""
     session: Session = db_session.get() 
     session.add(order)
+    session.flush()
+    publish_after_commit(OrderCreated(order_id=order.id, kind="client"))
     session.commit()
     session.refresh(order)
     return order
 
+def create_client_orders_group(
+    orders_with_links: List[Tuple[ClientOrder, List[ClientOrderProduct]]],
+    stock_decrements: dict[int, int]
+) -> bool:
+    """Writes many purchase orders in one transaction. Commits once.
+
+    Stock is decremented with conditional UPDATEs; if any product no longer has
+    enough stock the whole group is rolled back and False is returned.
+    """
+    session: Session = db_session.get()
+    try:
+        for product_id, amount in stock_decrements.items():
+            # The stock left after this UPDATE, not the one read before it (other purchases)
+            stock = session.execute(
+                update(Product)
+                .where(Product.id == product_id, Product.stock >= amount)
+                .values(stock=Product.stock - amount)
+                .returning(Product.stock)
+            ).scalar_one_or_none()
+            if stock is None:
+                session.rollback()
+                return False
+            publish_after_commit(ProductStockChanged(
+                product_id=product_id, stock=stock, delta=-amount
+            ))
+            invalidate_after_commit("products", product_id)
+
+        session.add_all([order for order, _ in orders_with_links])
+        session.flush()
+        for order, links in orders_with_links:
+            for link in links:
+                link.order_id = order.id
+            session.add_all(links)
+            publish_after_commit(OrderCreated(order_id=order.id, kind="client"))
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return True
+
 def add_product_to_client_order(order_id: int, product_id: int, amount: int, unit_price: float) -> ClientOrderProduct:
     """Adds a product link to a client order. Commits immediately."""
     session: Session = db_session.get() 
@@ -75,99 +141,522 @@ def add_product_to_client_order(order_id: int, product_id: int, amount: int, uni
 def get_client_order_by_id(
     order_id: int,
     client_id: Optional[int] = None,
-    is_admin: bool = False
-) -> Optional[ClientOrder]:
-    """Gets a specific client order by ID."""
+    is_admin: bool = False,
+    include_archived: bool = True
+) -> Optional[ClientOrder | ArchivedClientOrder]:
+    """Gets a specific client order by ID, falling back to the archive."""
     session: Session = db_session.get() 
-    statement = select(ClientOrder).where(ClientOrder.id == order_id)
-    if not is_admin and client_id is not None:
-        statement = statement.where(ClientOrder.client_id == client_id)
-    statement = statement.options(
-        selectinload(ClientOrder.product_links).joinedload(ClientOrderProduct.product)
+    scoped = not is_admin and client_id is not None
+    statement = prebuilt(
+        ("orders.client_order_by_id", scoped),
+        lambda: _client_order_by_id_select(ClientOrder, ClientOrderProduct, scoped)
+    )
+    order = session.exec(statement, params=_order_id_params(order_id, client_id if scoped else None)).first()
+    if order is None and include_archived:
+        return get_archived_client_order_by_id(order_id, client_id, is_admin)
+    return order
+
+def get_archived_client_order_by_id(
+    order_id: int,
+    client_id: Optional[int] = None,
+    is_admin: bool = False
+) -> Optional[ArchivedClientOrder]:
+    """Gets a specific client order from the archive."""
+    session: Session = db_session.get()
+    scoped = not is_admin and client_id is not None
+    statement = prebuilt(
+        ("orders.archived_client_order_by_id", scoped),
+        lambda: _client_order_by_id_select(ArchivedClientOrder, ArchivedClientOrderProduct, scoped)
     )
-    return session.exec(statement).first()
+    return session.exec(statement, params=_order_id_params(order_id, client_id if scoped else None)).first()
+
+def _client_order_by_id_select(order_model: Any, link_model: Any, scoped: bool):
+    """Order by :order_id (and :client_id when scoped) with its lines and their products."""
+    statement = select(order_model).where(order_model.id == bindparam("order_id"))
+    if scoped:
+        statement = statement.where(order_model.client_id == bindparam("client_id"))
+    return statement.options(
+        selectinload(order_model.product_links).joinedload(link_model.product)
+    )
+
+def _order_id_params(order_id: int, client_id: Optional[int]) -> dict[str, int]:
+    if client_id is None:
+        return {"order_id": order_id}
+    return {"order_id": order_id, "client_id": client_id}
 
 def get_client_orders_paginated(
     client_id: Optional[int] = None,
     status: Optional[OrderStatus] = None,
     is_custom_price: Optional[bool] = None,
     page: int = 1,
-    page_size: int = 10
-) -> Tuple[List[ClientOrder], int]:
-    """Gets a paginated list of client orders with optional filters."""
+    page_size: int = 10,
+    include_archived: bool = False,
+    fields: Optional[Sequence[str]] = None
+) -> Tuple[List[Any], int]:
+    """Gets a paginated list of client orders with optional filters, as column rows of
+    `fields` (all list columns by default)."""
+    if include_archived:
+        return _get_client_orders_with_archive_paginated(
+            client_id, status, is_custom_price, page, page_size, fields
+        )
     session: Session = db_session.get() 
-    offset = (page - 1) * page_size
-    statement = select(ClientOrder)
-    count_statement = select(func.count(ClientOrder.id)) 
-    
-    filters = []
-    count_filters = []
+    params = _client_orders_params(client_id, status, page, page_size)
+    shape = (client_id is not None, bool(status), is_custom_price)
+
+    def build_count():
+        count_statement = select(func.count(ClientOrder.id)) 
+        if is_custom_price is not None or client_id is not None or status:
+            count_statement = select(func.count(ClientOrder.id.distinct())).select_from(ClientOrder)
+            if client_id is not None:
+                 count_statement = count_statement.where(ClientOrder.client_id == bindparam("client_id"))
+            if status:
+                 count_statement = count_statement.where(ClientOrder.status == bindparam("status"))
+            if is_custom_price is not None:
+                 count_statement = count_statement.join(ClientOrderProduct).join(Product)
+                 if is_custom_price:
+                      count_statement = count_statement.where(Product.price == 0)
+        return count_statement
+
+    def build_page():
+        return _client_orders_select(ClientOrder, ClientOrderProduct, client_id, status, is_custom_price, fields) \
+            .order_by(ClientOrder.created_at.desc()) \
+            .offset(bindparam("offset")) \
+            .limit(bindparam("limit"))
+
+    count_statement = prebuilt(("orders.client_orders_count", *shape), build_count)
+    total_items = session.exec(count_statement, params=params).one_or_none() or 0
+
+    statement = prebuilt(("orders.client_orders_page", *shape, tuple(fields or ())), build_page)
+    orders = session.exec(statement, params=params).all()
+
+    return orders, total_items
+
+_CLIENT_ORDER_COLUMNS = ("id", "client_id", "total_price", "status", "created_at", "updated_at")
+
+def _client_orders_select(
+    order_model: Any,
+    link_model: Any,
+    client_id: Optional[int],
+    status: Optional[OrderStatus],
+    is_custom_price: Optional[bool],
+    fields: Optional[Sequence[str]] = None
+):
+    """Builds the column select of one client orders table (hot or archive). The filter
+    values are the :client_id and :status parameters (see `_client_orders_params`)."""
+    statement = select(*projected_columns(order_model, fields or _CLIENT_ORDER_COLUMNS, required=("id", "created_at")))
     if client_id is not None:
-        filters.append(ClientOrder.client_id == client_id)
-        count_filters.append(ClientOrder.client_id == client_id)
+        statement = statement.where(order_model.client_id == bindparam("client_id"))
     if status:
-        filters.append(ClientOrder.status == status)
-        count_filters.append(ClientOrder.status == status)
-
-    base_query_joins = False
+        statement = statement.where(order_model.status == bindparam("status"))
     if is_custom_price is not None:
-        base_query_joins = True
-        statement = statement.join(ClientOrderProduct).join(Product)
+        statement = statement.join(link_model, link_model.order_id == order_model.id) \
+            .join(Product, Product.id == link_model.product_id)
         if is_custom_price:
-             filters.append(Product.price == 0)
-        statement = statement.distinct() 
+            statement = statement.where(Product.price == 0)
+        statement = statement.distinct()
+    return statement
 
-    if filters:
-        statement = statement.where(*filters)
+def _get_client_orders_with_archive_paginated(
+    client_id: Optional[int],
+    status: Optional[OrderStatus],
+    is_custom_price: Optional[bool],
+    page: int,
+    page_size: int,
+    fields: Optional[Sequence[str]] = None
+) -> Tuple[List[Any], int]:
+    """Paginates over the union of hot and archived client orders."""
+    session: Session = db_session.get()
+    params = _client_orders_params(client_id, status, page, page_size)
+    shape = (client_id is not None, bool(status), is_custom_price, tuple(fields or ()))
 
-    if is_custom_price is not None or count_filters:
-        count_statement = select(func.count(ClientOrder.id.distinct())).select_from(ClientOrder)
-        if count_filters:
-             count_statement = count_statement.where(*count_filters)
-        if is_custom_price is not None:
-             count_statement = count_statement.join(ClientOrderProduct).join(Product)
-             if is_custom_price:
-                  count_statement = count_statement.where(Product.price == 0)
+    def build():
+        orders_union = union_all(
+            _client_orders_select(ClientOrder, ClientOrderProduct, client_id, status, is_custom_price, fields),
+            _client_orders_select(ArchivedClientOrder, ArchivedClientOrderProduct, client_id, status, is_custom_price, fields),
+        ).subquery()
+        return (
+            select(func.count()).select_from(orders_union),
+            select(orders_union)
+            .order_by(orders_union.c.created_at.desc(), orders_union.c.id.desc())
+            .offset(bindparam("offset"))
+            .limit(bindparam("limit")),
+        )
 
+    count_statement, page_statement = prebuilt(("orders.client_orders_with_archive", *shape), build)
+    total_items = session.execute(count_statement, params).scalar_one()
+    orders = session.execute(page_statement, params).all()
+    return list(orders), total_items
 
-    total_items = session.exec(count_statement).one_or_none() or 0
+def _client_orders_params(
+    client_id: Optional[int],
+    status: Optional[OrderStatus],
+    page: int,
+    page_size: int
+) -> dict[str, Any]:
+    params: dict[str, Any] = {"offset": (page - 1) * page_size, "limit": page_size}
+    if client_id is not None:
+        params["client_id"] = client_id
+    if status:
+        params["status"] = status
+    return params
 
-    orders = session.exec(
-        statement.order_by(ClientOrder.created_at.desc())
-        .offset(offset)
-        .limit(page_size)
-    ).all()
 
-    return orders, total_items
+def get_low_stock_products(product_ids: List[int], threshold: int) -> List[Product]:
+    """Gets the given products whose stock is at or below the threshold and have a supplier."""
+    session: Session = db_session.get()
+    if not product_ids:
+        return []
+    statement = select(Product).where(
+        Product.id.in_(product_ids),
+        Product.stock <= threshold,
+        Product.supplier_id.is_not(None) # type: ignore
+    )
+    return list(session.exec(statement).all())
+
+def get_product_ids_with_open_supplier_orders(product_ids: List[int]) -> set[int]:
+    """Gets which of the given products already have a supplier order in flight."""
+    session: Session = db_session.get()
+    if not product_ids:
+        return set()
+    statement = select(SupplierOrder.product_id).where(
+        SupplierOrder.product_id.in_(product_ids),
+        SupplierOrder.status.not_in(ARCHIVABLE_ORDER_STATUSES) # type: ignore
+    ).distinct()
+    return set(session.exec(statement).all())
+
+def create_supplier_orders(orders: List[SupplierOrder]) -> List[SupplierOrder]:
+    """Creates supplier orders in one transaction, skipping the products that already have
+    an open one: each INSERT only happens if none exists, and uq_supplier_orders_open_product
+    rejects the rest of a race (IntegrityError, rolled back). Commits immediately and
+    returns the orders created."""
+    session: Session = db_session.get()
+    created = []
+    columns = ("supplier_id", "product_id", "amount", "total_price", "status", "created_at", "updated_at")
+    try:
+        for order in orders:
+            open_order = select(SupplierOrder.id).where(
+                SupplierOrder.product_id == order.product_id,
+                SupplierOrder.status.not_in(ARCHIVABLE_ORDER_STATUSES) # type: ignore
+            )
+            values = select(*(literal(getattr(order, column)) for column in columns)).where(~open_order.exists())
+            order.id = session.execute(
+                insert(SupplierOrder).from_select(columns, values).returning(SupplierOrder.id)
+            ).scalar()
+            if order.id is None:
+                continue
+            created.append(order)
+            publish_after_commit(OrderCreated(order_id=order.id, kind="supplier"))
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        raise
+    return created
 
 
-def get_supplier_order_by_id(order_id: int) -> Optional[SupplierOrder]:
-    """Gets a specific supplier order by ID."""
+def _supplier_order_by_id_select(order_model: Any):
+    return select(order_model) \
+        .where(order_model.id == bindparam("order_id")) \
+        .options(
+            joinedload(order_model.product),
+            joinedload(order_model.supplier)
+        )
+
+_SUPPLIER_ORDER_BY_ID = _supplier_order_by_id_select(SupplierOrder)
+_ARCHIVED_SUPPLIER_ORDER_BY_ID = _supplier_order_by_id_select(ArchivedSupplierOrder)
+
+def get_supplier_order_by_id(
+    order_id: int,
+    include_archived: bool = True
+) -> Optional[SupplierOrder | ArchivedSupplierOrder]:
+    """Gets a specific supplier order by ID, falling back to the archive."""
     session: Session = db_session.get() 
-    statement = select(SupplierOrder).where(SupplierOrder.id == order_id)
-    statement = statement.options(
-        joinedload(SupplierOrder.product),
-        joinedload(SupplierOrder.supplier)
-    )
-    return session.exec(statement).first()
+    params = {"order_id": order_id}
+    order = session.exec(_SUPPLIER_ORDER_BY_ID, params=params).first()
+    if order is None and include_archived:
+        return session.exec(_ARCHIVED_SUPPLIER_ORDER_BY_ID, params=params).first()
+    return order
+
+_SUPPLIER_ORDER_COLUMNS = (
+    "id", "supplier_id", "product_id", "amount", "total_price",
+    "status", "created_at", "updated_at"
+)
+
+def _supplier_orders_select(order_model: Any, fields: Optional[Sequence[str]]):
+    return select(*projected_columns(order_model, fields or _SUPPLIER_ORDER_COLUMNS, required=("id", "created_at")))
+
+_SUPPLIER_ORDERS_COUNT = select(func.count()).select_from(SupplierOrder)
 
 def get_supplier_orders_paginated(
     page: int = 1,
-    page_size: int = 10
-) -> Tuple[List[SupplierOrder], int]:
-    """Gets a paginated list of all supplier orders."""
+    page_size: int = 10,
+    include_archived: bool = False,
+    fields: Optional[Sequence[str]] = None
+) -> Tuple[List[Any], int]:
+    """Gets a paginated list of all supplier orders, as column rows of `fields` (all list
+    columns by default; the list needs no product or supplier)."""
+    if include_archived:
+        return _get_supplier_orders_with_archive_paginated(page, page_size, fields)
     session: Session = db_session.get() 
-    offset = (page - 1) * page_size
-    count_statement = select(func.count()).select_from(SupplierOrder)
-    total_items = session.exec(count_statement).one()
-
-    statement = select(SupplierOrder) \
-        .order_by(SupplierOrder.created_at.desc()) \
-        .offset(offset) \
-        .limit(page_size) \
-        .options(
-            joinedload(SupplierOrder.product),
-            joinedload(SupplierOrder.supplier)
+    params = {"offset": (page - 1) * page_size, "limit": page_size}
+    total_items = session.exec(_SUPPLIER_ORDERS_COUNT).one()
+
+    statement = prebuilt(
+        ("orders.supplier_orders_page", tuple(fields or ())),
+        lambda: _supplier_orders_select(SupplierOrder, fields)
+            .order_by(SupplierOrder.created_at.desc())
+            .offset(bindparam("offset"))
+            .limit(bindparam("limit"))
+    )
+    orders = session.exec(statement, params=params).all()
+    return orders, total_items
+
+def _get_supplier_orders_with_archive_paginated(
+    page: int,
+    page_size: int,
+    fields: Optional[Sequence[str]] = None
+) -> Tuple[List[Any], int]:
+    """Paginates over the union of hot and archived supplier orders."""
+    session: Session = db_session.get()
+    params = {"offset": (page - 1) * page_size, "limit": page_size}
+
+    def build():
+        orders_union = union_all(
+            _supplier_orders_select(SupplierOrder, fields),
+            _supplier_orders_select(ArchivedSupplierOrder, fields),
+        ).subquery()
+        return (
+            select(func.count()).select_from(orders_union),
+            select(orders_union)
+            .order_by(orders_union.c.created_at.desc(), orders_union.c.id.desc())
+            .offset(bindparam("offset"))
+            .limit(bindparam("limit")),
         )
-    orders = session.exec(statement).all()
-    return orders, total_items
\ No newline at end of file
+
+    count_statement, page_statement = prebuilt(("orders.supplier_orders_with_archive", tuple(fields or ())), build)
+    total_items = session.execute(count_statement).scalar_one()
+    orders = session.execute(page_statement, params).all()
+    return list(orders), total_items
+
+
+# Orders by product (recalls, supplier disputes): product-leading index, keyset on order_id
+def get_product_ids_for_supplier(supplier_id: int) -> List[int]:
+    """Gets the IDs of a supplier's products."""
+    session: Session = db_session.get()
+    return list(session.exec(select(Product.id).where(Product.supplier_id == supplier_id)).all())
+
+def _product_lines_select(link_model: Any, product_ids: List[int], archived: bool):
+    return select(
+        link_model.order_id.label("order_id"),
+        link_model.amount.label("amount"),
+        (link_model.amount * link_model.unit_price).label("revenue"),
+        literal(archived).label("archived")
+    ).where(link_model.product_id.in_(product_ids))
+
+# Per-product seeks in one statement (UNION ALL), well below SQLite's compound select limit
+_PRODUCT_SEEKS_PER_STATEMENT = 100
+
+def _product_seeks_select(link_model: Any, count: int, with_before: bool):
+    """`count` seeks of the (product_id, order_id) index, newest order first, each with its
+    own LIMIT: index range scans only, no temp B-tree for grouping or sorting."""
+    seeks = []
+    for index in range(count):
+        seek = select(
+            link_model.product_id, link_model.order_id, link_model.amount,
+            (link_model.amount * link_model.unit_price).label("revenue")
+        ).where(link_model.product_id == bindparam(f"product_id_{index}"))
+        if with_before:
+            seek = seek.where(link_model.order_id < bindparam("before_order_id"))
+        seeks.append(seek.order_by(link_model.order_id.desc()).limit(bindparam("limit")).subquery().select())
+    return union_all(*seeks) if count > 1 else seeks[0]
+
+def get_order_lines_for_products(
+    product_ids: List[int], before_order_id: Optional[int], limit: int, include_archived: bool = False
+) -> List[Tuple[int, int, float, bool]]:
+    """Gets (order_id, units, revenue, archived) per client order containing any of the
+    products, newest order first, for orders before `before_order_id`.
+
+    Each product's (product_id, order_id, ...) index range is read newest first up to
+    `limit` lines (an order has one line per product, so that covers the newest `limit`
+    orders of every product), in statements of _PRODUCT_SEEKS_PER_STATEMENT seeks. The
+    per-product runs are merged on order_id and an order's lines summed. Hot and archived
+    order IDs never overlap.
+    """
+    session: Session = db_session.get()
+    models = [(ClientOrderProduct, False)]
+    if include_archived:
+        models.append((ArchivedClientOrderProduct, True))
+    runs: dict[Tuple[bool, int], List[Tuple[int, int, float, bool]]] = {}
+    for link_model, archived in models:
+        for start in range(0, len(product_ids), _PRODUCT_SEEKS_PER_STATEMENT):
+            chunk = product_ids[start:start + _PRODUCT_SEEKS_PER_STATEMENT]
+            params: dict[str, Any] = {f"product_id_{index}": product_id for index, product_id in enumerate(chunk)}
+            params["limit"] = limit
+            if before_order_id is not None:
+                params["before_order_id"] = before_order_id
+            statement = _product_seeks_select(link_model, len(chunk), before_order_id is not None)
+            for product_id, order_id, amount, revenue in session.execute(statement, params).all():
+                runs.setdefault((archived, product_id), []).append((order_id, amount, revenue, archived))
+
+    order_id_of = lambda line: line[0]
+    for run in runs.values():
+        # Already newest first from the index; a union does not promise to keep it
+        run.sort(key=order_id_of, reverse=True)
+    lines = []
+    for order_id, order_lines in groupby(heapq.merge(*runs.values(), key=order_id_of, reverse=True), key=order_id_of):
+        if len(lines) == limit:
+            break
+        order_lines = list(order_lines)
+        lines.append((
+            order_id, int(sum(line[1] for line in order_lines)),
+            round(float(sum(line[2] for line in order_lines)), 2), bool(order_lines[0][3])
+        ))
+    return lines
+
+def get_product_order_totals(product_ids: List[int], include_archived: bool = False) -> Tuple[int, int]:
+    """Gets (orders, units sold) over every client order containing any of the products.
+
+    Product IDs go PRODUCT_BATCH_CHUNK_SIZE per IN (...); past one chunk the distinct
+    orders are counted here, as an order can span chunks.
+    """
+    session: Session = db_session.get()
+    chunk_size = settings.PRODUCT_BATCH_CHUNK_SIZE
+    order_ids: set[int] = set()
+    orders = units = 0
+    for start in range(0, len(product_ids), chunk_size):
+        chunk = product_ids[start:start + chunk_size]
+        selects = [_product_lines_select(ClientOrderProduct, chunk, False)]
+        if include_archived:
+            selects.append(_product_lines_select(ArchivedClientOrderProduct, chunk, True))
+        lines = (union_all(*selects) if len(selects) > 1 else selects[0]).subquery()
+        if len(product_ids) <= chunk_size:
+            orders, chunk_units = session.exec(
+                select(func.count(func.distinct(lines.c.order_id)), func.coalesce(func.sum(lines.c.amount), 0))
+            ).one()
+        else:
+            chunk_units = session.exec(select(func.coalesce(func.sum(lines.c.amount), 0))).one()
+            order_ids.update(session.exec(select(lines.c.order_id).distinct()).all())
+            orders = len(order_ids)
+        units += int(chunk_units)
+    return orders, units
+
+def get_client_order_headers(order_ids: List[int], include_archived: bool = False) -> dict[int, Tuple[int, str, datetime]]:
+    """Gets (client_id, status, created_at) of the given client orders."""
+    session: Session = db_session.get()
+    headers = {}
+    models = (ClientOrder, ArchivedClientOrder) if include_archived else (ClientOrder,)
+    for model in models:
+        rows = session.exec(
+            select(model.id, model.client_id, model.status, model.created_at).where(model.id.in_(order_ids)) # type: ignore
+        ).all()
+        headers.update({order_id: (client_id, status, created_at) for order_id, client_id, status, created_at in rows})
+    return headers
+
+# Bulk status transitions: set-based, one UPDATE per current status and chunk
+def get_order_statuses(
+    model: type[ClientOrder] | type[SupplierOrder], order_ids: List[int]
+) -> dict[int, Tuple[str, Optional[int]]]:
+    """Gets the current status (and client, for client orders) of the given orders."""
+    session: Session = db_session.get()
+    owner = model.client_id if model is ClientOrder else literal(None)
+    rows = session.exec(select(model.id, model.status, owner).where(model.id.in_(order_ids))).all() # type: ignore
+    return {order_id: (status, client_id) for order_id, status, client_id in rows}
+
+def transition_orders_status(
+    model: type[ClientOrder] | type[SupplierOrder], kind: str,
+    ids_by_status: dict[str, List[int]], to_status: str,
+    client_ids: Optional[dict[int, Optional[int]]] = None
+) -> set[int]:
+    """Moves orders to `to_status` with `UPDATE ... WHERE id IN (...) AND status = ?`,
+    one statement per current status. Commits once. Returns the IDs that moved (RETURNING).
+
+    The status guard makes it safe against concurrent changes: an order whose status
+    changed since it was read is simply not updated.
+    """
+    session: Session = db_session.get()
+    updated: set[int] = set()
+    now = datetime.utcnow()
+    try:
+        for from_status, order_ids in ids_by_status.items():
+            # RETURNING: exactly the rows this statement moved, the others changed underneath us
+            moved = list(session.execute(
+                update(model)
+                .where(model.id.in_(order_ids), model.status == from_status) # type: ignore
+                .values(status=to_status, updated_at=now)
+                .returning(model.id)
+            ).scalars().all())
+            for order_id in moved:
+                publish_after_commit(OrderStatusChanged(
+                    order_id=order_id, kind=kind, old_status=from_status, new_status=to_status,
+                    client_id=(client_ids or {}).get(order_id)
+                ))
+            updated.update(moved)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return updated
+
+# Archival: moves completed orders into the *_archive tables, one batch per transaction
+_CLIENT_ORDER_PRODUCT_COLUMNS = ("order_id", "product_id", "amount", "unit_price")
+
+def archive_client_orders_batch(cutoff: datetime, batch_size: int) -> int:
+    """Moves one batch of completed client orders (and their links) to the archive. Commits."""
+    session: Session = db_session.get()
+    order_ids = session.exec(
+        select(ClientOrder.id)
+        .where(
+            ClientOrder.status.in_(ARCHIVABLE_ORDER_STATUSES), # type: ignore
+            ClientOrder.updated_at < cutoff
+        )
+        .order_by(ClientOrder.id)
+        .limit(batch_size)
+    ).all()
+    if not order_ids:
+        return 0
+
+    archived_at = literal(datetime.utcnow())
+    session.execute(
+        insert(ArchivedClientOrder).from_select(
+            [*_CLIENT_ORDER_COLUMNS, "archived_at"],
+            select(*[getattr(ClientOrder, column) for column in _CLIENT_ORDER_COLUMNS], archived_at)
+            .where(ClientOrder.id.in_(order_ids))
+        )
+    )
+    session.execute(
+        insert(ArchivedClientOrderProduct).from_select(
+            list(_CLIENT_ORDER_PRODUCT_COLUMNS),
+            select(*[getattr(ClientOrderProduct, column) for column in _CLIENT_ORDER_PRODUCT_COLUMNS])
+            .where(ClientOrderProduct.order_id.in_(order_ids))
+        )
+    )
+    session.execute(delete(ClientOrderProduct).where(ClientOrderProduct.order_id.in_(order_ids)))
+    session.execute(delete(ClientOrder).where(ClientOrder.id.in_(order_ids)))
+    session.commit()
+    return len(order_ids)
+
+def archive_supplier_orders_batch(cutoff: datetime, batch_size: int) -> int:
+    """Moves one batch of completed supplier orders to the archive. Commits."""
+    session: Session = db_session.get()
+    order_ids = session.exec(
+        select(SupplierOrder.id)
+        .where(
+            SupplierOrder.status.in_(ARCHIVABLE_ORDER_STATUSES), # type: ignore
+            SupplierOrder.updated_at < cutoff
+        )
+        .order_by(SupplierOrder.id)
+        .limit(batch_size)
+    ).all()
+    if not order_ids:
+        return 0
+
+    archived_at = literal(datetime.utcnow())
+    session.execute(
+        insert(ArchivedSupplierOrder).from_select(
+            [*_SUPPLIER_ORDER_COLUMNS, "archived_at"],
+            select(*[getattr(SupplierOrder, column) for column in _SUPPLIER_ORDER_COLUMNS], archived_at)
+            .where(SupplierOrder.id.in_(order_ids))
+        )
+    )
+    session.execute(delete(SupplierOrder).where(SupplierOrder.id.in_(order_ids)))
+    session.commit()
+    return len(order_ids)
@@ -1,32 +1,81 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Body, Path
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query, Body, Path, Header
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import List, Literal, Optional
 
-from app.core.database import get_session
+from app.core.config import settings
+from app.core.database import get_session, release_session, run_in_threadpool_with_session
+from app.core.encoding import negotiated_response
 from .models import OrderStatus
 from .schemas import (
     ClientOrderPurchaseRequest, ClientOrderCustomRequest, OrderCreateResponse,
     ClientOrderReadBase, ClientOrderReadDetails, PaginatedResponse,
-    SupplierOrderReadBase, SupplierOrderReadDetails
+    SupplierOrderReadBase, SupplierOrderReadDetails, ArchiveRunResponse, IntakeTicketStatus,
+    BulkStatusTransitionRequest, BulkStatusTransitionResponse, ProductOrdersPage
 )
+from .intake import order_intake
+from .stream import order_status_stream
 from .services import (
     create_purchase_order_service, create_custom_order_service,
     get_client_order_details_service, list_client_orders_service,
     list_all_client_orders_service, get_any_client_order_details_service,
     list_all_supplier_orders_service, get_supplier_order_details_service,
-    list_custom_client_orders_service, get_custom_client_order_details_service
+    list_custom_client_orders_service, get_custom_client_order_details_service,
+    archive_completed_orders_service, bulk_transition_orders_service, authorize_order_stream,
+    list_orders_by_product_service, list_orders_by_supplier_service
 )
 
-router = APIRouter(prefix="/order", tags=["orders"], dependencies=[Depends(get_session)])
+router = APIRouter(prefix="/order", tags=["orders"], dependencies=[Depends(get_session, scope="function")])
 # All
 @router.get("/all", response_model=PaginatedResponse, summary="List User's Orders")
 async def get_my_orders(
+    request: Request,
     id_user: int = Query(..., description="ID of the user requesting their orders"),
     page: int = Query(1, ge=1), page_size: int = Query(10, ge=1, le=100, alias="limit"),
-    state: Optional[OrderStatus] = Query(None)
+    state: Optional[OrderStatus] = Query(None),
+    include_archived: bool = Query(False, description="Also list archived (older, completed) orders"),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of the item fields")
 ):
     try:
         # Service does not need session passed
-        return list_client_orders_service(user_id=id_user, page=page, page_size=page_size, state=state)
+        return negotiated_response(request, list_client_orders_service(
+            user_id=id_user, page=page, page_size=page_size, state=state, include_archived=include_archived,
+            fields=fields
+        ))
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
+
+# Status streams (Server-Sent Events), declared before /{order_id}
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+@router.get("/stream", summary="Stream User's Order Status Changes (SSE)", response_class=StreamingResponse)
+async def stream_my_orders(
+    id_user: int = Query(...),
+    last_event_id: Optional[str] = Header(None, description="Resume after this event (sent by EventSource on reconnect)")
+):
+    try:
+        authorize_order_stream(user_id=id_user)
+        # The stream never touches the DB again: give the connection back to the pool
+        release_session()
+        return StreamingResponse(
+            order_status_stream.events(client_id=id_user, last_event_id=last_event_id),
+            media_type="text/event-stream", headers=_SSE_HEADERS
+        )
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
+
+@router.get("/stream/all", summary="[Admin] Stream All Order Status Changes (SSE)", response_class=StreamingResponse, tags=["admin"])
+async def stream_all_orders(
+    id_user: int = Query(...),
+    kind: Optional[Literal["client", "supplier"]] = Query(None),
+    last_event_id: Optional[str] = Header(None)
+):
+    try:
+        authorize_order_stream(user_id=id_user, firehose=True)
+        release_session()
+        return StreamingResponse(
+            order_status_stream.events(client_id=None, last_event_id=last_event_id, kind=kind),
+            media_type="text/event-stream", headers=_SSE_HEADERS
+        )
     except HTTPException as e: raise e
     except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
 
@@ -49,19 +98,38 @@ async def create_custom_order(custom_data: ClientOrderCustomRequest = Body(...),
     except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
 
 # Post Purchase Order
-@router.post("/purchase", response_model=OrderCreateResponse, status_code=201, summary="Create Purchase Order")
-async def create_purchase_order(order_data: ClientOrderPurchaseRequest = Body(...), id_user: int = Query(...)):
+@router.post(
+    "/purchase", response_model=OrderCreateResponse, status_code=201, summary="Create Purchase Order",
+    responses={202: {"model": IntakeTicketStatus, "description": "Queued (group intake with Prefer: respond-async)"}},
+)
+async def create_purchase_order(
+    order_data: ClientOrderPurchaseRequest = Body(...), id_user: int = Query(...),
+    prefer: Optional[str] = Header(None)
+):
     try:
+        if settings.ORDER_INTAKE_MODE == "group":
+            if prefer and "respond-async" in prefer.lower():
+                ticket = order_intake.submit(user_id=id_user, order_data=order_data).to_status()
+                return JSONResponse(status_code=202, content=ticket.model_dump(), headers={"Location": ticket.status_url})
+            return await order_intake.submit_and_wait(user_id=id_user, order_data=order_data)
         # Service does not need session passed
         return create_purchase_order_service(user_id=id_user, order_data=order_data)
     except HTTPException as e: raise e
     except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
 
+# Purchase intake ticket status
+@router.get("/intake/{ticket_id}", response_model=IntakeTicketStatus, summary="Get Purchase Intake Status")
+async def get_purchase_intake_status(ticket_id: str = Path(...), id_user: int = Query(...)):
+    # Another client's ticket is reported as missing
+    ticket = order_intake.get_ticket(ticket_id, user_id=id_user)
+    if not ticket: raise HTTPException(status_code=404, detail="Ticket not found")
+    return ticket.to_status()
+
 # Admin view All
 @router.get("/purchases/all", response_model=PaginatedResponse, summary="[Admin] List Client Orders", tags=["admin"])
-async def admin_get_all_client_orders(id_user: int = Query(...), page: int = Query(1), page_size: int = Query(10, alias="limit")):
+async def admin_get_all_client_orders(request: Request, id_user: int = Query(...), page: int = Query(1), page_size: int = Query(10, alias="limit"), include_archived: bool = Query(False), fields: Optional[str] = Query(None, description="Comma-separated subset of the item fields")):
     try:
-        return list_all_client_orders_service(admin_user_id=id_user, page=page, page_size=page_size)
+        return negotiated_response(request, list_all_client_orders_service(admin_user_id=id_user, page=page, page_size=page_size, include_archived=include_archived, fields=fields))
     except HTTPException as e: raise e
     except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
 
@@ -75,9 +143,9 @@ async def admin_get_client_order_details(order_id: int = Path(..., ge=1), id_use
 
 # Admin view all Supplier Orders
 @router.get("/sales/all", response_model=PaginatedResponse, summary="[Admin] List Supplier Orders", tags=["admin"])
-async def admin_get_all_supplier_orders(id_user: int = Query(...), page: int = Query(1), page_size: int = Query(10, alias="limit")):
+async def admin_get_all_supplier_orders(id_user: int = Query(...), page: int = Query(1), page_size: int = Query(10, alias="limit"), include_archived: bool = Query(False), fields: Optional[str] = Query(None, description="Comma-separated subset of the item fields")):
     try:
-        return list_all_supplier_orders_service(admin_user_id=id_user, page=page, page_size=page_size)
+        return list_all_supplier_orders_service(admin_user_id=id_user, page=page, page_size=page_size, include_archived=include_archived, fields=fields)
     except HTTPException as e: raise e
     except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
 
@@ -91,9 +159,9 @@ async def admin_get_supplier_order_details(order_id: int = Path(..., ge=1), id_u
 
 # Admin view Custom Orders
 @router.get("/custom/all", response_model=PaginatedResponse, summary="[Admin] List Custom Orders", tags=["admin"])
-async def admin_get_all_custom_orders(id_user: int = Query(...), page: int = Query(1), page_size: int = Query(10, alias="limit")):
+async def admin_get_all_custom_orders(id_user: int = Query(...), page: int = Query(1), page_size: int = Query(10, alias="limit"), fields: Optional[str] = Query(None, description="Comma-separated subset of the item fields")):
     try:
-        return list_custom_client_orders_service(admin_user_id=id_user, page=page, page_size=page_size)
+        return list_custom_client_orders_service(admin_user_id=id_user, page=page, page_size=page_size, fields=fields)
     except HTTPException as e: raise e
     except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
 
@@ -103,4 +171,53 @@ async def admin_get_custom_order_details(order_id: int = Path(..., ge=1), id_use
     try:
         return get_custom_client_order_details_service(admin_user_id=id_user, order_id=order_id)
     except HTTPException as e: raise e
-    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
\ No newline at end of file
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
+
+# Admin archive completed orders
+@router.post("/archive", response_model=ArchiveRunResponse, summary="[Admin] Archive Completed Orders", tags=["admin"])
+async def admin_archive_completed_orders(id_user: int = Query(...), older_than_days: Optional[int] = Query(None, ge=0)):
+    try:
+        # One transaction per batch, possibly for minutes: keep it off the event loop
+        return await run_in_threadpool_with_session(archive_completed_orders_service, id_user, older_than_days)
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
+
+# Admin bulk status transition
+@router.post("/status/bulk", response_model=BulkStatusTransitionResponse, summary="[Admin] Bulk Order Status Transition", tags=["admin"])
+async def admin_bulk_transition_orders(request: BulkStatusTransitionRequest = Body(...), id_user: int = Query(...)):
+    try:
+        # Tens of thousands of IDs take a while: keep it off the event loop
+        return await run_in_threadpool_with_session(bulk_transition_orders_service, id_user, request)
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
+
+# Admin orders by product / supplier
+@router.get("/by-product/{product_id}", response_model=ProductOrdersPage, summary="[Admin] Client Orders Containing a Product", tags=["admin"])
+async def admin_get_orders_by_product(
+    product_id: int = Path(..., ge=1), id_user: int = Query(...),
+    cursor: Optional[int] = Query(None, description="next_cursor of the previous page"),
+    page_size: int = Query(50, ge=1, le=500, alias="limit"),
+    include_archived: bool = Query(False), with_totals: bool = Query(False, description="Also count all orders and units")
+):
+    try:
+        return list_orders_by_product_service(
+            admin_user_id=id_user, product_id=product_id, cursor=cursor, page_size=page_size,
+            include_archived=include_archived, with_totals=with_totals
+        )
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
+
+@router.get("/by-supplier/{supplier_id}", response_model=ProductOrdersPage, summary="[Admin] Client Orders Containing a Supplier's Products", tags=["admin"])
+async def admin_get_orders_by_supplier(
+    supplier_id: int = Path(..., ge=1), id_user: int = Query(...),
+    cursor: Optional[int] = Query(None, description="next_cursor of the previous page"),
+    page_size: int = Query(50, ge=1, le=500, alias="limit"),
+    include_archived: bool = Query(False), with_totals: bool = Query(False, description="Also count all orders and units")
+):
+    try:
+        return list_orders_by_supplier_service(
+            admin_user_id=id_user, supplier_id=supplier_id, cursor=cursor, page_size=page_size,
+            include_archived=include_archived, with_totals=with_totals
+        )
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from typing import Literal, Optional, List
 from datetime import datetime
 from .models import OrderStatus # Import the enum
 
@@ -8,7 +8,7 @@ class ProductPurchaseItem(BaseModel):
     amount: int = Field(..., gt=0, description="Quantity of the product")
 
 class ClientOrderPurchaseRequest(BaseModel):
-    products: List[ProductPurchaseItem] = Field(..., min_items=1, description="List of products and their amounts")
+    products: List[ProductPurchaseItem] = Field(..., min_length=1, description="List of products and their amounts")
 
 class CustomProductCreate(BaseModel):
     name: str = Field(..., min_length=3, description="Name of the custom product")
@@ -50,6 +50,10 @@ class SupplierOrderReadBase(BaseModel):
     class Config:
         from_attributes = True
 
+# Fields of the order listings, in response order (`fields=` picks a subset)
+CLIENT_ORDER_LIST_FIELDS = tuple(ClientOrderReadBase.model_fields)
+SUPPLIER_ORDER_LIST_FIELDS = tuple(SupplierOrderReadBase.model_fields)
+
 class SupplierOrderReadDetails(SupplierOrderReadBase):
     supplier_name: Optional[str] = None
     product_name: Optional[str] = None
@@ -58,9 +62,54 @@ class OrderCreateResponse(BaseModel):
     message: str = "Order created successfully"
     order_id: int
 
+class IntakeTicketStatus(BaseModel):
+    ticket_id: str
+    status: str = Field(..., description="queued | committed | failed")
+    status_url: str
+    order_id: Optional[int] = None
+    detail: Optional[str] = None
+
 class PaginatedResponse(BaseModel):
     page: int
     page_size: int
     total_items: int
     total_pages: int
-    items: List
\ No newline at end of file
+    items: List
+
+class ArchiveRunResponse(BaseModel):
+    cutoff: datetime
+    client_orders_archived: int
+    supplier_orders_archived: int
+
+class BulkStatusTransitionRequest(BaseModel):
+    kind: Literal["client", "supplier"] = Field(..., description="Which orders the IDs refer to")
+    to_status: str = Field(..., description="Status to move every order to")
+    order_ids: List[int] = Field(..., min_length=1, max_length=100000)
+
+class BulkStatusResult(BaseModel):
+    order_id: int
+    result: str = Field(..., description="updated | unchanged | not_found | invalid_transition | conflict")
+    previous_status: Optional[str] = None
+
+class BulkStatusTransitionResponse(BaseModel):
+    to_status: str
+    requested: int
+    updated: int
+    results: List[BulkStatusResult]
+
+class ProductOrderLine(BaseModel):
+    order_id: int
+    client_id: Optional[int] = None
+    status: Optional[str] = None
+    created_at: Optional[datetime] = None
+    units: int
+    revenue: float
+    archived: bool = False
+
+class ProductOrdersPage(BaseModel):
+    product_id: Optional[int] = None
+    supplier_id: Optional[int] = None
+    items: List[ProductOrderLine]
+    next_cursor: Optional[int] = Field(None, description="Pass as `cursor` for the next page")
+    total_orders: Optional[int] = None
+    total_units: Optional[int] = None
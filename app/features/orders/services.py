@@ -1,26 +1,31 @@
 from fastapi import HTTPException, status
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from collections import defaultdict
+from datetime import datetime, timedelta
 import math
 
 from . import repositories as repo
-from .models import ClientOrder, Product, OrderStatus, SupplierOrder, ClientOrderProduct
+from .models import (
+    ClientOrder, Product, OrderStatus, SupplierOrder, ClientOrderProduct,
+    CLIENT_ORDER_TRANSITIONS, SUPPLIER_ORDER_TRANSITIONS
+)
 from .schemas import (
     ClientOrderPurchaseRequest, ClientOrderCustomRequest, OrderCreateResponse,
     ClientOrderReadBase, ClientOrderReadDetails, ProductInOrder, PaginatedResponse,
-    SupplierOrderReadBase, SupplierOrderReadDetails, CustomProductCreate
+    SupplierOrderReadBase, SupplierOrderReadDetails, CustomProductCreate,
+    ArchiveRunResponse, BulkStatusTransitionRequest, BulkStatusResult, BulkStatusTransitionResponse,
+    ProductOrderLine, ProductOrdersPage, CLIENT_ORDER_LIST_FIELDS, SUPPLIER_ORDER_LIST_FIELDS
 )
 from app.features.auth.models import User
+from app.features.auth.services import check_is_admin
 from app.features.products.models import Product as ProductModel # Alias if needed
 from app.features.products.schemas import ProductCreate # For custom product
+from app.core.config import settings
+from app.core.projection import parse_fields, rows_to_dicts
 
-def _check_is_admin(user_id: int) -> User:
-    """Fetches user and checks if they have the 'admin' role"""
-    user = repo.get_user_with_roles(user_id)
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    if "admin" not in [role.title for role in user.roles]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
-    return user
+def _check_is_admin(user_id: int) -> None:
+    """Checks that the user has the 'admin' role"""
+    check_is_admin(user_id)
 
 # Client Order logic
 def create_purchase_order_service(
@@ -82,6 +87,59 @@ def create_purchase_order_service(
 
     return OrderCreateResponse(order_id=order_id)
 
+def create_purchase_orders_group_service(
+    requests: List[Tuple[int, ClientOrderPurchaseRequest]]
+) -> List[OrderCreateResponse | HTTPException]:
+    """Creates many purchase orders in one transaction (group commit).
+
+    Each request is validated against the stock left by the ones before it; results are
+    returned in request order, failures as the HTTPException that request would get.
+    """
+    product_ids = sorted({item.product_id for _, data in requests for item in data.products})
+    product_map = {p.id: p for p in repo.get_products_by_ids(product_ids)}
+    stock_left = {product_id: product.stock for product_id, product in product_map.items()}
+
+    results: List[OrderCreateResponse | HTTPException | None] = [None] * len(requests)
+    accepted: List[Tuple[int, ClientOrder, List[ClientOrderProduct]]] = []
+    stock_decrements: dict[int, int] = defaultdict(int)
+    for index, (user_id, order_data) in enumerate(requests):
+        amounts: dict[int, int] = defaultdict(int)
+        for item in order_data.products:
+            amounts[item.product_id] += item.amount
+        missing_ids = [product_id for product_id in amounts if product_id not in product_map]
+        if missing_ids:
+            results[index] = HTTPException(status_code=404, detail=f"Products not found: {missing_ids}")
+            continue
+        short = next((product_id for product_id, amount in amounts.items() if stock_left[product_id] < amount), None)
+        if short is not None:
+            results[index] = HTTPException(400, f"Insufficient stock for {product_map[short].name}")
+            continue
+
+        for product_id, amount in amounts.items():
+            stock_left[product_id] -= amount
+            stock_decrements[product_id] += amount
+        total_price = sum(product_map[product_id].price * amount for product_id, amount in amounts.items())
+        order = ClientOrder(client_id=user_id, total_price=round(total_price, 2), status=OrderStatus.CONFIRMED)
+        links = [
+            ClientOrderProduct(product_id=product_id, amount=amount, unit_price=product_map[product_id].price)
+            for product_id, amount in amounts.items()
+        ]
+        accepted.append((index, order, links))
+
+    if accepted:
+        committed = repo.create_client_orders_group(
+            [(order, links) for _, order, links in accepted], dict(stock_decrements)
+        )
+        for index, order, _ in accepted:
+            if committed:
+                results[index] = OrderCreateResponse(order_id=order.id)
+            elif len(requests) > 1:
+                # Stock moved underneath the group (another worker); retry each order alone
+                results[index] = create_purchase_orders_group_service([requests[index]])[0]
+            else:
+                results[index] = HTTPException(status_code=409, detail="Stock changed while ordering, please retry")
+    return results
+
 # Custom Clien Order logic
 def create_custom_order_service(
     user_id: int, custom_data: ClientOrderCustomRequest
@@ -146,27 +204,38 @@ def get_client_order_details_service(
         products=products_in_order
     )
 
+def _list_items(rows: List, schema: type, fields: Optional[Tuple[str, ...]]) -> List:
+    """List items from column rows: the read schema, or plain dicts of a sparse fieldset."""
+    if fields is None:
+        return [schema.model_validate(row) for row in rows]
+    return rows_to_dicts(rows, fields)
+
 def list_client_orders_service(
-    user_id: int, page: int = 1, page_size: int = 10, state: Optional[OrderStatus] = None
+    user_id: int, page: int = 1, page_size: int = 10, state: Optional[OrderStatus] = None,
+    include_archived: bool = False, fields: Optional[str] = None
 ) -> PaginatedResponse:
     """Lists client's orders"""
+    selected = parse_fields(fields, CLIENT_ORDER_LIST_FIELDS)
     orders, total_items = repo.get_client_orders_paginated(
-        client_id=user_id, status=state, page=page, page_size=page_size
+        client_id=user_id, status=state, page=page, page_size=page_size,
+        include_archived=include_archived, fields=selected
     )
     total_pages = math.ceil(total_items / page_size) if page_size > 0 else 0
-    items = [ClientOrderReadBase.model_validate(order) for order in orders]
+    items = _list_items(orders, ClientOrderReadBase, selected)
     return PaginatedResponse(page=page, page_size=page_size, total_items=total_items, total_pages=total_pages, items=items)
 
 def list_all_client_orders_service(
-    admin_user_id: int, page: int = 1, page_size: int = 10
+    admin_user_id: int, page: int = 1, page_size: int = 10, include_archived: bool = False,
+    fields: Optional[str] = None
 ) -> PaginatedResponse:
     """(Admin) Lists all client orders"""
     _check_is_admin(admin_user_id) 
+    selected = parse_fields(fields, CLIENT_ORDER_LIST_FIELDS)
     orders, total_items = repo.get_client_orders_paginated(
-        client_id=None, page=page, page_size=page_size
+        client_id=None, page=page, page_size=page_size, include_archived=include_archived, fields=selected
     )
     total_pages = math.ceil(total_items / page_size) if page_size > 0 else 0
-    items = [ClientOrderReadBase.model_validate(order) for order in orders]
+    items = _list_items(orders, ClientOrderReadBase, selected)
     return PaginatedResponse(page=page, page_size=page_size, total_items=total_items, total_pages=total_pages, items=items)
 
 def get_any_client_order_details_service(
@@ -178,13 +247,17 @@ def get_any_client_order_details_service(
 
 
 def list_all_supplier_orders_service(
-    admin_user_id: int, page: int = 1, page_size: int = 10
+    admin_user_id: int, page: int = 1, page_size: int = 10, include_archived: bool = False,
+    fields: Optional[str] = None
 ) -> PaginatedResponse:
     """(Admin) Lists all supplier orders"""
     _check_is_admin(admin_user_id)
-    orders, total_items = repo.get_supplier_orders_paginated(page=page, page_size=page_size)
+    selected = parse_fields(fields, SUPPLIER_ORDER_LIST_FIELDS)
+    orders, total_items = repo.get_supplier_orders_paginated(
+        page=page, page_size=page_size, include_archived=include_archived, fields=selected
+    )
     total_pages = math.ceil(total_items / page_size) if page_size > 0 else 0
-    items = [SupplierOrderReadBase.model_validate(order) for order in orders]
+    items = _list_items(orders, SupplierOrderReadBase, selected)
     return PaginatedResponse(page=page, page_size=page_size, total_items=total_items, total_pages=total_pages, items=items)
 
 
@@ -204,15 +277,16 @@ def get_supplier_order_details_service(
     )
 
 def list_custom_client_orders_service(
-    admin_user_id: int, page: int = 1, page_size: int = 10
+    admin_user_id: int, page: int = 1, page_size: int = 10, fields: Optional[str] = None
 ) -> PaginatedResponse:
     """(Admin) Lists custom client orders"""
     _check_is_admin(admin_user_id)
+    selected = parse_fields(fields, CLIENT_ORDER_LIST_FIELDS)
     orders, total_items = repo.get_client_orders_paginated(
-        client_id=None, is_custom_price=True, page=page, page_size=page_size
+        client_id=None, is_custom_price=True, page=page, page_size=page_size, fields=selected
     )
     total_pages = math.ceil(total_items / page_size) if page_size > 0 else 0
-    items = [ClientOrderReadBase.model_validate(order) for order in orders]
+    items = _list_items(orders, ClientOrderReadBase, selected)
     return PaginatedResponse(page=page, page_size=page_size, total_items=total_items, total_pages=total_pages, items=items)
 
 def get_custom_client_order_details_service(
@@ -223,4 +297,151 @@ def get_custom_client_order_details_service(
     order_details = get_client_order_details_service(user_id=admin_user_id, order_id=order_id, is_admin=True)
     is_custom = any(p.unit_price == 0 for p in order_details.products)
     if not is_custom: raise HTTPException(status_code=404, detail="Order is not custom")
-    return order_details
\ No newline at end of file
+    return order_details
+
+
+# Archival logic
+def archive_completed_orders(older_than_days: Optional[int] = None) -> Tuple[int, int, datetime]:
+    """Moves delivered/canceled orders older than the cutoff to the archive, batch by batch.
+
+    Needs a bound `db_session` (request or `session_scope()`), so it can run from a job.
+    """
+    days = older_than_days if older_than_days is not None else settings.ARCHIVE_AFTER_DAYS
+    batch_size = settings.ARCHIVE_BATCH_SIZE
+    cutoff = datetime.utcnow() - timedelta(days=days)
+
+    client_orders_archived = 0
+    while True:
+        moved = repo.archive_client_orders_batch(cutoff, batch_size)
+        client_orders_archived += moved
+        if moved < batch_size:
+            break
+
+    supplier_orders_archived = 0
+    while True:
+        moved = repo.archive_supplier_orders_batch(cutoff, batch_size)
+        supplier_orders_archived += moved
+        if moved < batch_size:
+            break
+
+    return client_orders_archived, supplier_orders_archived, cutoff
+
+def archive_completed_orders_service(
+    admin_user_id: int, older_than_days: Optional[int] = None
+) -> ArchiveRunResponse:
+    """(Admin) Runs the orders archival job"""
+    _check_is_admin(admin_user_id)
+    client_orders, supplier_orders, cutoff = archive_completed_orders(older_than_days)
+    return ArchiveRunResponse(
+        cutoff=cutoff,
+        client_orders_archived=client_orders,
+        supplier_orders_archived=supplier_orders
+    )
+
+# Orders by product / supplier (Admin)
+def _product_orders_page(
+    product_ids: List[int], cursor: Optional[int], page_size: int, include_archived: bool, with_totals: bool
+) -> ProductOrdersPage:
+    lines = repo.get_order_lines_for_products(product_ids, cursor, page_size + 1, include_archived) if product_ids else []
+    has_more = len(lines) > page_size
+    lines = lines[:page_size]
+    headers = repo.get_client_order_headers([line[0] for line in lines], include_archived) if lines else {}
+    items = []
+    for order_id, units, revenue, archived in lines:
+        client_id, status, created_at = headers.get(order_id, (None, None, None))
+        items.append(ProductOrderLine(
+            order_id=order_id, client_id=client_id, status=status, created_at=created_at,
+            units=units, revenue=revenue, archived=archived,
+        ))
+    page = ProductOrdersPage(items=items, next_cursor=lines[-1][0] if has_more else None)
+    if with_totals:
+        page.total_orders, page.total_units = (
+            repo.get_product_order_totals(product_ids, include_archived) if product_ids else (0, 0)
+        )
+    return page
+
+def list_orders_by_product_service(
+    admin_user_id: int, product_id: int, cursor: Optional[int] = None, page_size: int = 50,
+    include_archived: bool = False, with_totals: bool = False
+) -> ProductOrdersPage:
+    """(Admin) Client orders containing a product, newest first, keyset paged."""
+    _check_is_admin(admin_user_id)
+    if repo.get_product(product_id) is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    page = _product_orders_page([product_id], cursor, page_size, include_archived, with_totals)
+    page.product_id = product_id
+    return page
+
+def list_orders_by_supplier_service(
+    admin_user_id: int, supplier_id: int, cursor: Optional[int] = None, page_size: int = 50,
+    include_archived: bool = False, with_totals: bool = False
+) -> ProductOrdersPage:
+    """(Admin) Client orders containing any of a supplier's products, newest first, keyset paged."""
+    _check_is_admin(admin_user_id)
+    product_ids = repo.get_product_ids_for_supplier(supplier_id)
+    page = _product_orders_page(product_ids, cursor, page_size, include_archived, with_totals)
+    page.supplier_id = supplier_id
+    return page
+
+# Status streams
+def authorize_order_stream(user_id: int, firehose: bool = False) -> None:
+    """Checks who may open a status stream: any existing user for their own orders,
+    admins for the firehose."""
+    if firehose:
+        _check_is_admin(user_id)
+    elif repo.get_user_with_roles(user_id) is None:
+        raise HTTPException(status_code=401, detail="User not found")
+
+# Bulk status transitions (Admin)
+def bulk_transition_orders_service(
+    admin_user_id: int, request: BulkStatusTransitionRequest
+) -> BulkStatusTransitionResponse:
+    """(Admin) Moves many orders to one status, set-based and in chunks.
+
+    Each chunk reads the current statuses, then runs one guarded UPDATE per current status
+    that allows the transition and commits. Results are per ID, in request order.
+    """
+    _check_is_admin(admin_user_id)
+    model, transitions = (
+        (ClientOrder, CLIENT_ORDER_TRANSITIONS) if request.kind == "client"
+        else (SupplierOrder, SUPPLIER_ORDER_TRANSITIONS)
+    )
+    known_statuses = set(transitions) | {status for targets in transitions.values() for status in targets}
+    if request.to_status not in known_statuses:
+        raise HTTPException(status_code=400, detail=f"Unknown {request.kind} order status: {request.to_status}")
+
+    order_ids = list(dict.fromkeys(request.order_ids))
+    results: dict[int, BulkStatusResult] = {}
+    chunk_size = settings.ORDER_BULK_CHUNK_SIZE
+    for start in range(0, len(order_ids), chunk_size):
+        chunk = order_ids[start:start + chunk_size]
+        current = repo.get_order_statuses(model, chunk)
+        ids_by_status: dict[str, List[int]] = defaultdict(list)
+        for order_id in chunk:
+            status, _ = current.get(order_id, (None, None))
+            if status is None:
+                results[order_id] = BulkStatusResult(order_id=order_id, result="not_found")
+            elif status == request.to_status:
+                results[order_id] = BulkStatusResult(order_id=order_id, result="unchanged", previous_status=status)
+            elif request.to_status not in transitions.get(status, ()):
+                results[order_id] = BulkStatusResult(order_id=order_id, result="invalid_transition", previous_status=status)
+            else:
+                ids_by_status[status].append(order_id)
+        if not ids_by_status:
+            continue
+        updated = repo.transition_orders_status(
+            model, request.kind, dict(ids_by_status), request.to_status,
+            {order_id: client_id for order_id, (_, client_id) in current.items()}
+        )
+        for status, ids in ids_by_status.items():
+            for order_id in ids:
+                # Not updated: its status changed between the read and the UPDATE
+                results[order_id] = BulkStatusResult(
+                    order_id=order_id, result="updated" if order_id in updated else "conflict", previous_status=status
+                )
+
+    ordered = [results[order_id] for order_id in order_ids]
+    return BulkStatusTransitionResponse(
+        to_status=request.to_status, requested=len(order_ids),
+        updated=sum(1 for result in ordered if result.result == "updated"), results=ordered,
+    )
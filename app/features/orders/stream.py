@@ -0,0 +1,202 @@
+import asyncio
+import json
+import threading
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+
+from app.core.config import settings
+from app.core.events import Event, OrderStatusChanged
+from app.core.invalidation import invalidation_bus
+
+# Tells the client its stream cannot be resumed: refetch the orders, then keep listening
+_RESET = b"event: reset\ndata: {}\n\n"
+# Invalidation bus channel carrying the status changes committed by the other workers
+_CHANNEL = "order-status"
+
+@dataclass
+class StreamEvent:
+    id: str
+    sequence: int
+    data: dict
+    client_id: Optional[int]
+
+    def encode(self) -> bytes:
+        return f"id: {self.id}\nevent: order-status\ndata: {json.dumps(self.data)}\n\n".encode()
+
+
+@dataclass(eq=False)
+class Subscriber:
+    """One connected stream: a user's own orders (client_id) or the admin firehose (None)."""
+    client_id: Optional[int]
+    kind: Optional[str] = None
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(settings.ORDER_STREAM_CLIENT_QUEUE))
+    overflowed: bool = False
+    last_sequence: int = 0
+
+    def wants(self, event: StreamEvent) -> bool:
+        return (
+            (self.client_id is None or event.client_id == self.client_id)
+            and (self.kind is None or event.data["kind"] == self.kind)
+        )
+
+
+class OrderStatusStream:
+    """Fans committed order status changes out to the SSE connections of this worker.
+
+    Events arrive in batches from the event bus thread and are handed to the event loop
+    with one call per batch; subscribers are indexed by client, so an event costs one queue
+    put per interested connection. Changes committed by the other workers come over the
+    invalidation bus (so streams miss nothing whichever worker they land on), unless
+    INVALIDATION_BACKEND is none, which only suits a single worker.
+
+    The last ORDER_STREAM_BUFFER events are kept so a reconnecting client can resume from
+    its Last-Event-ID. Sequences are per worker and event IDs carry this worker's epoch: an
+    ID from another worker (or from before a restart) gets a "reset" event and the client
+    should refetch its orders.
+    """
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._sequence = 0
+        self._buffer: deque[StreamEvent] = deque(maxlen=settings.ORDER_STREAM_BUFFER)
+        self._by_client: dict[int, set[Subscriber]] = {}
+        self._firehose: set[Subscriber] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.published = 0
+        self.received = 0
+        self.delivered = 0
+        self.overflows = 0
+
+    # --- event bus side (consumer thread) ---
+    def publish_batch(self, events: list[Event]) -> None:
+        changes = [
+            {
+                "order_id": event.order_id, "kind": event.kind,
+                "old_status": event.old_status, "new_status": event.new_status,
+                "occurred_at": event.occurred_at.isoformat(), "client_id": event.client_id,
+            }
+            for event in events if isinstance(event, OrderStatusChanged)
+        ]
+        invalidation_bus.broadcast(_CHANNEL, changes)
+        self._publish(changes)
+        self.published += len(changes)
+
+    # --- invalidation bus side (receive thread) ---
+    def publish_remote(self, changes: list[dict]) -> None:
+        self._publish(changes)
+        self.received += len(changes)
+
+    def _publish(self, changes: list[dict]) -> None:
+        stream_events = []
+        with self._lock:
+            for change in changes:
+                self._sequence += 1
+                data = dict(change)
+                stream_event = StreamEvent(
+                    id=f"{self.epoch}-{self._sequence}", sequence=self._sequence,
+                    client_id=data.pop("client_id"), data=data,
+                )
+                self._buffer.append(stream_event)
+                stream_events.append(stream_event)
+        loop = self._loop
+        if stream_events and loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._dispatch, stream_events)
+
+    # --- event loop side ---
+    def _dispatch(self, stream_events: list[StreamEvent]) -> None:
+        for stream_event in stream_events:
+            targets = list(self._firehose)
+            if stream_event.client_id is not None:
+                targets.extend(self._by_client.get(stream_event.client_id, ()))
+            for subscriber in targets:
+                if subscriber.overflowed or not subscriber.wants(stream_event):
+                    continue
+                try:
+                    subscriber.queue.put_nowait(stream_event)
+                    self.delivered += 1
+                except asyncio.QueueFull:
+                    # Too slow to keep up; it is told to reset and reconnect
+                    subscriber.overflowed = True
+                    self.overflows += 1
+
+    def _replay(self, last_event_id: Optional[str], subscriber: Subscriber) -> Optional[list[StreamEvent]]:
+        """Buffered events after `last_event_id`, or None when it cannot be resumed."""
+        with self._lock:
+            buffered = list(self._buffer)
+            latest = self._sequence
+        subscriber.last_sequence = latest
+        if not last_event_id:
+            return []
+        epoch, _, sequence = last_event_id.partition("-")
+        if epoch != self.epoch or not sequence.isdigit() or int(sequence) > latest:
+            return None
+        resume_after = int(sequence)
+        oldest = buffered[0].sequence if buffered else latest + 1
+        if resume_after < oldest - 1:
+            return None  # fell out of the buffer
+        return [event for event in buffered if event.sequence > resume_after and subscriber.wants(event)]
+
+    def _subscribe(self, subscriber: Subscriber) -> None:
+        self._loop = asyncio.get_running_loop()
+        if subscriber.client_id is None:
+            self._firehose.add(subscriber)
+        else:
+            self._by_client.setdefault(subscriber.client_id, set()).add(subscriber)
+
+    def _unsubscribe(self, subscriber: Subscriber) -> None:
+        if subscriber.client_id is None:
+            self._firehose.discard(subscriber)
+            return
+        subscribers = self._by_client.get(subscriber.client_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._by_client[subscriber.client_id]
+
+    async def events(
+        self, client_id: Optional[int], last_event_id: Optional[str] = None, kind: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        """The SSE byte stream of one connection (client_id None for the firehose)."""
+        subscriber = Subscriber(client_id=client_id, kind=kind)
+        # Subscribed and replayed with no await in between; events that were already
+        # buffered but not dispatched yet are skipped by sequence
+        self._subscribe(subscriber)
+        replay = self._replay(last_event_id, subscriber)
+        try:
+            yield f"retry: {settings.ORDER_STREAM_RETRY_MS}\n\n".encode()
+            if replay is None:
+                yield _RESET
+            else:
+                for stream_event in replay:
+                    yield stream_event.encode()
+            keepalive = settings.ORDER_STREAM_KEEPALIVE_SECONDS
+            while not subscriber.overflowed:
+                try:
+                    stream_event = await asyncio.wait_for(subscriber.queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                if stream_event.sequence > subscriber.last_sequence:
+                    yield stream_event.encode()
+            yield _RESET
+        finally:
+            self._unsubscribe(subscriber)
+
+    def stats(self) -> dict[str, int | str]:
+        return {
+            "epoch": self.epoch,
+            "connections": len(self._firehose) + sum(len(subscribers) for subscribers in self._by_client.values()),
+            "firehose_connections": len(self._firehose),
+            "published": self.published,
+            "received": self.received,
+            "delivered": self.delivered,
+            "overflows": self.overflows,
+            "buffered": len(self._buffer),
+        }
+
+
+order_status_stream = OrderStatusStream()
+invalidation_bus.subscribe(_CHANNEL, order_status_stream.publish_remote)
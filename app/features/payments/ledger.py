@@ -0,0 +1,24 @@
+from fastapi import HTTPException
+
+from app.core.batching import BatchWriter
+from app.core.config import settings
+from app.core.database import session_scope
+
+from .schemas import PaymentReceipt
+from .services import PaymentInstruction, record_payments_batch_service
+
+
+def _write_batch(instructions: list[PaymentInstruction]) -> list[PaymentReceipt | HTTPException]:
+    with session_scope():
+        return record_payments_batch_service(instructions)
+
+
+# Every capture and refund of this worker goes through one writer: a ledger batch is a
+# single insert plus one update per touched balance, in one transaction
+ledger_writer: BatchWriter[PaymentInstruction] = BatchWriter(
+    "Payment ledger", _write_batch,
+    settings.PAYMENT_LEDGER_MAX_BATCH, settings.PAYMENT_LEDGER_MAX_WAIT_MS, settings.PAYMENT_LEDGER_QUEUE_SIZE,
+)
+
+def stop_ledger_writer() -> None:
+    ledger_writer.stop()
@@ -1,22 +1,73 @@
-from typing import Optional, List, TYPE_CHECKING
-from sqlmodel import Field, SQLModel, Relationship
-from app.features.products.models import Product
+from typing import Optional
+from sqlmodel import Field, SQLModel
+from sqlalchemy import Column, Integer, String, event
+from datetime import datetime
+import enum
 
-if TYPE_CHECKING:
-    from app.features.products.models import Product
 
-class Supplier(SQLModel, table=True):
-    __tablename__ = "suppliers" #type: ignore
+class PaymentKind(str, enum.Enum):
+    CAPTURE = "capture"
+    REFUND = "refund"
+
+class PaymentStatus(str, enum.Enum):
+    UNPAID = "unpaid"
+    PARTIAL = "partial"
+    PAID = "paid"
+    REFUNDED = "refunded"
+
+# order_id is deliberately not a foreign key: the ledger outlives archived orders
+
+class PaymentLedgerEntry(SQLModel, table=True):
+    """Append-only: rows are inserted in batches and never updated or deleted."""
+    __tablename__ = "payment_ledger" # type: ignore
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    name: str = Field(unique=True, index=True, nullable=False)
-    email: str = Field(unique=True, index=True, nullable=False)
-    phone: str = Field(unique=True, index=True, nullable=False)
-    address: str = Field(nullable=False)
-    city: str = Field(nullable=False)
-    state: str = Field(nullable=False)
-    country: str = Field(nullable=False)
-    postal_code: str = Field(nullable=False)
-    is_active: bool = Field(default=True)
-
-    products: List["Product"] = Relationship(back_populates="supplier")
+    order_id: int = Field(index=True, nullable=False)
+    client_id: int = Field(foreign_key="users.id", index=True, nullable=False)
+    kind: PaymentKind = Field(sa_column=Column(String(20), nullable=False))
+    amount: float = Field(nullable=False)
+    # Running balances right after this entry
+    order_paid_after: float = Field(nullable=False)
+    client_paid_after: float = Field(nullable=False)
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+# Optimistic locking: the mapper needs the version Column itself, so it is built up front
+_order_balance_version = Column("version", Integer, nullable=False)
+_client_balance_version = Column("version", Integer, nullable=False)
+
+class OrderBalance(SQLModel, table=True):
+    """Precomputed per-order balance, maintained with every ledger batch."""
+    __tablename__ = "order_balances" # type: ignore
+
+    order_id: int = Field(primary_key=True)
+    client_id: int = Field(foreign_key="users.id", index=True, nullable=False)
+    amount_due: float = Field(nullable=False)
+    amount_paid: float = Field(default=0.0, nullable=False)
+    payment_status: PaymentStatus = Field(
+        default=PaymentStatus.UNPAID,
+        sa_column=Column(String(20), nullable=False)
+    )
+    version: int = Field(default=1, sa_column=_order_balance_version)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+    # A concurrent writer (another worker) fails the flush instead of losing an update
+    __mapper_args__ = {"version_id_col": _order_balance_version}
+
+class ClientBalance(SQLModel, table=True):
+    """Precomputed per-client totals, maintained with every ledger batch."""
+    __tablename__ = "client_balances" # type: ignore
+
+    client_id: int = Field(foreign_key="users.id", primary_key=True)
+    total_captured: float = Field(default=0.0, nullable=False)
+    total_refunded: float = Field(default=0.0, nullable=False)
+    net_paid: float = Field(default=0.0, nullable=False)
+    version: int = Field(default=1, sa_column=_client_balance_version)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+    __mapper_args__ = {"version_id_col": _client_balance_version}
+
+
+@event.listens_for(PaymentLedgerEntry, "before_update")
+@event.listens_for(PaymentLedgerEntry, "before_delete")
+def _reject_ledger_changes(mapper, connection, target) -> None:
+    raise ValueError("The payment ledger is append-only")
@@ -1,25 +1,88 @@
-from sqlmodel import select
+from datetime import datetime
+
+from sqlmodel import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from app.core.database import SessionDep, db_session
-from app.features.suppliers.models import Supplier
+from app.core.events import OrderStatusChanged, publish_after_commit
+from app.features.orders.models import ClientOrder
+from app.features.payments.models import ClientBalance, OrderBalance, PaymentLedgerEntry
+
+def get_client_orders(order_ids: list[int]) -> list[ClientOrder]:
+    """Get the (non archived) client orders with the given IDs."""
+    session: SessionDep = db_session.get()
+    statement = select(ClientOrder).where(ClientOrder.id.in_(order_ids)) # type: ignore
+    return list(session.exec(statement).all())
+
+def get_order_balance(order_id: int) -> OrderBalance | None:
+    """Get the balance of an order (one row, no ledger scan)."""
+    session: SessionDep = db_session.get()
+    return session.get(OrderBalance, order_id)
 
-def create_supplier(supplier: Supplier) -> None:
-    """Create a supplier."""
+def get_order_balances(order_ids: list[int]) -> list[OrderBalance]:
     session: SessionDep = db_session.get()
-    session.add(supplier)
-    session.commit()
+    statement = select(OrderBalance).where(OrderBalance.order_id.in_(order_ids)) # type: ignore
+    return list(session.exec(statement).all())
 
-def get_supplier(supplier_id: int) -> Supplier | None:
-    """Get a supplier by ID."""
+def get_client_balance(client_id: int) -> ClientBalance | None:
+    """Get the totals of a client (one row, no ledger scan)."""
     session: SessionDep = db_session.get()
-    statement = select(Supplier).where(Supplier.id == supplier_id)
-    result = session.exec(statement).first()
-    return result
+    return session.get(ClientBalance, client_id)
+
+def get_client_balances(client_ids: list[int]) -> list[ClientBalance]:
+    session: SessionDep = db_session.get()
+    statement = select(ClientBalance).where(ClientBalance.client_id.in_(client_ids)) # type: ignore
+    return list(session.exec(statement).all())
+
+def get_ledger_entries(order_id: int) -> list[PaymentLedgerEntry]:
+    """Get the ledger entries of an order, oldest first."""
+    session: SessionDep = db_session.get()
+    statement = (
+        select(PaymentLedgerEntry)
+        .where(PaymentLedgerEntry.order_id == order_id)
+        .order_by(PaymentLedgerEntry.id) # type: ignore
+    )
+    return list(session.exec(statement).all())
+
+def write_ledger_batch(
+    entries: list[PaymentLedgerEntry],
+    order_balances: list[OrderBalance],
+    client_balances: list[ClientBalance],
+    status_changes: list[tuple[ClientOrder, str]],
+) -> list[int] | None:
+    """Append a batch of ledger entries together with the balances and order statuses
+    they change, in one transaction. Commits once.
 
-def get_suppliers(page: int, page_size: int, name: str | None = None) -> list[Supplier]:
-    """Get suppliers by page and optionally filter by name."""
+    Balances are version-checked and order statuses moved with `UPDATE ... WHERE status = ?`
+    (the status the batch read); if another worker changed one of them (or created a
+    balance) meanwhile the batch is rolled back and None is returned. Returns the entry IDs.
+    """
     session: SessionDep = db_session.get()
-    statement = select(Supplier).offset((page - 1) * page_size).limit(page_size)
-    if name:
-        statement = statement.where(Supplier.name.contains(name)) # type: ignore
-    result = session.exec(statement).all()
-    return list(result)
\ No newline at end of file
+    now = datetime.utcnow()
+    try:
+        for order, new_status in status_changes:
+            result = session.execute(
+                update(ClientOrder)
+                .where(ClientOrder.id == order.id, ClientOrder.status == order.status) # type: ignore
+                .values(status=new_status, updated_at=now)
+            )
+            if result.rowcount != 1:
+                session.rollback()
+                return None
+            publish_after_commit(OrderStatusChanged(
+                order_id=order.id, kind="client", old_status=order.status, new_status=new_status,
+                client_id=order.client_id
+            ))
+        session.add_all(order_balances)
+        session.add_all(client_balances)
+        session.add_all(entries)
+        session.flush()
+        entry_ids = [entry.id for entry in entries]
+        session.commit()
+    except (StaleDataError, IntegrityError):
+        session.rollback()
+        return None
+    except Exception:
+        session.rollback()
+        raise
+    return entry_ids
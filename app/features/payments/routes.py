@@ -1,62 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, status
+from typing import List, Optional
 
 from app.core.database import get_session
-from app.features.suppliers.models import *
-from app.features.suppliers.schemas import *
-from app.features.suppliers.services import *
+from app.features.auth.services import check_is_admin
+from .ledger import ledger_writer
+from .models import PaymentKind
+from .schemas import (
+    PaymentCaptureRequest, PaymentRefundRequest, PaymentReceipt,
+    OrderBalanceRead, ClientBalanceRead, LedgerEntryRead
+)
+from .services import (
+    PaymentInstruction, get_order_balance_service, get_client_balance_service, get_order_ledger_service
+)
 
-router = APIRouter(prefix="/suppliers", tags=["suppliers"], dependencies=[Depends(get_session)])
+router = APIRouter(prefix="/payments", tags=["payments"], dependencies=[Depends(get_session, scope="function")])
 
-@router.get("/{supplier_id}", response_model=Supplier)
-async def get_supplier(supplier_id: int) -> Supplier | None:
-    """Get a supplier by ID."""
+# Capture
+@router.post("/capture", response_model=PaymentReceipt, status_code=201, summary="Pay (part of) an Order")
+async def capture_payment(payment: PaymentCaptureRequest = Body(...), id_user: int = Query(...)):
     try:
-        supplier: Supplier | None = get_supplier_service(supplier_id)
-        return supplier
-    except HTTPException as error:
-        raise HTTPException(
-            status_code=error.status_code,
-            detail=error.detail,
-        ) from error
-    except Exception as error:
-        print(error)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal server error",
-        ) from error
-    
-@router.post("/", response_model=Supplier)
-async def create_supplier(supplier: SupplierCreate) -> Supplier:
-    """Create a new supplier."""
+        return await ledger_writer.submit_and_wait(PaymentInstruction(
+            user_id=id_user, order_id=payment.order_id, kind=PaymentKind.CAPTURE, amount=payment.amount
+        ))
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
+
+# Refund (admin)
+@router.post("/refund", response_model=PaymentReceipt, status_code=201, summary="Admin: Refund an Order")
+async def refund_payment(refund: PaymentRefundRequest = Body(...), id_user: int = Query(...)):
+    try:
+        check_is_admin(id_user)
+        return await ledger_writer.submit_and_wait(PaymentInstruction(
+            user_id=id_user, order_id=refund.order_id, kind=PaymentKind.REFUND, amount=refund.amount, is_admin=True
+        ))
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
+
+# Client balance
+@router.get("/balance", response_model=ClientBalanceRead, summary="Get a Client's Payment Totals")
+async def get_client_balance(
+    id_user: int = Query(...),
+    client_id: Optional[int] = Query(None, description="Admin: another client's totals")
+):
     try:
-        new_supplier: Supplier = create_supplier_service(supplier)
-        return new_supplier
-    except HTTPException as error:
-        raise HTTPException(
-            status_code=error.status_code,
-            detail=error.detail,
-        ) from error
-    except Exception as error:
-        print(error)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Supplier creation failed",
-        ) from error
-    
-@router.get("/", response_model=list[Supplier])
-async def get_suppliers(page: int = 1, name: str | None = None) -> list[Supplier]:
-    """Get suppliers by page and optionally filter by name."""
+        return get_client_balance_service(user_id=id_user, client_id=client_id)
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
+
+# Order balance
+@router.get("/orders/{order_id}", response_model=OrderBalanceRead, summary="Get an Order's Balance")
+async def get_order_balance(order_id: int = Path(..., ge=1), id_user: int = Query(...)):
+    try:
+        return get_order_balance_service(user_id=id_user, order_id=order_id)
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
+
+# Order ledger
+@router.get("/orders/{order_id}/ledger", response_model=List[LedgerEntryRead], summary="Get an Order's Ledger Entries")
+async def get_order_ledger(order_id: int = Path(..., ge=1), id_user: int = Query(...)):
     try:
-        suppliers: list[Supplier] = get_suppliers_service(page, 10, name)
-        return suppliers
-    except HTTPException as error:
-        raise HTTPException(
-            status_code=error.status_code,
-            detail=error.detail,
-        ) from error
-    except Exception as error:
-        print(error)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal server error",
-        ) from error
\ No newline at end of file
+        return get_order_ledger_service(user_id=id_user, order_id=order_id)
+    except HTTPException as e: raise e
+    except Exception as e: print(f"Error: {e}"); raise HTTPException(500, "Internal server error")
@@ -1,13 +1,59 @@
-from pydantic import BaseModel, EmailStr, Field
-
-class SupplierCreate(BaseModel):
-    name: str = Field(..., min_length=1, max_length=100)
-    email: EmailStr
-    phone: str = Field(..., min_length=1, max_length=15)
-    address: str = Field(..., min_length=1, max_length=255)
-    city: str = Field(..., min_length=1, max_length=100)
-    state: str = Field(..., min_length=1, max_length=100)
-    country: str = Field(..., min_length=1, max_length=100)
-    postal_code: str = Field(..., min_length=1, max_length=20)
-    is_active: bool = Field(default=True)
-    
\ No newline at end of file
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from app.features.orders.models import OrderStatus
+from app.features.payments.models import PaymentKind, PaymentStatus
+
+class PaymentCaptureRequest(BaseModel):
+    order_id: int = Field(..., ge=1)
+    amount: Optional[float] = Field(None, gt=0, description="Defaults to the amount still due")
+
+class PaymentRefundRequest(BaseModel):
+    order_id: int = Field(..., ge=1)
+    amount: Optional[float] = Field(None, gt=0, description="Defaults to everything paid so far")
+
+class PaymentReceipt(BaseModel):
+    entry_id: int
+    order_id: int
+    kind: PaymentKind
+    amount: float
+    amount_due: float
+    amount_paid: float
+    payment_status: PaymentStatus
+    order_status: OrderStatus
+
+class OrderBalanceRead(BaseModel):
+    order_id: int
+    client_id: int
+    amount_due: float
+    amount_paid: float
+    payment_status: PaymentStatus
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class ClientBalanceRead(BaseModel):
+    client_id: int
+    total_captured: float = 0.0
+    total_refunded: float = 0.0
+    net_paid: float = 0.0
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class LedgerEntryRead(BaseModel):
+    id: int
+    order_id: int
+    client_id: int
+    kind: PaymentKind
+    amount: float
+    order_paid_after: float
+    client_paid_after: float
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
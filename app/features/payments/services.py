@@ -1,40 +1,173 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
 from fastapi import HTTPException, status
-from app.features.suppliers.models import Supplier
-from app.features.suppliers.repositories import (
-    create_supplier as repository_create_supplier,
-    get_supplier as repository_get_supplier,
-    get_suppliers as repository_get_suppliers,
-)
-
-from app.features.suppliers.schemas import SupplierCreate
-
-def get_supplier_service(supplier_id: int) -> Supplier | None:
-    """Get a supplier by ID."""
-    supplier: Supplier | None = repository_get_supplier(supplier_id)
-    if not supplier:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Supplier not found",
-        )
-    return supplier
-
-def create_supplier_service(supplier_schema: SupplierCreate) -> Supplier:
-    """Create a new supplier."""
-    supplier: Supplier = Supplier(**supplier_schema.model_dump())
-    repository_create_supplier(supplier)
-    if not supplier.id:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Supplier creation failed",
-        )
-    return supplier
-
-def get_suppliers_service(page: int, page_size: int, name: str | None = None) -> list[Supplier]:
-    """Get suppliers by page and optionally filter by name."""
-    suppliers: list[Supplier] = repository_get_suppliers(page, page_size, name)
-    if not suppliers:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="No suppliers found",
+from app.features.auth.services import check_is_admin
+from app.features.orders.models import ClientOrder, OrderStatus
+from app.features.payments import repositories as repo
+from app.features.payments.models import ClientBalance, OrderBalance, PaymentKind, PaymentLedgerEntry, PaymentStatus
+from app.features.payments.schemas import ClientBalanceRead, LedgerEntryRead, OrderBalanceRead, PaymentReceipt
+
+# Amounts are rounded to cents; anything smaller is float noise
+_EPSILON = 0.005
+
+# Order status after a full capture / full refund. Only orders awaiting payment move on a
+# capture: purchases are confirmed when placed, and custom orders have nothing due until priced
+_PAID_TRANSITIONS = {OrderStatus.PENDING: OrderStatus.CONFIRMED}
+_REFUNDED_TRANSITIONS = {OrderStatus.PENDING: OrderStatus.CANCELED, OrderStatus.CONFIRMED: OrderStatus.CANCELED}
+
+
+@dataclass
+class PaymentInstruction:
+    """One capture or refund waiting for the ledger writer."""
+    user_id: int
+    order_id: int
+    kind: PaymentKind
+    amount: Optional[float] = None
+    is_admin: bool = False
+
+
+def _payment_status(balance: OrderBalance, kind: PaymentKind) -> PaymentStatus:
+    if balance.amount_paid >= balance.amount_due - _EPSILON and balance.amount_paid > 0:
+        return PaymentStatus.PAID
+    if balance.amount_paid > _EPSILON:
+        return PaymentStatus.PARTIAL
+    return PaymentStatus.REFUNDED if kind == PaymentKind.REFUND else PaymentStatus.UNPAID
+
+def _new_order_balance(order: ClientOrder) -> OrderBalance:
+    return OrderBalance(order_id=order.id, client_id=order.client_id, amount_due=order.total_price)
+
+def record_payments_batch_service(instructions: list[PaymentInstruction]) -> list[PaymentReceipt | HTTPException]:
+    """Apply a batch of captures and refunds: one ledger insert, one update per touched
+    balance and order, one commit.
+
+    Running balances are computed in memory in instruction order, so each entry records
+    the order and client totals right after it. Results come back in instruction order,
+    failures as the HTTPException that payment would get on its own.
+    """
+    order_ids = sorted({instruction.order_id for instruction in instructions})
+    orders = {order.id: order for order in repo.get_client_orders(order_ids)}
+    order_balances = {balance.order_id: balance for balance in repo.get_order_balances(order_ids)}
+    client_ids = sorted({order.client_id for order in orders.values()})
+    client_balances = {balance.client_id: balance for balance in repo.get_client_balances(client_ids)}
+
+    results: list[PaymentReceipt | HTTPException | None] = [None] * len(instructions)
+    accepted: list[tuple[int, PaymentLedgerEntry, dict]] = []
+    touched_orders: dict[int, OrderBalance] = {}
+    touched_clients: dict[int, ClientBalance] = {}
+    order_statuses = {order_id: OrderStatus(order.status) for order_id, order in orders.items()}
+    now = datetime.utcnow()
+    for index, instruction in enumerate(instructions):
+        order = orders.get(instruction.order_id)
+        if order is None or (order.client_id != instruction.user_id and not instruction.is_admin):
+            results[index] = HTTPException(status_code=404, detail="Order not found or access denied")
+            continue
+        balance = order_balances.get(order.id)
+        if balance is None:
+            balance = order_balances[order.id] = _new_order_balance(order)
+        client = client_balances.get(order.client_id)
+        if client is None:
+            client = client_balances[order.client_id] = ClientBalance(client_id=order.client_id)
+
+        if instruction.kind == PaymentKind.CAPTURE:
+            if order_statuses[order.id] == OrderStatus.CANCELED:
+                results[index] = HTTPException(status_code=400, detail="Order is canceled")
+                continue
+            if order_statuses[order.id] == OrderStatus.CUSTOM_PENDING:
+                results[index] = HTTPException(status_code=400, detail="Order is awaiting its custom price")
+                continue
+            outstanding = round(balance.amount_due - balance.amount_paid, 2)
+            amount = round(instruction.amount if instruction.amount is not None else outstanding, 2)
+            if amount <= 0:
+                results[index] = HTTPException(status_code=400, detail="Order is already paid")
+                continue
+            if amount > outstanding + _EPSILON:
+                results[index] = HTTPException(status_code=400, detail=f"Amount exceeds the {outstanding} still due")
+                continue
+            balance.amount_paid = round(balance.amount_paid + amount, 2)
+            client.total_captured = round(client.total_captured + amount, 2)
+        else:
+            amount = round(instruction.amount if instruction.amount is not None else balance.amount_paid, 2)
+            if amount <= 0 or amount > balance.amount_paid + _EPSILON:
+                results[index] = HTTPException(status_code=400, detail=f"Amount exceeds the {balance.amount_paid} paid")
+                continue
+            balance.amount_paid = round(balance.amount_paid - amount, 2)
+            client.total_refunded = round(client.total_refunded + amount, 2)
+
+        client.net_paid = round(client.total_captured - client.total_refunded, 2)
+        balance.payment_status = _payment_status(balance, instruction.kind)
+        balance.updated_at = client.updated_at = now
+        if balance.payment_status == PaymentStatus.PAID:
+            order_statuses[order.id] = _PAID_TRANSITIONS.get(order_statuses[order.id], order_statuses[order.id])
+        elif balance.payment_status == PaymentStatus.REFUNDED:
+            order_statuses[order.id] = _REFUNDED_TRANSITIONS.get(order_statuses[order.id], order_statuses[order.id])
+
+        entry = PaymentLedgerEntry(
+            order_id=order.id, client_id=order.client_id, kind=instruction.kind, amount=amount,
+            order_paid_after=balance.amount_paid, client_paid_after=client.net_paid, created_at=now,
         )
-    return suppliers
\ No newline at end of file
+        touched_orders[order.id] = balance
+        touched_clients[client.client_id] = client
+        # Receipts are built now, before the commit expires the ORM objects
+        accepted.append((index, entry, dict(
+            order_id=order.id, kind=instruction.kind, amount=amount, amount_due=balance.amount_due,
+            amount_paid=balance.amount_paid, payment_status=balance.payment_status,
+        )))
+
+    if not accepted:
+        return results
+    status_changes = [
+        (order, order_statuses[order_id]) for order_id, order in orders.items()
+        if order_id in touched_orders and order_statuses[order_id] != OrderStatus(order.status)
+    ]
+    entry_ids = repo.write_ledger_batch(
+        [entry for _, entry, _ in accepted],
+        list(touched_orders.values()), list(touched_clients.values()), status_changes,
+    )
+    for position, (index, _, receipt) in enumerate(accepted):
+        if entry_ids is not None:
+            # The order status is the one after the whole batch
+            results[index] = PaymentReceipt(
+                entry_id=entry_ids[position], order_status=order_statuses[receipt["order_id"]], **receipt
+            )
+        elif len(instructions) > 1:
+            # A balance or order status moved underneath the batch (another worker); retry each payment alone
+            results[index] = record_payments_batch_service([instructions[index]])[0]
+        else:
+            results[index] = HTTPException(status_code=409, detail="Order changed while paying, please retry")
+    return results
+
+
+def get_order_balance_service(user_id: int, order_id: int) -> OrderBalanceRead:
+    """Get an order's balance; orders without payments yet are reported as unpaid."""
+    balance = repo.get_order_balance(order_id)
+    if balance is not None:
+        if balance.client_id != user_id:
+            check_is_admin(user_id)
+        return OrderBalanceRead.model_validate(balance)
+    order = next(iter(repo.get_client_orders([order_id])), None)
+    if order is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found or access denied")
+    if order.client_id != user_id:
+        check_is_admin(user_id)
+    return OrderBalanceRead.model_validate(_new_order_balance(order))
+
+def get_client_balance_service(user_id: int, client_id: Optional[int] = None) -> ClientBalanceRead:
+    """Get a client's payment totals (another client's only for admins)."""
+    client_id = user_id if client_id is None else client_id
+    if client_id != user_id:
+        check_is_admin(user_id)
+    balance = repo.get_client_balance(client_id)
+    if balance is None:
+        return ClientBalanceRead(client_id=client_id)
+    return ClientBalanceRead.model_validate(balance)
+
+def get_order_ledger_service(user_id: int, order_id: int) -> list[LedgerEntryRead]:
+    """Get the ledger entries of an order (the audit trail, not used for balances)."""
+    entries = repo.get_ledger_entries(order_id)
+    if entries and entries[0].client_id != user_id:
+        check_is_admin(user_id)
+    if not entries:
+        get_order_balance_service(user_id, order_id)
+    return [LedgerEntryRead.model_validate(entry) for entry in entries]
@@ -1,4 +1,5 @@
 from typing import Optional, List, TYPE_CHECKING 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, Relationship
 
 if TYPE_CHECKING:
@@ -6,6 +7,13 @@ if TYPE_CHECKING:
 
 class Product(SQLModel, table=True):
     __tablename__ = "products" # type: ignore
+    # Keyset-paging indexes of the catalog listing, see products/query.py
+    __table_args__ = (
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_name_id", "name", "id"),
+        Index("ix_products_supplier_price_id", "supplier_id", "price", "id"),
+        Index("ix_products_supplier_name_id", "supplier_id", "name", "id"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(index=True, nullable=False)
@@ -15,6 +23,3 @@ class Product(SQLModel, table=True):
 
     supplier_id: Optional[int] = Field(default=None, foreign_key="suppliers.id", index=True) 
     supplier: Optional["Supplier"] = Relationship(back_populates="products")
-
-
-
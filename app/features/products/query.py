@@ -0,0 +1,140 @@
+import base64
+import json
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import bindparam, inspect, tuple_
+
+from app.core.database import engine
+from app.features.products.models import Product
+from app.features.products.schemas import ProductListQuery
+
+# (filtered by supplier, sort field) -> index whose column order serves that listing
+_INDEX_BY_SHAPE: dict[tuple[bool, str], Optional[str]] = {
+    (False, "id"): None,  # primary key
+    (False, "price"): "ix_products_price_id",
+    (False, "name"): "ix_products_name_id",
+    (True, "id"): "ix_products_supplier_id",
+    (True, "price"): "ix_products_supplier_price_id",
+    (True, "name"): "ix_products_supplier_name_id",
+}
+
+_existing_indexes: Optional[set[str]] = None
+
+
+@dataclass(frozen=True)
+class ProductQueryPlan:
+    sort_field: str
+    descending: bool
+    # Index the listing walks (None: primary key or the index is missing in this DB)
+    index: Optional[str]
+    # Whether the price range is a seek on the chosen index rather than a residual filter
+    price_range_on_index: bool
+
+
+def _indexes_in_db() -> set[str]:
+    """Index names that actually exist on `products` (looked up once per process)."""
+    global _existing_indexes
+    if _existing_indexes is None:
+        _existing_indexes = {index["name"] for index in inspect(engine).get_indexes("products")}
+    return _existing_indexes
+
+def plan_product_query(query: ProductListQuery) -> ProductQueryPlan:
+    """Pick the index for a filter/sort combination.
+
+    Equality on supplier_id is the index prefix, the sort field comes next and the id
+    last, so the listing is an ordered index walk that stops after one page. Name
+    substring and stock filters are residual; the price range is a seek only when the
+    listing is sorted by price.
+    """
+    sort_field = query.sort.lstrip("-")
+    index = _INDEX_BY_SHAPE[(query.supplier_id is not None, sort_field)]
+    if index is not None and index not in _indexes_in_db():
+        index = None
+    return ProductQueryPlan(
+        sort_field=sort_field,
+        descending=query.sort.startswith("-"),
+        index=index,
+        price_range_on_index=sort_field == "price" and index is not None,
+    )
+
+
+def encode_cursor(plan: ProductQueryPlan, product: Product) -> str:
+    """Opaque cursor: the sort key of the last row of the page."""
+    key = [getattr(product, plan.sort_field), product.id]
+    raw = json.dumps({"s": plan.sort_field, "d": plan.descending, "k": key}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(plan: ProductQueryPlan, cursor: str) -> list[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        key = data["k"]
+    except (ValueError, KeyError, TypeError) as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from error
+    if data.get("s") != plan.sort_field or data.get("d") != plan.descending or len(key) != 2:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor does not match the sort order")
+    return key
+
+
+def plan_shape(query: ProductListQuery, plan: ProductQueryPlan) -> tuple:
+    """What of a listing query changes the SQL of `apply_plan` (not the values)."""
+    return (
+        query.supplier_id is not None, query.price_min is not None, query.price_max is not None,
+        query.in_stock, bool(query.name), bool(query.cursor), plan.sort_field, plan.descending, plan.index,
+    )
+
+def plan_params(query: ProductListQuery, plan: ProductQueryPlan) -> dict[str, Any]:
+    """Values of the parameters bound by `apply_plan` (decodes the cursor)."""
+    params: dict[str, Any] = {}
+    if query.supplier_id is not None:
+        params["supplier_id"] = query.supplier_id
+    if query.price_min is not None:
+        params["price_min"] = query.price_min
+    if query.price_max is not None:
+        params["price_max"] = query.price_max
+    if query.name:
+        params["name"] = query.name
+    if query.cursor:
+        params["last_value"], params["last_id"] = decode_cursor(plan, query.cursor)
+    return params
+
+def apply_plan(statement, query: ProductListQuery, plan: ProductQueryPlan):
+    """Add filters, ordering, the keyset seek and the index hint to a products select.
+
+    Values are bound parameters (see `plan_params`), so the statement is reused by every
+    query of the same `plan_shape`.
+    """
+    if query.supplier_id is not None:
+        statement = statement.where(Product.supplier_id == bindparam("supplier_id"))
+    if query.price_min is not None:
+        statement = statement.where(Product.price >= bindparam("price_min"))
+    if query.price_max is not None:
+        statement = statement.where(Product.price <= bindparam("price_max"))
+    if query.in_stock is not None:
+        statement = statement.where(Product.stock > 0 if query.in_stock else Product.stock <= 0)
+    if query.name:
+        statement = statement.where(Product.name.contains(bindparam("name"))) # type: ignore
+
+    sort_column = getattr(Product, plan.sort_field)
+    if query.cursor:
+        last_value = bindparam("last_value", type_=sort_column.type)
+        last_id = bindparam("last_id", type_=Product.id.type)
+        if plan.sort_field == "id":
+            seek = Product.id < last_id if plan.descending else Product.id > last_id
+        else:
+            row, last = tuple_(sort_column, Product.id), tuple_(last_value, last_id)
+            seek = row < last if plan.descending else row > last
+        statement = statement.where(seek)
+
+    if plan.descending:
+        order_by = [sort_column.desc()] if plan.sort_field == "id" else [sort_column.desc(), Product.id.desc()]
+    else:
+        order_by = [sort_column] if plan.sort_field == "id" else [sort_column, Product.id]
+    statement = statement.order_by(*order_by)
+
+    # Only MySQL honours hints; SQLite/PostgreSQL pick the same index from the ORDER BY and seek
+    if plan.index:
+        statement = statement.with_hint(Product, f"USE INDEX ({plan.index})", "mysql")
+    return statement
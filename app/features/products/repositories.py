@@ -1,26 +1,84 @@
+from typing import Sequence
+
+from sqlalchemy import Row, bindparam
 from sqlmodel import select
+from app.core.cache import get_cache
+from app.core.config import settings
 from app.core.database import SessionDep, db_session
+from app.core.invalidation import invalidate_after_commit
+from app.core.projection import projected_columns
+from app.core.statements import prebuilt
 from app.features.products.models import Product
+from app.features.products.query import ProductQueryPlan, apply_plan, plan_params, plan_shape
+from app.features.products.schemas import ProductListQuery
+
+product_cache = get_cache("products")
+
+_PRODUCT_BY_ID = select(Product).where(Product.id == bindparam("product_id"))
 
 
 def create_product(product: Product) -> None:
     """Create a product."""
     session: SessionDep = db_session.get()
     session.add(product)
+    session.flush()
+    invalidate_after_commit("products", product.id)
     session.commit()
 
 def get_product(product_id: int) -> Product | None:
-    """Get a product by ID."""
+    """Get a product by ID (read-through cache, the result is read-only)."""
+    cached: Product | None = product_cache.get(product_id, None)
+    if cached is not None:
+        return cached
     session: SessionDep = db_session.get()
-    statement = select(Product).where(Product.id == product_id)
-    result = session.exec(statement).first()
+    result = session.exec(_PRODUCT_BY_ID, params={"product_id": product_id}).first()
+    if result is not None:
+        # Detached copy, safe to share across sessions
+        product_cache.set(product_id, Product.model_validate(result))
     return result
 
-def get_products(page: int, page_size: int, name: str | None = None) -> list[Product]:
-    """Get products by page and optionally filter by name."""
+def get_products_by_ids(product_ids: Sequence[int]) -> dict[int, Product]:
+    """Get many products by ID: cached ones first, the rest with one IN query per
+    PRODUCT_BATCH_CHUNK_SIZE IDs (results are read-only, like `get_product`)."""
+    found: dict[int, Product] = {}
+    uncached = []
+    for product_id in product_ids:
+        cached: Product | None = product_cache.get(product_id, None)
+        if cached is not None:
+            found[product_id] = cached
+        else:
+            uncached.append(product_id)
+    if not uncached:
+        return found
+    session: SessionDep = db_session.get()
+    chunk_size = settings.PRODUCT_BATCH_CHUNK_SIZE
+    for start in range(0, len(uncached), chunk_size):
+        statement = select(Product).where(Product.id.in_(uncached[start:start + chunk_size])) # type: ignore
+        for result in session.exec(statement):
+            product = Product.model_validate(result)
+            product_cache.set(product.id, product)
+            found[product.id] = product
+    return found
+
+def get_products(query: ProductListQuery, plan: ProductQueryPlan, fields: Sequence[str]) -> list[Row]:
+    """Get one page of products (plus one row to detect a next page) following the query plan.
+
+    Only `fields` (plus the id and sort key, for the cursor) are selected, as plain rows
+    rather than ORM objects.
+    """
+    params = plan_params(query, plan)
+    if not query.cursor:
+        params["offset"] = (query.page - 1) * query.page_size
+    params["limit"] = query.page_size + 1
     session: SessionDep = db_session.get()
-    statement = select(Product).offset((page - 1) * page_size).limit(page_size)
-    if name:
-        statement = statement.where(Product.name.contains(name)) # type: ignore
-    result = session.exec(statement).all()
-    return list(result)
\ No newline at end of file
+
+    def build():
+        columns = projected_columns(Product, fields, required=("id", plan.sort_field))
+        statement = apply_plan(select(*columns), query, plan)
+        if not query.cursor:
+            statement = statement.offset(bindparam("offset"))
+        return statement.limit(bindparam("limit"))
+
+    statement = prebuilt(("products.list", tuple(fields), plan_shape(query, plan)), build)
+    result = session.exec(statement, params=params).all()
+    return list(result)
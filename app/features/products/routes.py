@@ -1,17 +1,69 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 
+from app.core.config import settings
 from app.core.database import get_session
+from app.core.encoding import negotiated_response
 from app.features.products.models import *
 from app.features.products.schemas import *
 from app.features.products.services import *
 
-router = APIRouter(prefix="/products", tags=["products"], dependencies=[Depends(get_session)])
+router = APIRouter(prefix="/products", tags=["products"], dependencies=[Depends(get_session, scope="function")])
+
+# Batch lookups, declared before /{product_id}
+@router.get("/batch", response_model=ProductBatchResponse)
+async def get_products_batch(
+    request: Request,
+    ids: str = Query(..., description="Comma-separated product IDs"),
+) -> Response:
+    """Get many products by ID in one request (e.g. a cart), plus the IDs not found."""
+    try:
+        try:
+            product_ids = [int(product_id) for product_id in ids.split(",") if product_id.strip()]
+        except ValueError as error:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="ids must be comma-separated integers",
+            ) from error
+        if not product_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No product IDs given",
+            )
+        return negotiated_response(request, get_products_batch_service(product_ids))
+    except HTTPException as error:
+        raise HTTPException(
+            status_code=error.status_code,
+            detail=error.detail,
+        ) from error
+    except Exception as error:
+        print(error)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        ) from error
+
+@router.post("/batch", response_model=ProductBatchResponse)
+async def post_products_batch(request: Request, batch: ProductBatchRequest) -> Response:
+    """Get many products by ID, for ID lists too long for a query string."""
+    try:
+        return negotiated_response(request, get_products_batch_service(batch.ids))
+    except HTTPException as error:
+        raise HTTPException(
+            status_code=error.status_code,
+            detail=error.detail,
+        ) from error
+    except Exception as error:
+        print(error)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        ) from error
 
 @router.get("/{product_id}", response_model=Product)
 async def get_product(product_id: int) -> Product | None:
     """Get a product by ID."""
     try:
-        product: Product | None = get_product_service(product_id)
+        product: Product | None = await get_product_service_coalesced(product_id)
         return product
     except HTTPException as error:
         raise HTTPException(
@@ -44,11 +96,35 @@ async def create_product(product: ProductCreate) -> Product:
         ) from error
     
 @router.get("/", response_model=list[Product])
-async def get_products(page: int = 1, name: str | None = None) -> list[Product]:
-    """Get products by page and optionally filter by name."""
+async def get_products(
+    request: Request,
+    page: int = Query(1, ge=1),
+    name: str | None = None,
+    price_min: float | None = Query(None, ge=0),
+    price_max: float | None = Query(None, ge=0),
+    supplier_id: int | None = None,
+    in_stock: bool | None = None,
+    sort: ProductSort = "id",
+    page_size: int = Query(settings.CATALOG_DEFAULT_PAGE_SIZE, ge=1, le=settings.CATALOG_MAX_PAGE_SIZE),
+    cursor: str | None = Query(None, description="X-Next-Cursor of the previous page (keyset paging)"),
+    fields: str | None = Query(None, description=f"Comma-separated subset of: {', '.join(PRODUCT_LIST_FIELDS)}"),
+) -> Response:
+    """Get products by page, filtered by name, price range, supplier and stock.
+
+    Encoded as JSON, columnar JSON or MessagePack depending on `Accept`. When there is
+    a next page its keyset cursor is returned in the `X-Next-Cursor` header. `fields`
+    returns (and selects) only the given fields.
+    """
     try:
-        products: list[Product] = get_products_service(page, 10, name)
-        return products
+        query = ProductListQuery(
+            name=name, price_min=price_min, price_max=price_max, supplier_id=supplier_id,
+            in_stock=in_stock, sort=sort, page=page, page_size=page_size, cursor=cursor, fields=fields,
+        )
+        products, next_cursor = await get_products_service_coalesced(query)
+        response = negotiated_response(request, products)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response
     except HTTPException as error:
         raise HTTPException(
             status_code=error.status_code,
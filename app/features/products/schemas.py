@@ -1,4 +1,8 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from typing import Literal, Optional
+
+from app.core.config import settings
+from app.features.products.models import Product
 
 class ProductCreate(BaseModel):
     name: str = Field(..., description="Name of the product")
@@ -6,3 +10,30 @@ class ProductCreate(BaseModel):
     price: float = Field(..., description="Price of the product")
     stock: int = Field(..., description="Stock available")
     supplier_id: int = Field(..., description="ID of the supplier that owns the product")
+
+ProductSort = Literal["id", "-id", "price", "-price", "name", "-name"]
+
+# Fields of the products listing, in response order (`fields=` picks a subset)
+PRODUCT_LIST_FIELDS = ("id", "name", "description", "price", "stock", "supplier_id")
+
+class ProductListQuery(BaseModel):
+    """Filters, sort and paging of the products listing (hashable, so reads can be coalesced)."""
+    model_config = ConfigDict(frozen=True)
+
+    name: Optional[str] = Field(None, description="Substring of the product name")
+    price_min: Optional[float] = Field(None, ge=0, description="Minimum price (inclusive)")
+    price_max: Optional[float] = Field(None, ge=0, description="Maximum price (inclusive)")
+    supplier_id: Optional[int] = Field(None, description="Only products of this supplier")
+    in_stock: Optional[bool] = Field(None, description="Only products with (true) or without (false) stock")
+    sort: ProductSort = Field("id", description="Sort field, prefix with '-' for descending")
+    page: int = Field(1, ge=1, description="Page number (offset paging, ignored with a cursor)")
+    page_size: int = Field(10, ge=1, description="Items per page")
+    cursor: Optional[str] = Field(None, description="Keyset cursor from the previous page's X-Next-Cursor")
+    fields: Optional[str] = Field(None, description="Comma-separated subset of PRODUCT_LIST_FIELDS")
+
+class ProductBatchRequest(BaseModel):
+    ids: list[int] = Field(..., min_length=1, max_length=settings.PRODUCT_BATCH_MAX_IDS, description="Product IDs")
+
+class ProductBatchResponse(BaseModel):
+    items: list[Product] = Field(..., description="Found products, in request order")
+    missing: list[int] = Field(..., description="Requested IDs with no product")
@@ -1,11 +1,20 @@
+from typing import Any
+
 from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.projection import parse_fields, rows_to_dicts
+from app.core.singleflight import single_flight
 from app.features.products.models import Product
 from app.features.products.repositories import (
     create_product as repository_create_product,
     get_product as repository_get_product,
+    get_products_by_ids as repository_get_products_by_ids,
     get_products as repository_get_products,
 )
-from app.features.products.schemas import ProductCreate
+from app.features.products.query import encode_cursor, plan_product_query
+from app.features.products.schemas import PRODUCT_LIST_FIELDS, ProductBatchResponse, ProductCreate, ProductListQuery
+
+product_reads = single_flight("products")
 
 def get_product_service(product_id: int) -> Product | None:
     """Get a product by ID."""
@@ -17,6 +26,20 @@ def get_product_service(product_id: int) -> Product | None:
         )
     return product
 
+def get_products_batch_service(product_ids: list[int]) -> ProductBatchResponse:
+    """Get many products by ID, in request order, and the IDs that were not found."""
+    product_ids = list(dict.fromkeys(product_ids))
+    if len(product_ids) > settings.PRODUCT_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.PRODUCT_BATCH_MAX_IDS} product IDs per request",
+        )
+    found = repository_get_products_by_ids(product_ids)
+    return ProductBatchResponse(
+        items=[found[product_id] for product_id in product_ids if product_id in found],
+        missing=[product_id for product_id in product_ids if product_id not in found],
+    )
+
 def create_product_service(product_schema: ProductCreate) -> Product:
     """Create a new product."""
     product: Product = Product(**product_schema.model_dump())
@@ -28,13 +51,27 @@ def create_product_service(product_schema: ProductCreate) -> Product:
         )
     return product
 
-def get_products_service(page: int, page_size: int, name: str | None = None) -> list[Product]:
-    """Get products by page and optionally filter by name."""
-    products: list[Product] = repository_get_products(page, page_size, name)
+def get_products_service(query: ProductListQuery) -> tuple[list[dict[str, Any]], str | None]:
+    """Get a page of products matching the query (only the requested fields), and the
+    cursor of the next page."""
+    fields = parse_fields(query.fields, PRODUCT_LIST_FIELDS) or PRODUCT_LIST_FIELDS
+    plan = plan_product_query(query)
+    products = repository_get_products(query, plan, fields)
     if not products:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No products found",
         )
-    return products
+    next_cursor = None
+    if len(products) > query.page_size:
+        products = products[:query.page_size]
+        next_cursor = encode_cursor(plan, products[-1])
+    return rows_to_dicts(products, fields), next_cursor
+
+async def get_product_service_coalesced(product_id: int) -> Product | None:
+    """Get a product by ID, sharing one query among identical concurrent calls."""
+    return await product_reads.run(get_product_service, product_id)
 
+async def get_products_service_coalesced(query: ProductListQuery) -> tuple[list[dict[str, Any]], str | None]:
+    """Get a page of products, sharing one query among identical concurrent calls."""
+    return await product_reads.run(get_products_service, query)
@@ -1,25 +1,51 @@
+from typing import Sequence
+
+from sqlalchemy import Row, bindparam
 from sqlmodel import select
+from app.core.cache import get_cache
 from app.core.database import SessionDep, db_session
+from app.core.invalidation import invalidate_after_commit
+from app.core.projection import projected_columns
+from app.core.statements import prebuilt
 from app.features.suppliers.models import Supplier
 
+supplier_cache = get_cache("suppliers")
+
+_SUPPLIER_BY_ID = select(Supplier).where(Supplier.id == bindparam("supplier_id"))
+
 def create_supplier(supplier: Supplier) -> None:
     """Create a supplier."""
     session: SessionDep = db_session.get()
     session.add(supplier)
+    session.flush()
+    invalidate_after_commit("suppliers", supplier.id)
     session.commit()
 
 def get_supplier(supplier_id: int) -> Supplier | None:
-    """Get a supplier by ID."""
+    """Get a supplier by ID (read-through cache, the result is read-only)."""
+    cached: Supplier | None = supplier_cache.get(supplier_id, None)
+    if cached is not None:
+        return cached
     session: SessionDep = db_session.get()
-    statement = select(Supplier).where(Supplier.id == supplier_id)
-    result = session.exec(statement).first()
+    result = session.exec(_SUPPLIER_BY_ID, params={"supplier_id": supplier_id}).first()
+    if result is not None:
+        # Detached copy, safe to share across sessions
+        supplier_cache.set(supplier_id, Supplier.model_validate(result))
     return result
 
-def get_suppliers(page: int, page_size: int, name: str | None = None) -> list[Supplier]:
-    """Get suppliers by page and optionally filter by name."""
+def get_suppliers(page: int, page_size: int, fields: Sequence[str], name: str | None = None) -> list[Row]:
+    """Get suppliers by page and optionally filter by name, selecting only `fields`."""
     session: SessionDep = db_session.get()
-    statement = select(Supplier).offset((page - 1) * page_size).limit(page_size)
+
+    def build():
+        statement = select(*projected_columns(Supplier, fields)).offset(bindparam("offset")).limit(bindparam("limit"))
+        if name:
+            statement = statement.where(Supplier.name.contains(bindparam("name"))) # type: ignore
+        return statement
+
+    statement = prebuilt(("suppliers.list", tuple(fields), bool(name)), build)
+    params = {"offset": (page - 1) * page_size, "limit": page_size}
     if name:
-        statement = statement.where(Supplier.name.contains(name)) # type: ignore
-    result = session.exec(statement).all()
+        params["name"] = name
+    result = session.exec(statement, params=params).all()
     return list(result)
\ No newline at end of file
@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 
 from app.core.database import get_session
+from app.core.encoding import negotiated_response
 from app.features.suppliers.models import *
 from app.features.suppliers.schemas import *
 from app.features.suppliers.services import *
 
-router = APIRouter(prefix="/suppliers", tags=["suppliers"], dependencies=[Depends(get_session)])
+router = APIRouter(prefix="/suppliers", tags=["suppliers"], dependencies=[Depends(get_session, scope="function")])
 
 @router.get("/{supplier_id}", response_model=Supplier)
 async def get_supplier(supplier_id: int) -> Supplier | None:
@@ -44,11 +45,20 @@ async def create_supplier(supplier: SupplierCreate) -> Supplier:
         ) from error
     
 @router.get("/", response_model=list[Supplier])
-async def get_suppliers(page: int = 1, name: str | None = None) -> list[Supplier]:
-    """Get suppliers by page and optionally filter by name."""
+async def get_suppliers(
+    request: Request,
+    page: int = 1,
+    name: str | None = None,
+    fields: str | None = Query(None, description=f"Comma-separated subset of: {', '.join(SUPPLIER_LIST_FIELDS)}"),
+) -> Response:
+    """Get suppliers by page and optionally filter by name.
+
+    Encoded as JSON, columnar JSON or MessagePack depending on `Accept`. `fields`
+    returns (and selects) only the given fields.
+    """
     try:
-        suppliers: list[Supplier] = get_suppliers_service(page, 10, name)
-        return suppliers
+        suppliers = get_suppliers_service(page, 10, name, fields)
+        return negotiated_response(request, suppliers)
     except HTTPException as error:
         raise HTTPException(
             status_code=error.status_code,
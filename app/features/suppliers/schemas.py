@@ -10,4 +10,9 @@ class SupplierCreate(BaseModel):
     country: str = Field(..., min_length=1, max_length=100)
     postal_code: str = Field(..., min_length=1, max_length=20)
     is_active: bool = Field(default=True)
-    
\ No newline at end of file
+    
+
+# Fields of the suppliers listing, in response order (`fields=` picks a subset)
+SUPPLIER_LIST_FIELDS = (
+    "id", "name", "email", "phone", "address", "city", "state", "country", "postal_code", "is_active"
+)
@@ -1,4 +1,7 @@
+from typing import Any
+
 from fastapi import HTTPException, status
+from app.core.projection import parse_fields, rows_to_dicts
 from app.features.suppliers.models import Supplier
 from app.features.suppliers.repositories import (
     create_supplier as repository_create_supplier,
@@ -6,7 +9,7 @@ from app.features.suppliers.repositories import (
     get_suppliers as repository_get_suppliers,
 )
 
-from app.features.suppliers.schemas import SupplierCreate
+from app.features.suppliers.schemas import SUPPLIER_LIST_FIELDS, SupplierCreate
 
 def get_supplier_service(supplier_id: int) -> Supplier | None:
     """Get a supplier by ID."""
@@ -29,12 +32,15 @@ def create_supplier_service(supplier_schema: SupplierCreate) -> Supplier:
         )
     return supplier
 
-def get_suppliers_service(page: int, page_size: int, name: str | None = None) -> list[Supplier]:
-    """Get suppliers by page and optionally filter by name."""
-    suppliers: list[Supplier] = repository_get_suppliers(page, page_size, name)
+def get_suppliers_service(
+    page: int, page_size: int, name: str | None = None, fields: str | None = None
+) -> list[dict[str, Any]]:
+    """Get suppliers by page and optionally filter by name (only the requested fields)."""
+    selected = parse_fields(fields, SUPPLIER_LIST_FIELDS) or SUPPLIER_LIST_FIELDS
+    suppliers = repository_get_suppliers(page, page_size, selected, name)
     if not suppliers:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No suppliers found",
         )
-    return suppliers
\ No newline at end of file
+    return rows_to_dicts(suppliers, selected)
\ No newline at end of file
@@ -1,29 +1,91 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
+import time
 
+from app.core.admission import AdmissionControlMiddleware
+from app.core.cache_snapshot import cache_snapshot_writer, load_cache_snapshot
+from app.core.capture import TrafficCaptureMiddleware, stop_capture
+from app.core.config import settings
 from app.core.database import init_db
-from app.features.auth.routes import router as auth_router
-from app.features.products.routes import router as products_router
-from app.features.suppliers.routes import router as suppliers_router
-from app.features.orders.routes import router as orders_router
+from app.core.deadlines import DeadlineMiddleware
+from app.core.events import event_bus
+from app.core.invalidation import invalidation_bus
+from app.core.profiling import ProfilingMiddleware
+from app.core.startup import Feature, LazyFeatureMiddleware, load_feature, shutdown_features, startup_timings
+
+MODEL_MODULES = [
+  "app.features.auth.models",
+  "app.features.products.models",
+  "app.features.suppliers.models",
+  "app.features.orders.models",
+  "app.features.payments.models",
+]
+
+FEATURES = [
+  Feature("/auth", "app.features.auth.routes", on_shutdown="app.core.security:stop_password_hasher"),
+  Feature("/products", "app.features.products.routes", requires=("app.features.suppliers.models",)),
+  Feature("/suppliers", "app.features.suppliers.routes"),
+  Feature(
+    "/order", "app.features.orders.routes",
+    on_load="app.features.orders.consumers:register_order_consumers",
+    on_shutdown="app.features.orders.intake:stop_order_intake",
+  ),
+  Feature(
+    "/payments", "app.features.payments.routes",
+    on_shutdown="app.features.payments.ledger:stop_ledger_writer",
+  ),
+  Feature("/admin", "app.features.admin.routes"),
+]
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-  init_db()
+  started = time.perf_counter()
+  init_db(MODEL_MODULES)
+  startup_timings["init_db"] = time.perf_counter() - started
+  event_bus.start()
+  invalidation_bus.start()
+  if settings.CACHE_SNAPSHOT_ENABLED:
+    # After the invalidation bus starts, so nothing invalidated during the load is missed
+    started = time.perf_counter()
+    load_cache_snapshot()
+    startup_timings["cache_snapshot"] = time.perf_counter() - started
+    cache_snapshot_writer.start()
   yield
+  shutdown_features(FEATURES)
+  cache_snapshot_writer.stop()
+  invalidation_bus.stop()
+  event_bus.stop()
+  stop_capture()
 
 app = FastAPI(lifespan=lifespan)
 
+# Innermost, so a profile covers the request itself and not its wait for admission
+if settings.PROFILING_ENABLED:
+  app.add_middleware(ProfilingMiddleware)
+
+# Inside admission control: the deadline covers the request, not its wait for a slot
+if settings.REQUEST_DEADLINES_ENABLED:
+  app.add_middleware(DeadlineMiddleware)
+
+if settings.ADMISSION_CONTROL_ENABLED:
+  app.add_middleware(AdmissionControlMiddleware)
+
 app.add_middleware(
   CORSMiddleware,
   allow_origins=["*"],
   allow_credentials=True,
   allow_methods=["*"],
   allow_headers=["*"],
+  expose_headers=["X-Next-Cursor"],
 )
 
-app.include_router(auth_router)
-app.include_router(products_router)
-app.include_router(suppliers_router)
-app.include_router(orders_router)
\ No newline at end of file
+if settings.FAST_START:
+  app.add_middleware(LazyFeatureMiddleware, target=app, features=FEATURES)
+else:
+  for feature in FEATURES:
+    load_feature(app, feature)
+
+# Outermost, so the capture sees what clients sent, including requests admission turned away
+if settings.CAPTURE_ENABLED:
+  app.add_middleware(TrafficCaptureMiddleware)
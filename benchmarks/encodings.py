@@ -0,0 +1,76 @@
+"""Bytes on the wire and encode CPU per list encoding and content coding.
+
+Encodes synthetic product rows (like GET /products/) and paginated orders (like
+GET /order/all) with every supported format, with and without compression.
+
+    python -m benchmarks.encodings [--rows 100] [--repeat 200]
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.core.encoding import compress_body, encode_body, supported_encodings, supported_media_types
+
+
+def _products(rows: int) -> list[dict]:
+    return [
+        {
+            "id": index,
+            "name": f"Product {index}",
+            "description": f"Description of product number {index}",
+            "price": round(1.5 + index * 0.25, 2),
+            "stock": index % 50,
+            "supplier_id": index % 7 + 1,
+        }
+        for index in range(1, rows + 1)
+    ]
+
+def _orders_page(rows: int) -> dict:
+    created = datetime(2024, 1, 1)
+    return {
+        "page": 1,
+        "page_size": rows,
+        "total_items": rows * 10,
+        "total_pages": 10,
+        "items": [
+            {
+                "id": index,
+                "client_id": index % 13 + 1,
+                "total_price": round(index * 3.75, 2),
+                "status": "confirmed",
+                "created_at": (created + timedelta(minutes=index)).isoformat(),
+                "updated_at": (created + timedelta(minutes=index)).isoformat(),
+            }
+            for index in range(1, rows + 1)
+        ],
+    }
+
+
+def _measure(data, media_type: str, encoding: str | None, repeat: int) -> tuple[int, float]:
+    started = time.process_time()
+    for _ in range(repeat):
+        body, _ = compress_body(encode_body(data, media_type), encoding)
+    return len(body), (time.process_time() - started) / repeat * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    payloads = {"products": _products(args.rows), "orders page": _orders_page(args.rows)}
+    for name, data in payloads.items():
+        print(f"\n{name} ({args.rows} rows)")
+        print(f"{'format':<36}{'coding':<10}{'bytes':>10}{'cpu us':>12}")
+        for media_type in supported_media_types():
+            for encoding in [None, *supported_encodings()]:
+                size, cpu = _measure(data, media_type, encoding, args.repeat)
+                print(f"{media_type:<36}{encoding or 'identity':<10}{size:>10}{cpu:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Logins per second (POST /auth/login through the ASGI app) at several scrypt costs,
+with the KDF in the process pool, and how responsive the event loop stays meanwhile.
+
+Each cost runs in a fresh interpreter on a fresh database with --users users whose
+passwords are hashed at that cost; --concurrency clients place --logins logins. A
+ticker on the event loop records how late its 5 ms sleeps wake up (loop lag).
+
+    python -m benchmarks.login [--costs 12,14,15,16] [--workers 2] [--concurrency 16] [--logins 200]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+_LOGIN_SNIPPET = """
+import asyncio, json, time
+import httpx
+from app.main import MODEL_MODULES, app
+from app.core.config import settings
+from app.core.database import init_db, session_scope
+from app.core.security import hash_password, password_hasher
+from app.features.auth.models import User
+
+init_db(MODEL_MODULES)
+stored = hash_password("password1", settings.PASSWORD_SCRYPT_LOG_N, settings.PASSWORD_SCRYPT_R, settings.PASSWORD_SCRYPT_P)
+with session_scope() as session:
+    session.add_all([
+        User(email=f"user{{index}}@example.com", full_name=f"User {{index}}", password=stored)
+        for index in range({users})
+    ])
+    session.commit()
+
+async def run():
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lags.append(time.perf_counter() - started - 0.005)
+
+    latencies, errors = [], {{}}
+    indexes = iter(range({logins}))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login(index):
+            return await client.post(
+                "/auth/login", json={{"email": f"user{{index % {users}}}@example.com", "password": "password1"}}
+            )
+
+        async def worker():
+            for index in indexes:
+                started = time.perf_counter()
+                response = await login(index)
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+
+        # Start the pool processes outside the measurement
+        await asyncio.gather(*(login(index) for index in range({workers})))
+        tick = asyncio.create_task(ticker())
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range({concurrency})))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await tick
+    password_hasher.stop()
+    latencies.sort()
+    lags.sort()
+    print(json.dumps({{
+        "elapsed": elapsed, "ok": len(latencies), "errors": errors,
+        "p50": latencies[len(latencies) // 2] if latencies else None,
+        "p99": latencies[int(len(latencies) * 0.99)] if latencies else None,
+        "lag_p99": lags[int(len(lags) * 0.99)] if lags else None,
+        "lag_max": lags[-1] if lags else None,
+    }}))
+
+asyncio.run(run())
+"""
+
+
+def _ms(seconds) -> float:
+    return seconds * 1000 if seconds is not None else float("nan")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--costs", default="12,14,15,16", help="comma-separated PASSWORD_SCRYPT_LOG_N values")
+    parser.add_argument("--workers", type=int, default=2, help="PASSWORD_HASH_WORKERS")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--users", type=int, default=50)
+    args = parser.parse_args()
+
+    snippet = _LOGIN_SNIPPET.format(
+        users=args.users, logins=args.logins, concurrency=args.concurrency, workers=args.workers
+    )
+    print(f"{'log_n':<8}{'logins/s':>10}{'ok':>6}{'failed':>8}{'p50 ms':>10}{'p99 ms':>10}{'lag p99 ms':>12}{'lag max ms':>12}")
+    for cost in [int(cost) for cost in args.costs.split(",")]:
+        database_path = os.path.join(tempfile.mkdtemp(), "login.db")
+        env = {
+            **os.environ, "DATABASE_URL": f"sqlite:///{database_path}", "PASSWORD_SCRYPT_LOG_N": str(cost),
+            "PASSWORD_HASH_WORKERS": str(args.workers), "PASSWORD_HASH_MAX_PENDING": str(max(args.concurrency, 64)),
+            "ADMISSION_CONTROL_ENABLED": "0", "INVALIDATION_BACKEND": "none", "SLOW_QUERY_LOG_ENABLED": "0",
+        }
+        output = subprocess.run(
+            [sys.executable, "-c", snippet], env=env, check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        failed = sum(result["errors"].values())
+        print(
+            f"{cost:<8}{result['ok'] / result['elapsed']:>10.1f}{result['ok']:>6}{failed:>8}"
+            f"{_ms(result['p50']):>10.1f}{_ms(result['p99']):>10.1f}{_ms(result['lag_p99']):>12.1f}{_ms(result['lag_max']):>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Replay captured traffic (CAPTURE_ENABLED=true) and compare latencies between runs.
+
+Requests are sent at their captured offsets divided by --speed (0 sends them as fast as
+--concurrency allows), in process through ASGI or against a running server. Latencies are
+reported per route template, with the requests whose status differs from the capture.
+Replay against a database restored to the state it had when the capture started, or
+writes (purchases, signups) will not reproduce; redacted passwords make logins differ.
+
+    python -m benchmarks.replay run captures/traffic.jsonl [--target asgi|http://127.0.0.1:8000]
+        [--app app.main:app] [--speed 1.0] [--concurrency 50] [--output run.json]
+    python -m benchmarks.replay diff baseline.json candidate.json
+"""
+import argparse
+import asyncio
+import base64
+import glob
+import importlib
+import json
+import time
+from collections import defaultdict
+
+import httpx
+
+# Long-lived responses that never complete on their own
+DEFAULT_EXCLUDE = ["/order/stream"]
+
+
+def load_capture(pattern: str) -> list[dict]:
+    """Records of one capture file, or of a glob over it and its rotated backups, by time."""
+    records = []
+    for path in sorted(glob.glob(pattern)) or [pattern]:
+        with open(path) as capture:
+            records.extend(json.loads(line) for line in capture if line.strip())
+    return sorted(records, key=lambda record: record["t"])
+
+def _request_body(record: dict) -> bytes | None:
+    if record.get("body") is None:
+        return None
+    if record["body_encoding"] == "base64":
+        return base64.b64decode(record["body"])
+    return record["body"].encode()
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of a sorted list."""
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+def summarize(latencies: list[float]) -> dict[str, float]:
+    ordered = sorted(latencies)
+    if not ordered:
+        return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "p50": round(_percentile(ordered, 0.50), 3),
+        "p90": round(_percentile(ordered, 0.90), 3),
+        "p99": round(_percentile(ordered, 0.99), 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+async def _replay(records: list[dict], client: httpx.AsyncClient, speed: float, concurrency: int) -> dict[str, dict]:
+    routes: dict[str, dict] = defaultdict(lambda: {"count": 0, "errors": 0, "mismatches": 0, "latencies_ms": []})
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+    first = records[0]["t"] if records else 0.0
+    started = loop.time()
+
+    async def send(record: dict) -> None:
+        route = routes[f"{record['method']} {record.get('route') or record['path']}"]
+        request_started = time.perf_counter()
+        try:
+            async with semaphore:
+                request_started = time.perf_counter()
+                response = await client.request(
+                    record["method"], record["path"], params=httpx.QueryParams(record.get("query", "")),
+                    headers=record.get("headers") or {}, content=_request_body(record),
+                )
+            status = response.status_code
+        except httpx.HTTPError:
+            status = None
+        route["count"] += 1
+        route["latencies_ms"].append((time.perf_counter() - request_started) * 1000)
+        if status is None or status >= 500:
+            route["errors"] += 1
+        if status != record.get("status"):
+            route["mismatches"] += 1
+
+    tasks = []
+    for record in records:
+        if speed > 0:
+            delay = started + (record["t"] - first) / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(record)))
+    await asyncio.gather(*tasks)
+    return routes
+
+
+async def _run_target(records: list[dict], target: str, app_path: str, speed: float, concurrency: int) -> dict[str, dict]:
+    timeout = httpx.Timeout(30.0)
+    limits = httpx.Limits(max_connections=concurrency)
+    if target != "asgi":
+        async with httpx.AsyncClient(base_url=target, timeout=timeout, limits=limits) as client:
+            return await _replay(records, client, speed, concurrency)
+    module_name, _, attribute = app_path.partition(":")
+    app = getattr(importlib.import_module(module_name), attribute or "app")
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=timeout) as client:
+            return await _replay(records, client, speed, concurrency)
+
+
+def run(args: argparse.Namespace) -> None:
+    excluded = args.exclude or DEFAULT_EXCLUDE
+    records = [
+        record for record in load_capture(args.capture)
+        if not any(record["path"].startswith(prefix) for prefix in excluded)
+    ]
+    started = time.perf_counter()
+    routes = asyncio.run(_run_target(records, args.target, args.app, args.speed, args.concurrency))
+    elapsed = time.perf_counter() - started
+
+    report = {
+        "capture": args.capture, "target": args.target, "speed": args.speed, "concurrency": args.concurrency,
+        "requests": len(records), "elapsed_s": round(elapsed, 3),
+        "routes": {
+            name: {**{key: value for key, value in route.items() if key != "latencies_ms"}, **summarize(route["latencies_ms"])}
+            for name, route in sorted(routes.items())
+        },
+    }
+    print(f"{len(records)} requests in {elapsed:.2f} s ({len(records) / elapsed if elapsed else 0:.1f} req/s)")
+    print(f"{'route':<44}{'count':>8}{'errors':>8}{'status!=':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, route in report["routes"].items():
+        print(
+            f"{name:<44}{route['count']:>8}{route['errors']:>8}{route['mismatches']:>10}"
+            f"{route['p50']:>10.2f}{route['p90']:>10.2f}{route['p99']:>10.2f}{route['max']:>10.2f}"
+        )
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+
+def diff(args: argparse.Namespace) -> None:
+    with open(args.baseline) as baseline_file, open(args.candidate) as candidate_file:
+        baseline, candidate = json.load(baseline_file)["routes"], json.load(candidate_file)["routes"]
+
+    def change(old: float, new: float) -> str:
+        return f"{(new - old) / old * 100:+.1f}%" if old else "-"
+
+    print(f"{'route':<44}{'p50 ms':>18}{'':>9}{'p99 ms':>18}{'':>9}{'errors':>10}")
+    for name in sorted(baseline.keys() | candidate.keys()):
+        old, new = baseline.get(name), candidate.get(name)
+        if old is None or new is None:
+            print(f"{name:<44}{'only in ' + ('candidate' if old is None else 'baseline'):>18}")
+            continue
+        print(
+            f"{name:<44}{old['p50']:>8.2f} -> {new['p50']:<6.2f}{change(old['p50'], new['p50']):>9}"
+            f"{old['p99']:>8.2f} -> {new['p99']:<6.2f}{change(old['p99'], new['p99']):>9}"
+            f"{old['errors']:>5} -> {new['errors']}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="replay a capture and report latencies per route")
+    run_parser.add_argument("capture", help="capture file, or a glob such as 'captures/traffic.jsonl*'")
+    run_parser.add_argument("--target", default="asgi", help="'asgi' (in process) or a base URL")
+    run_parser.add_argument("--app", default="app.main:app")
+    run_parser.add_argument("--speed", type=float, default=1.0, help="1.0 is the captured pace, 0 is as fast as possible")
+    run_parser.add_argument("--concurrency", type=int, default=50)
+    run_parser.add_argument("--exclude", action="append", help="path prefix to skip (repeatable)")
+    run_parser.add_argument("--output", help="write the report as JSON, for diff")
+    run_parser.set_defaults(handler=run)
+    diff_parser = commands.add_parser("diff", help="compare two run reports")
+    diff_parser.add_argument("baseline")
+    diff_parser.add_argument("candidate")
+    diff_parser.set_defaults(handler=diff)
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
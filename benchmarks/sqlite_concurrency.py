@@ -0,0 +1,108 @@
+"""Purchases per second on a SQLite file with concurrent writers, default vs
+SQLITE_CONCURRENCY_PROFILE (WAL, busy timeout, cache/mmap pragmas, single writer).
+
+Each profile runs in a fresh interpreter on a fresh database: --threads threads place
+--purchases synchronous purchases (the POST /order/purchase path, one session each),
+spread over --products products so they contend on stock updates.
+
+    python -m benchmarks.sqlite_concurrency [--threads 16] [--purchases 2000] [--products 20]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+_PURCHASE_SNIPPET = """
+import json, time
+from concurrent.futures import ThreadPoolExecutor
+from app.main import MODEL_MODULES
+from app.core.database import init_db, session_scope
+from app.core.events import event_bus
+from app.features.auth.models import User
+from app.features.products.models import Product
+from app.features.suppliers.models import Supplier
+from app.features.orders.schemas import ClientOrderPurchaseRequest, ProductPurchaseItem
+from app.features.orders.services import create_purchase_order_service
+
+init_db(MODEL_MODULES)
+with session_scope() as session:
+    session.add(Supplier(
+        name="Bench", email="bench@example.com", phone="1", address="-", city="-",
+        state="-", country="-", postal_code="-"
+    ))
+    session.add_all([
+        User(email=f"user{{index}}@example.com", full_name=f"User {{index}}", password="-")
+        for index in range({threads})
+    ])
+    session.add_all([
+        Product(name=f"Product {{index}}", description="-", price=1.0, stock=10**9, supplier_id=1)
+        for index in range({products})
+    ])
+    session.commit()
+event_bus.start()
+
+def purchase(index):
+    request = ClientOrderPurchaseRequest(products=[
+        ProductPurchaseItem(product_id=index % {products} + 1, amount=1),
+        ProductPurchaseItem(product_id=(index * 7 + 3) % {products} + 1, amount=1),
+    ] if {products} > 1 else [ProductPurchaseItem(product_id=1, amount=1)])
+    started = time.perf_counter()
+    try:
+        with session_scope():
+            create_purchase_order_service(index % {threads} + 1, request)
+        return time.perf_counter() - started, None
+    except Exception as error:
+        return time.perf_counter() - started, str(getattr(error, "detail", error))[:60]
+
+started = time.perf_counter()
+with ThreadPoolExecutor({threads}) as pool:
+    results = list(pool.map(purchase, range({purchases})))
+elapsed = time.perf_counter() - started
+event_bus.stop()
+errors = {{}}
+for _, error in results:
+    if error:
+        errors[error] = errors.get(error, 0) + 1
+latencies = sorted(latency for latency, error in results if not error)
+print(json.dumps({{
+    "elapsed": elapsed, "ok": len(latencies), "errors": errors,
+    "p50": latencies[len(latencies) // 2] if latencies else None,
+    "p99": latencies[int(len(latencies) * 0.99)] if latencies else None,
+}}))
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--purchases", type=int, default=2000)
+    parser.add_argument("--products", type=int, default=20)
+    args = parser.parse_args()
+
+    snippet = _PURCHASE_SNIPPET.format(threads=args.threads, purchases=args.purchases, products=args.products)
+    print(f"{'profile':<12}{'purchases/s':>14}{'ok':>8}{'failed':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    errors_by_profile = {}
+    for profile, enabled in (("default", "0"), ("concurrent", "1")):
+        database_path = os.path.join(tempfile.mkdtemp(), "purchases.db")
+        env = {
+            **os.environ, "DATABASE_URL": f"sqlite:///{database_path}", "SQLITE_CONCURRENCY_PROFILE": enabled,
+            "INVALIDATION_BACKEND": "none", "SLOW_QUERY_LOG_ENABLED": "0",
+        }
+        output = subprocess.run(
+            [sys.executable, "-c", snippet], env=env, check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        failed = sum(result["errors"].values())
+        p50 = result["p50"] * 1000 if result["p50"] is not None else float("nan")
+        p99 = result["p99"] * 1000 if result["p99"] is not None else float("nan")
+        print(f"{profile:<12}{result['ok'] / result['elapsed']:>14.1f}{result['ok']:>8}{failed:>8}{p50:>10.1f}{p99:>10.1f}")
+        errors_by_profile[profile] = result["errors"]
+    for profile, errors in errors_by_profile.items():
+        for error, count in errors.items():
+            print(f"{profile} failure x{count}: {error}")
+
+
+if __name__ == "__main__":
+    main()
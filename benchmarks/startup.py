@@ -0,0 +1,80 @@
+"""Startup-time benchmark: import and init durations per feature, eager vs FAST_START.
+
+Every measurement runs in a fresh interpreter so nothing is already imported.
+
+    python -m benchmarks.startup [--runs 5] [--database-url sqlite:///./bench.db]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BASE_MODULES = ["fastapi", "sqlmodel", "app.core.config", "app.core.database"]
+
+_IMPORT_SNIPPET = """
+import importlib, json, sys, time
+for module in {base!r}:
+    importlib.import_module(module)
+started = time.perf_counter()
+for module in {modules!r}:
+    importlib.import_module(module)
+print(json.dumps(time.perf_counter() - started))
+"""
+
+_STARTUP_SNIPPET = """
+import asyncio, json, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter() - started
+
+async def run_lifespan():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        return time.perf_counter() - started
+
+ready = asyncio.run(run_lifespan())
+from app.core.startup import startup_timings
+print(json.dumps({"import": imported, "ready": ready, **startup_timings}))
+"""
+
+
+def _run(snippet: str, env: dict[str, str]) -> object:
+    output = subprocess.run(
+        [sys.executable, "-c", snippet], env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'startup.db')}"
+    env = {**os.environ, "DATABASE_URL": database_url, "INVALIDATION_BACKEND": "none"}
+    os.environ.update(env)
+
+    from app.main import FEATURES
+
+    print(f"{'step':<32}{'median ms':>12}{'min ms':>12}")
+    base = [_run(_IMPORT_SNIPPET.format(base=[], modules=BASE_MODULES), env) for _ in range(args.runs)]
+    print(f"{'import core':<32}{statistics.median(base) * 1000:>12.1f}{min(base) * 1000:>12.1f}")
+    for feature in FEATURES:
+        modules = [*feature.requires, feature.routes_module]
+        samples = [_run(_IMPORT_SNIPPET.format(base=BASE_MODULES, modules=modules), env) for _ in range(args.runs)]
+        print(f"{'import ' + feature.prefix:<32}{statistics.median(samples) * 1000:>12.1f}{min(samples) * 1000:>12.1f}")
+
+    # First eager run creates the schema and stores its fingerprint
+    _run(_STARTUP_SNIPPET, {**env, "FAST_START": "0"})
+    for mode, fast_start in (("eager", "0"), ("fast", "1")):
+        runs = [_run(_STARTUP_SNIPPET, {**env, "FAST_START": fast_start}) for _ in range(args.runs)]
+        for step in ("import", "init_db", "ready"):
+            samples = [run[step] for run in runs]
+            print(f"{mode + ' ' + step:<32}{statistics.median(samples) * 1000:>12.1f}{min(samples) * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Python-side cost per query of the hot repository functions: statements rebuilt on
+every call (how the repositories built them before) vs prebuilt statements with bound
+parameters (app/core/statements.py).
+
+Both variants run the same SQL against a small SQLite database, so the difference is
+the statement construction and cache-key work skipped by the prebuilt ones. Each call
+starts from an empty identity map, like a request.
+
+    python -m benchmarks.statements [--calls 2000] [--rounds 5]
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'statements.db')}")
+os.environ.setdefault("SLOW_QUERY_LOG_ENABLED", "0")
+os.environ.setdefault("INVALIDATION_BACKEND", "none")
+
+from sqlalchemy.orm import joinedload, selectinload
+from sqlmodel import func, select
+
+from app.core.database import init_db, session_scope
+from app.main import MODEL_MODULES
+from app.features.auth.models import Role, User, UserRole
+from app.features.auth.repositories import get_user
+from app.features.orders.models import ClientOrder, ClientOrderProduct, OrderStatus, SupplierOrder
+from app.features.orders.repositories import (
+    get_client_order_by_id, get_client_orders_paginated, get_supplier_order_by_id,
+    get_supplier_orders_paginated, get_user_with_roles
+)
+from app.features.products.models import Product
+from app.features.products.query import plan_product_query
+from app.features.products.repositories import _PRODUCT_BY_ID, get_products
+from app.features.products.schemas import ProductListQuery
+from app.features.suppliers.models import Supplier
+from app.features.suppliers.repositories import _SUPPLIER_BY_ID, get_suppliers
+
+_PRODUCT_FIELDS = ("name", "price")
+_LIST_QUERY = ProductListQuery(supplier_id=1, price_min=2.0, sort="price", page_size=10)
+
+
+def _seed() -> None:
+    init_db(MODEL_MODULES)
+    with session_scope() as session:
+        session.add(Supplier(
+            name="Bench", email="bench@example.com", phone="1", address="-", city="-",
+            state="-", country="-", postal_code="-"
+        ))
+        session.add(User(email="user@example.com", full_name="User", password="-"))
+        session.add(Role(id=1, title="customer"))
+        session.add_all([
+            Product(name=f"Product {index}", description="-", price=1.0 + index, stock=100, supplier_id=1)
+            for index in range(50)
+        ])
+        session.flush()
+        session.add(UserRole(user_id=1, role_id=1))
+        created = datetime(2024, 1, 1)
+        for index in range(50):
+            order = ClientOrder(
+                client_id=1, total_price=10.0, status=OrderStatus.CONFIRMED, created_at=created + timedelta(hours=index)
+            )
+            session.add(order)
+            session.flush()
+            session.add_all([
+                ClientOrderProduct(order_id=order.id, product_id=line + 1, amount=1, unit_price=2.0)
+                for line in range(3)
+            ])
+            session.add(SupplierOrder(supplier_id=1, product_id=1, amount=5, total_price=10.0, created_at=created))
+        session.commit()
+
+
+# --- Previous implementations: the statement is rebuilt on every call ---
+def _rebuilt_get_product(session):
+    return session.exec(select(Product).where(Product.id == 1)).first()
+
+def _rebuilt_get_supplier(session):
+    return session.exec(select(Supplier).where(Supplier.id == 1)).first()
+
+def _rebuilt_get_user(session):
+    return session.exec(select(User).where(User.email == "user@example.com")).first()
+
+def _rebuilt_get_user_with_roles(session):
+    return session.exec(select(User).where(User.id == 1).options(selectinload(User.roles))).first()
+
+def _rebuilt_get_client_order_by_id(session):
+    statement = select(ClientOrder).where(ClientOrder.id == 1).where(ClientOrder.client_id == 1)
+    statement = statement.options(selectinload(ClientOrder.product_links).joinedload(ClientOrderProduct.product))
+    return session.exec(statement).first()
+
+def _rebuilt_get_supplier_order_by_id(session):
+    statement = select(SupplierOrder).where(SupplierOrder.id == 1) \
+        .options(joinedload(SupplierOrder.product), joinedload(SupplierOrder.supplier))
+    return session.exec(statement).first()
+
+def _rebuilt_get_products(session):
+    statement = select(Product.name, Product.price, Product.id) \
+        .where(Product.supplier_id == 1) \
+        .where(Product.price >= 2.0) \
+        .order_by(Product.price, Product.id) \
+        .offset(0) \
+        .limit(11)
+    return session.exec(statement).all()
+
+def _rebuilt_get_suppliers(session):
+    statement = select(Supplier.id, Supplier.name).offset(0).limit(10).where(Supplier.name.contains("Ben"))
+    return session.exec(statement).all()
+
+def _rebuilt_get_client_orders_paginated(session):
+    columns = (ClientOrder.id, ClientOrder.client_id, ClientOrder.total_price, ClientOrder.status,
+               ClientOrder.created_at, ClientOrder.updated_at)
+    statement = select(*columns).where(ClientOrder.client_id == 1).where(ClientOrder.status == OrderStatus.CONFIRMED)
+    count_statement = select(func.count(ClientOrder.id.distinct())).select_from(ClientOrder) \
+        .where(ClientOrder.client_id == 1, ClientOrder.status == OrderStatus.CONFIRMED)
+    total = session.exec(count_statement).one_or_none() or 0
+    return session.exec(statement.order_by(ClientOrder.created_at.desc()).offset(0).limit(10)).all(), total
+
+def _rebuilt_get_supplier_orders_paginated(session):
+    total = session.exec(select(func.count()).select_from(SupplierOrder)).one()
+    columns = (SupplierOrder.id, SupplierOrder.supplier_id, SupplierOrder.product_id, SupplierOrder.amount,
+               SupplierOrder.total_price, SupplierOrder.status, SupplierOrder.created_at, SupplierOrder.updated_at)
+    statement = select(*columns).order_by(SupplierOrder.created_at.desc()).offset(0).limit(10)
+    return session.exec(statement).all(), total
+
+
+# --- Current implementations ---
+_CASES = [
+    ("get_product", _rebuilt_get_product,
+     lambda session: session.exec(_PRODUCT_BY_ID, params={"product_id": 1}).first()),
+    ("get_supplier", _rebuilt_get_supplier,
+     lambda session: session.exec(_SUPPLIER_BY_ID, params={"supplier_id": 1}).first()),
+    ("get_user", _rebuilt_get_user, lambda session: get_user("user@example.com")),
+    ("get_user_with_roles", _rebuilt_get_user_with_roles, lambda session: get_user_with_roles(1)),
+    ("get_client_order_by_id", _rebuilt_get_client_order_by_id,
+     lambda session: get_client_order_by_id(1, client_id=1, include_archived=False)),
+    ("get_supplier_order_by_id", _rebuilt_get_supplier_order_by_id,
+     lambda session: get_supplier_order_by_id(1, include_archived=False)),
+    ("get_products", _rebuilt_get_products,
+     lambda session: get_products(_LIST_QUERY, plan_product_query(_LIST_QUERY), _PRODUCT_FIELDS)),
+    ("get_suppliers", _rebuilt_get_suppliers,
+     lambda session: get_suppliers(1, 10, ("id", "name"), name="Ben")),
+    ("get_client_orders_paginated", _rebuilt_get_client_orders_paginated,
+     lambda session: get_client_orders_paginated(client_id=1, status=OrderStatus.CONFIRMED)),
+    ("get_supplier_orders_paginated", _rebuilt_get_supplier_orders_paginated,
+     lambda session: get_supplier_orders_paginated()),
+]
+
+
+def _per_call_us(call, calls: int) -> float:
+    with session_scope() as session:
+        for _ in range(50):
+            call(session)
+            session.expunge_all()
+        started = time.perf_counter()
+        for _ in range(calls):
+            call(session)
+            session.expunge_all()
+        return (time.perf_counter() - started) / calls * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5, help="best of N rounds per variant")
+    args = parser.parse_args()
+
+    _seed()
+    print(f"{'function':<32}{'rebuilt us':>12}{'prebuilt us':>13}{'saved us':>10}{'saved':>8}")
+    for name, rebuilt, prebuilt in _CASES:
+        before = min(_per_call_us(rebuilt, args.calls) for _ in range(args.rounds))
+        after = min(_per_call_us(prebuilt, args.calls) for _ in range(args.rounds))
+        print(f"{name:<32}{before:>12.1f}{after:>13.1f}{before - after:>10.1f}{(before - after) / before:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()